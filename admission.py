@@ -0,0 +1,231 @@
+"""
+Admission Control
+Per-endpoint concurrency limits with bounded wait queues, fast rejection when a
+queue is full, and priority for interactive chat over background ingestion
+"""
+
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import List, Optional, Dict, Any
+
+LANE_CHAT = "chat"
+LANE_INGESTION = "ingestion"
+
+
+class AdmissionRejected(Exception):
+    """Request turned away: status 429 when the wait queue is full, 503 when the wait timed out"""
+
+    def __init__(self, lane: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{lane} {reason}")
+        self.lane = lane
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Lane:
+    def __init__(self, name: str, priority: int, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiters: "deque[asyncio.Future[None]]" = deque()
+        self.avg_hold_seconds = 0.0  # Moving average, 0 until the first release
+        self.metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0,
+            "avg_wait_ms": 0.0,
+            "max_wait_ms": 0.0
+        }
+
+
+class AdmissionTicket:
+    """A held slot; release() is idempotent and may be called from any thread"""
+
+    def __init__(self, controller: "AdmissionController", lane: _Lane, loop: asyncio.AbstractEventLoop):
+        self._controller = controller
+        self._lane = lane
+        self._loop = loop
+        self._started = time.perf_counter()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        held = time.perf_counter() - self._started
+        try:
+            self._loop.call_soon_threadsafe(self._controller._release, self._lane, held)
+        except RuntimeError:
+            pass  # Event loop already closed at shutdown
+
+
+class AdmissionController:
+    """
+    Lanes (one per endpoint class) each allow max_concurrent requests in flight
+    and up to max_queue more waiting, all within a shared max_concurrent total
+    that is meant to be below the sum of the lane limits. A lane is admitted
+    only while no higher-priority lane has requests waiting, and freed slots go
+    to waiting lanes in priority order. Requests are rejected at once when
+    their queue is full and with 503 when they wait longer than queue_timeout.
+    Not thread-safe: use from one event loop.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self.max_concurrent = max_concurrent or int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+        self._lanes: List[_Lane] = []
+        self._active = 0
+
+    def add_lane(self,
+                 name: str,
+                 priority: int,
+                 max_concurrent: int,
+                 max_queue: int,
+                 queue_timeout: float) -> None:
+        """Register a lane; lower priority values are served first"""
+        self._lanes.append(_Lane(name, priority, max_concurrent, max_queue, queue_timeout))
+        self._lanes.sort(key=lambda lane: lane.priority)
+
+    def _lane(self, name: str) -> _Lane:
+        for lane in self._lanes:
+            if lane.name == name:
+                return lane
+        raise ValueError(f"Unknown admission lane '{name}'")
+
+    def _has_capacity(self, lane: _Lane) -> bool:
+        return lane.active < lane.max_concurrent and self._active < self.max_concurrent
+
+    def _yields_to_higher_priority(self, lane: _Lane) -> bool:
+        return any(other.waiters for other in self._lanes if other.priority < lane.priority)
+
+    def _retry_after(self, lane: _Lane) -> int:
+        """Seconds until the queue ahead has likely drained, at least 1"""
+        hold = lane.avg_hold_seconds or 1.0
+        return max(1, math.ceil(hold * (len(lane.waiters) + 1) / lane.max_concurrent))
+
+    def _occupy(self, lane: _Lane) -> None:
+        lane.active += 1
+        self._active += 1
+
+    def _record_admission(self, lane: _Lane, waited: float) -> None:
+        lane.metrics["admitted"] += 1
+        wait_ms = waited * 1000
+        lane.metrics["avg_wait_ms"] += (wait_ms - lane.metrics["avg_wait_ms"]) / lane.metrics["admitted"]
+        lane.metrics["max_wait_ms"] = max(lane.metrics["max_wait_ms"], wait_ms)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, highest-priority lane first"""
+        for lane in self._lanes:
+            while lane.waiters and self._has_capacity(lane):
+                waiter = lane.waiters.popleft()
+                if not waiter.done():
+                    self._occupy(lane)
+                    waiter.set_result(None)
+            if lane.waiters:
+                # Lower-priority lanes wait until this one has drained its queue
+                return
+
+    def _release(self, lane: _Lane, held: float) -> None:
+        lane.active -= 1
+        self._active -= 1
+        lane.avg_hold_seconds = held if not lane.avg_hold_seconds else 0.8 * lane.avg_hold_seconds + 0.2 * held
+        self._dispatch()
+
+    async def acquire(self, name: str) -> AdmissionTicket:
+        """Wait for a slot in a lane; raises AdmissionRejected when the request cannot be admitted"""
+        lane = self._lane(name)
+        loop = asyncio.get_running_loop()
+
+        if not lane.waiters and self._has_capacity(lane) and not self._yields_to_higher_priority(lane):
+            self._occupy(lane)
+            self._record_admission(lane, 0.0)
+            return AdmissionTicket(self, lane, loop)
+
+        if len(lane.waiters) >= lane.max_queue:
+            lane.metrics["rejected_queue_full"] += 1
+            raise AdmissionRejected(lane.name, 429, self._retry_after(lane), "queue is full")
+
+        waiter: "asyncio.Future[None]" = loop.create_future()
+        lane.waiters.append(waiter)
+        lane.metrics["queued"] += 1
+        lane.metrics["max_queue_depth"] = max(lane.metrics["max_queue_depth"], len(lane.waiters))
+        queued_at = time.perf_counter()
+
+        try:
+            await asyncio.wait({waiter}, timeout=lane.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(lane, waiter)
+            raise
+
+        if not waiter.done():
+            self._abandon(lane, waiter)
+            lane.metrics["rejected_timeout"] += 1
+            raise AdmissionRejected(lane.name, 503, self._retry_after(lane), "queue wait timed out")
+
+        # The slot was occupied on our behalf when it was handed over
+        self._record_admission(lane, time.perf_counter() - queued_at)
+        return AdmissionTicket(self, lane, loop)
+
+    def _abandon(self, lane: _Lane, waiter: "asyncio.Future[None]") -> None:
+        """Leave the queue; a slot handed over in the meantime is passed on"""
+        if waiter.done() and not waiter.cancelled():
+            lane.active -= 1
+            self._active -= 1
+            self._dispatch()
+            return
+        waiter.cancel()
+        try:
+            lane.waiters.remove(waiter)
+        except ValueError:
+            pass
+        # Lanes that were yielding to this queue may proceed
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self._active,
+            "lanes": {
+                lane.name: {
+                    "priority": lane.priority,
+                    "max_concurrent": lane.max_concurrent,
+                    "max_queue": lane.max_queue,
+                    "queue_timeout": lane.queue_timeout,
+                    "active": lane.active,
+                    "queue_depth": len(lane.waiters),
+                    **lane.metrics
+                }
+                for lane in self._lanes
+            }
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    """Chat lane ahead of ingestion, limits from CHAT_* and UPLOAD_* settings"""
+    controller = AdmissionController()
+    controller.add_lane(
+        LANE_CHAT,
+        priority=0,
+        max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "8")),
+        max_queue=int(os.getenv("CHAT_MAX_QUEUE", "32")),
+        queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "10"))
+    )
+    controller.add_lane(
+        LANE_INGESTION,
+        priority=1,
+        max_concurrent=int(os.getenv("UPLOAD_MAX_CONCURRENT", "2")),
+        max_queue=int(os.getenv("UPLOAD_MAX_QUEUE", "4")),
+        queue_timeout=float(os.getenv("UPLOAD_QUEUE_TIMEOUT_SECONDS", "5"))
+    )
+    return controller
@@ -0,0 +1,188 @@
+"""
+Semantic Answer Cache
+Reuses answers to previously asked questions whose embeddings are close enough,
+scoped to the live corpus version so re-ingestion invalidates them
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Hashable
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Bounded cache of (query embedding, answer, sources) entries. A lookup returns
+    the most similar entry in the same scope if its cosine similarity is at least
+    the threshold. Entries expire after ttl_seconds and the least recently used
+    are evicted past max_entries. A new corpus version drops every entry.
+    """
+
+    def __init__(self,
+                 embeddings: Embeddings,
+                 threshold: Optional[float] = None,
+                 max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.embeddings = embeddings
+        self.threshold = threshold or float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+        # Entry vectors live in one preallocated matrix; _entries maps slot -> entry, LRU first
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        self._corpus_version: Hashable = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def _aembed(self, question: str) -> np.ndarray:
+        vector = np.asarray(await self.embeddings.aembed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, slot: int) -> None:
+        """Free an entry's slot (caller holds the lock)"""
+        del self._entries[slot]
+        self._free_slots.append(slot)
+
+    def _check_version(self, corpus_version: Hashable) -> None:
+        """Drop every entry when the corpus changed (caller holds the lock)"""
+        if corpus_version == self._corpus_version:
+            return
+        if self._entries:
+            self.invalidations += 1
+            logger.info(f"🗑️ Answer cache invalidated ({len(self._entries)} entries) for corpus version {corpus_version}")
+            for slot in list(self._entries):
+                self._drop(slot)
+        self._corpus_version = corpus_version
+
+    def _match(self,
+               vector: np.ndarray,
+               corpus_version: Hashable,
+               scope: Hashable,
+               start_time: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._check_version(corpus_version)
+
+            for slot in [slot for slot, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]:
+                self._drop(slot)
+
+            slots = [slot for slot, entry in self._entries.items() if entry["scope"] == scope]
+            if slots:
+                similarities = self._vectors[slots] @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    slot = slots[best]
+                    self._entries.move_to_end(slot)
+                    entry = self._entries[slot]
+                    self.hits += 1
+                    self.saved_seconds += max(0.0, entry["latency"] - (time.perf_counter() - start_time))
+                    return {**entry, "similarity": float(similarities[best])}
+
+            self.misses += 1
+            return None
+
+    def lookup(self, question: str, corpus_version: Hashable, scope: Hashable = None) -> Optional[Dict[str, Any]]:
+        """Closest cached entry for an equivalent question, or None"""
+        start_time = time.perf_counter()
+        return self._match(self._embed(question), corpus_version, scope, start_time)
+
+    async def alookup(self, question: str, corpus_version: Hashable, scope: Hashable = None) -> Optional[Dict[str, Any]]:
+        """Async lookup: embeds the question without blocking the event loop"""
+        start_time = time.perf_counter()
+        return self._match(await self._aembed(question), corpus_version, scope, start_time)
+
+    def _insert(self,
+                vector: np.ndarray,
+                question: str,
+                answer: str,
+                sources: List[Dict[str, Any]],
+                latency: float,
+                corpus_version: Hashable,
+                scope: Hashable) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            # An answer produced against a corpus that changed while it was generated is dropped
+            if self._corpus_version is None:
+                self._corpus_version = corpus_version
+            if corpus_version != self._corpus_version:
+                return
+
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            if not self._free_slots:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._entries[slot] = {
+                "question": question,
+                "answer": answer,
+                "sources": sources,
+                "latency": latency,
+                "scope": scope,
+                "created_at": time.time()
+            }
+
+    def store(self,
+              question: str,
+              answer: str,
+              sources: List[Dict[str, Any]],
+              latency: float,
+              corpus_version: Hashable,
+              scope: Hashable = None) -> None:
+        """Cache an answer with the time it took to produce (ignored if the corpus changed since lookup)"""
+        self._insert(self._embed(question), question, answer, sources, latency, corpus_version, scope)
+
+    async def astore(self,
+                     question: str,
+                     answer: str,
+                     sources: List[Dict[str, Any]],
+                     latency: float,
+                     corpus_version: Hashable,
+                     scope: Hashable = None) -> None:
+        """Async store: embeds the question without blocking the event loop"""
+        self._insert(await self._aembed(question), question, answer, sources, latency, corpus_version, scope)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in list(self._entries):
+                self._drop(slot)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "corpus_version": self._corpus_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "saved_seconds": self.saved_seconds
+            }
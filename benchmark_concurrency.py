@@ -0,0 +1,151 @@
+"""
+Chat Concurrency Benchmark
+Measures /api/chat throughput and latency as in-flight requests grow against one server.
+Each request asks a different question and bypasses summary answers, the answer
+cache and request coalescing, so every request runs the full chat pipeline.
+
+Admission control caps chat at CHAT_MAX_CONCURRENT in flight (and the shared
+ADMISSION_MAX_CONCURRENT) with CHAT_MAX_QUEUE waiting; requests beyond that are
+rejected with 429/503 and reported in their own column rather than as errors.
+To measure event-loop scaling past the defaults, start the server with higher
+limits, e.g. CHAT_MAX_CONCURRENT=64 CHAT_MAX_QUEUE=64 ADMISSION_MAX_CONCURRENT=66.
+"""
+
+import time
+import asyncio
+import argparse
+from typing import List, Optional, Dict, Any
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of latencies"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_level(client: httpx.AsyncClient,
+                    url: str,
+                    concurrency: int,
+                    total_requests: int,
+                    message: str,
+                    bypass_cache: bool = True) -> Dict[str, Any]:
+    """Send total_requests chat requests with at most concurrency in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    rejected = 0
+
+    async def one_request(i: int) -> None:
+        nonlocal errors, rejected
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                response = await client.post(f"{url}/api/chat", json={
+                    "message": message.format(i=i, concurrency=concurrency),
+                    "session_id": f"bench-{concurrency}-{i}",
+                    "bypass_cache": bypass_cache
+                })
+                if response.status_code in (429, 503):
+                    # Turned away by admission control, not a failure of the chat pipeline
+                    rejected += 1
+                    return
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start_time)
+            except httpx.HTTPError:
+                errors += 1
+
+    # Probe /api/health while chats are in flight: a blocked event loop shows up here first
+    health_latencies: List[float] = []
+    stop = asyncio.Event()
+
+    async def probe_health() -> None:
+        while not stop.is_set():
+            start_time = time.perf_counter()
+            try:
+                await client.get(f"{url}/api/health")
+                health_latencies.append(time.perf_counter() - start_time)
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+
+    probe = asyncio.create_task(probe_health())
+    start_time = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(total_requests)))
+    elapsed = time.perf_counter() - start_time
+    stop.set()
+    await probe
+
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "rejected": rejected,
+        "elapsed": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50) if latencies else 0.0,
+        "p95": percentile(latencies, 95) if latencies else 0.0,
+        "health_p95": percentile(health_latencies, 95) if health_latencies else 0.0,
+        "health_max": max(health_latencies) if health_latencies else 0.0
+    }
+
+
+async def chat_admission_limit(client: httpx.AsyncClient, url: str) -> Optional[int]:
+    """Chat requests the server runs at once (lane and shared cap), from /api/status; None if unknown"""
+    try:
+        response = await client.get(f"{url}/api/status")
+        response.raise_for_status()
+        admission = response.json()["admission"]
+        return min(admission["lanes"]["chat"]["max_concurrent"], admission["max_concurrent"])
+    except (httpx.HTTPError, KeyError, TypeError, ValueError):
+        return None
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /api/chat under increasing concurrency")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running API")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Comma-separated in-flight request counts")
+    parser.add_argument("--requests-per-level", type=int, default=32, help="Requests sent at each level")
+    parser.add_argument(
+        "--message",
+        default="What do the documents say about requirement {i} for team {concurrency}?",
+        help="Question template; {i} (request index) and {concurrency} make each request distinct"
+    )
+    parser.add_argument(
+        "--use-shortcuts",
+        action="store_true",
+        help="Allow summary answers, the answer cache and coalescing (measures the fast paths instead)"
+    )
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+    limits = httpx.Limits(max_connections=max(levels) + 1, max_keepalive_connections=max(levels) + 1)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        chat_limit = await chat_admission_limit(client, args.url)
+        if chat_limit is not None and max(levels) > chat_limit:
+            print(
+                f"Note: the server admits {chat_limit} chat requests at once; higher levels queue or are "
+                f"rejected (raise CHAT_MAX_CONCURRENT and ADMISSION_MAX_CONCURRENT to measure past it)"
+            )
+        print(
+            f"{'in-flight':>9} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'health p95':>11} {'health max':>11} "
+            f"{'rejected':>9} {'errors':>7}"
+        )
+        for concurrency in levels:
+            result = await run_level(
+                client, args.url, concurrency, args.requests_per_level, args.message,
+                bypass_cache=not args.use_shortcuts
+            )
+            print(
+                f"{result['concurrency']:>9} {result['requests_per_second']:>8.2f} "
+                f"{result['p50']:>8.2f} {result['p95']:>8.2f} "
+                f"{result['health_p95'] * 1000:>9.1f}ms {result['health_max'] * 1000:>9.1f}ms "
+                f"{result['rejected']:>9} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+Context Packing
+Merges overlapping and adjacent retrieved chunks, drops duplicated text and
+fills a token budget in relevance order before chunks are stuffed into the prompt
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from typing import List, Optional, Dict, Any, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from token_counter import count_tokens, truncate_tokens, tokenizer_name
+
+logger = logging.getLogger(__name__)
+
+# Shortest shared text treated as splitter overlap when chunks carry no start_index
+MIN_TEXT_OVERLAP = 20
+
+# A truncated tail shorter than this is not worth adding
+MIN_TRUNCATED_TOKENS = 64
+
+
+class ContextPacker:
+    """
+    Turns ranked chunks into prompt context. Chunks from the same source and
+    page that overlap or touch are merged into one passage (by start_index
+    when present, else by matching text overlap); exact and contained
+    duplicates are dropped. Passages are then added in order of their best
+    chunk's rank until max_tokens is reached, truncating the last one.
+    """
+
+    def __init__(self,
+                 max_tokens: Optional[int] = None,
+                 model_name: str = "gpt-4o-mini",
+                 max_overlap_chars: int = 400):
+        self.max_tokens = max_tokens or int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+        self.max_overlap_chars = max_overlap_chars
+        self.model_name = model_name
+
+        self._lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "chunks_in": 0,
+            "passages_out": 0,
+            "tokens_in": 0,
+            "tokens_out": 0
+        }
+
+    def count_tokens(self, text: str) -> int:
+        return count_tokens(text, self.model_name)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        return truncate_tokens(text, max_tokens, self.model_name)
+
+    def _text_overlap(self, left: str, right: str) -> int:
+        """Length of the longest suffix of left that is a prefix of right"""
+        for size in range(min(len(left), len(right), self.max_overlap_chars), MIN_TEXT_OVERLAP - 1, -1):
+            if left.endswith(right[:size]):
+                return size
+        return 0
+
+    @staticmethod
+    def _passage(doc: Document, rank: int) -> Dict[str, Any]:
+        start = doc.metadata.get("start_index")
+        return {
+            "text": doc.page_content,
+            "start": start if isinstance(start, (int, float)) and start >= 0 else None,
+            "rank": rank,
+            "doc": doc,
+            "chunk_ids": [doc.metadata.get("chunk_id")]
+        }
+
+    @staticmethod
+    def _absorb(target: Dict[str, Any], other: Dict[str, Any], text: str) -> None:
+        if other["rank"] < target["rank"]:
+            target["rank"], target["doc"] = other["rank"], other["doc"]
+        target["text"] = text
+        target["chunk_ids"] += other["chunk_ids"]
+
+    def _merge_positioned(self, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge chunks whose character spans overlap or touch"""
+        merged: List[Dict[str, Any]] = []
+        for passage in sorted(passages, key=lambda p: p["start"]):
+            if merged:
+                last = merged[-1]
+                end = last["start"] + len(last["text"])
+                if passage["start"] <= end:
+                    tail = passage["text"][end - passage["start"]:]
+                    self._absorb(last, passage, last["text"] + tail)
+                    continue
+            merged.append(dict(passage))
+        return merged
+
+    def _merge_by_text(self, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge chunks that contain one another or share a splitter overlap"""
+        merged = [dict(passage) for passage in passages]
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(merged)):
+                for j in range(len(merged)):
+                    if i == j:
+                        continue
+                    left, right = merged[i], merged[j]
+                    if right["text"] in left["text"]:
+                        text = left["text"]
+                    else:
+                        overlap = self._text_overlap(left["text"], right["text"])
+                        if not overlap:
+                            continue
+                        text = left["text"] + right["text"][overlap:]
+                    self._absorb(left, right, text)
+                    del merged[j]
+                    changed = True
+                    break
+                if changed:
+                    break
+        return merged
+
+    def merge(self, documents: List[Document]) -> List[Dict[str, Any]]:
+        """Passages from ranked chunks, ordered by their best rank"""
+        seen = set()
+        groups: Dict[Tuple[str, Any], List[Dict[str, Any]]] = {}
+        for rank, doc in enumerate(documents):
+            digest = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            key = (str(doc.metadata.get("source", "")), doc.metadata.get("page"))
+            groups.setdefault(key, []).append(self._passage(doc, rank))
+
+        passages = []
+        for group in groups.values():
+            positioned = [p for p in group if p["start"] is not None]
+            unpositioned = [p for p in group if p["start"] is None]
+            passages += self._merge_positioned(positioned) if len(positioned) > 1 else positioned
+            passages += self._merge_by_text(unpositioned) if len(unpositioned) > 1 else unpositioned
+        return sorted(passages, key=lambda p: p["rank"])
+
+    def pack(self, documents: List[Document]) -> List[Document]:
+        """Merged, deduplicated passages within the token budget, most relevant first"""
+        if not documents:
+            return documents
+
+        packed, used = [], 0
+        for passage in self.merge(documents):
+            tokens = self.count_tokens(passage["text"])
+            text = passage["text"]
+            if used + tokens > self.max_tokens:
+                remaining = self.max_tokens - used
+                if remaining < MIN_TRUNCATED_TOKENS:
+                    break
+                text, tokens = self._truncate(text, remaining), remaining
+
+            metadata = dict(passage["doc"].metadata)
+            if len(passage["chunk_ids"]) > 1:
+                metadata["merged_chunk_ids"] = passage["chunk_ids"]
+            packed.append(Document(page_content=text, metadata=metadata))
+            used += tokens
+
+        with self._lock:
+            self.metrics["requests"] += 1
+            self.metrics["chunks_in"] += len(documents)
+            self.metrics["passages_out"] += len(packed)
+            self.metrics["tokens_in"] += sum(self.count_tokens(doc.page_content) for doc in documents)
+            self.metrics["tokens_out"] += used
+        return packed
+
+    def as_runnable(self) -> Runnable:
+        """Runnable stage to pipe after a retriever"""
+        return RunnableLambda(self.pack, name="pack_context")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tokens_in = self.metrics["tokens_in"]
+            return {
+                **self.metrics,
+                "max_tokens": self.max_tokens,
+                "tokenizer": tokenizer_name(self.model_name),
+                "tokens_saved_rate": 1 - self.metrics["tokens_out"] / tokens_in if tokens_in else 0.0
+            }
@@ -0,0 +1,173 @@
+"""
+Document Processing Pipeline
+Parallel PDF parsing and chunking for document ingestion
+"""
+
+import os
+import time
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple, Set
+from datetime import datetime
+
+from langchain_core.documents import Document
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_OVERLAP = 200
+
+
+def source_id_prefix(source: str) -> str:
+    """Prefix shared by the chunk IDs of every chunk from one source file"""
+    return hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:12] + "-"
+
+
+def make_chunk_id(document: Document) -> str:
+    """Build a stable chunk ID from source, page and a hash of the chunk content"""
+    source = str(document.metadata.get("source", ""))
+    page = document.metadata.get("page", 0)
+    content_hash = hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()[:24]
+    return f"{source_id_prefix(source)}p{page}-{content_hash}"
+
+
+def stale_chunk_ids(existing_ids: Set[str], documents: List[Document]) -> Set[str]:
+    """Existing chunk IDs of the documents' source files that are no longer among their chunks"""
+    prefixes = tuple({source_id_prefix(doc.metadata.get("source", "")) for doc in documents})
+    wanted_ids = {doc.metadata["chunk_id"] for doc in documents}
+    return {chunk_id for chunk_id in existing_ids - wanted_ids if chunk_id.startswith(prefixes)}
+
+
+def assign_chunk_ids(documents: List[Document]) -> List[Document]:
+    """Set metadata["chunk_id"] on each chunk and drop duplicate chunks"""
+    unique_documents = []
+    seen = set()
+    for doc in documents:
+        chunk_id = make_chunk_id(doc)
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+        doc.metadata["chunk_id"] = chunk_id
+        unique_documents.append(doc)
+
+    duplicates = len(documents) - len(unique_documents)
+    if duplicates:
+        logger.info(f"🔁 Dropped {duplicates} duplicate chunks")
+    return unique_documents
+
+
+def load_and_split_pdf(file_path: str,
+                       filename: str,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       chunk_overlap: int = DEFAULT_CHUNK_OVERLAP) -> Tuple[List[Document], Dict[str, Any]]:
+    """Load a single PDF and split it into chunks (runs inside a worker process)"""
+    start_time = time.perf_counter()
+
+    # Load PDF pages
+    loader = PyPDFLoader(file_path)
+    pages = loader.load()
+    parse_time = time.perf_counter() - start_time
+
+    # Split into chunks (start_index lets overlapping neighbours be merged at query time)
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True
+    )
+    splits = text_splitter.split_documents(pages)
+
+    # Add metadata
+    upload_time = datetime.now().isoformat()
+    for doc in splits:
+        doc.metadata["source"] = filename
+        doc.metadata["upload_time"] = upload_time
+
+    total_time = time.perf_counter() - start_time
+    timing = {
+        "filename": filename,
+        "pages": len(pages),
+        "chunks": len(splits),
+        "parse_time": round(parse_time, 4),
+        "split_time": round(total_time - parse_time, 4),
+        "total_time": round(total_time, 4),
+        "worker_pid": os.getpid()
+    }
+    return splits, timing
+
+
+class DocumentProcessor:
+    """
+    Fans PDF parsing and chunking out across a process pool
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 chunk_overlap: int = DEFAULT_CHUNK_OVERLAP):
+        if max_workers is None:
+            max_workers = int(os.getenv("INGEST_WORKERS", "0")) or (os.cpu_count() or 1)
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use"""
+        if self._executor is None:
+            logger.info(f"🔧 Starting document processing pool with {self.max_workers} workers")
+            # Spawn rather than fork: the pool starts inside a threaded server, and a forked
+            # child could inherit locks held by other threads and deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _submit(self, files: List[Tuple[str, str]]):
+        executor = self._get_executor()
+        return [
+            executor.submit(load_and_split_pdf, path, filename, self.chunk_size, self.chunk_overlap)
+            for path, filename in files
+        ]
+
+    @staticmethod
+    def _merge(files: List[Tuple[str, str]], outcomes: List[Any]) -> Tuple[List[Document], List[Dict[str, Any]]]:
+        """Merge per-file results in upload order, recording failures instead of aborting"""
+        all_documents = []
+        file_timings = []
+        for (path, filename), outcome in zip(files, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"❌ Failed to process {filename}: {str(outcome)}")
+                file_timings.append({"filename": filename, "chunks": 0, "error": str(outcome)})
+                continue
+
+            splits, timing = outcome
+            all_documents.extend(splits)
+            file_timings.append(timing)
+            logger.info(
+                f"📄 {filename}: {timing['pages']} pages, {timing['chunks']} chunks "
+                f"in {timing['total_time']:.3f}s (pid {timing['worker_pid']})"
+            )
+        return all_documents, file_timings
+
+    def process_files(self, files: List[Tuple[str, str]]) -> Tuple[List[Document], List[Dict[str, Any]]]:
+        """Parse and split (path, filename) pairs in parallel, preserving input order"""
+        if not files:
+            return [], []
+
+        outcomes = []
+        for future in self._submit(files):
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+        return self._merge(files, outcomes)
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
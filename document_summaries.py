@@ -0,0 +1,301 @@
+"""
+Document Summaries
+Map-reduce summaries per document and per corpus, built at ingestion time
+and served directly for summary-style questions
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+
+from document_processor import make_chunk_id
+
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = """Write a concise summary of the following part of the document "{source}".
+Keep key facts, figures, names, dates and policy or reference identifiers.
+
+{text}"""
+
+REDUCE_PROMPT = """The following are summaries of consecutive parts of the document "{source}".
+Combine them into one summary of the whole document: a short overview followed by its main points.
+
+{text}"""
+
+CORPUS_PROMPT = """The following are summaries of every document in a collection.
+Write an overview of the whole collection followed by the main points of each document.
+
+{text}"""
+
+# Summary requests ("summarize", "main points", "what are these documents about")
+_SUMMARY_TRIGGER = re.compile(
+    r"\b(summar\w*|overview|tl;?dr|gist|recap|highlights|main points?|key points?|key takeaways?"
+    r"|what (?:is|are) (?:this|these|they|the documents?|the files?)(?: about)?)\b"
+)
+
+# Words that may accompany a summary request without narrowing it to a topic
+_SUMMARY_FILLER = frozenset({
+    "a", "an", "the", "of", "in", "for", "to", "and", "on", "from", "me", "us", "i", "we", "my", "our",
+    "please", "can", "could", "would", "you", "give", "provide", "write", "show", "list", "tell",
+    "explain", "describe", "do", "does", "what", "is", "are", "this", "these", "they", "it", "them",
+    "about", "say", "says", "brief", "short", "quick", "comprehensive", "detailed", "high", "level",
+    "overall", "general", "all", "whole", "entire", "every", "each", "document", "documents", "doc",
+    "docs", "file", "files", "pdf", "pdfs", "uploaded", "content", "contents", "collection", "corpus",
+    "summary", "summaries", "summarize", "summarise", "overview", "tl", "dr", "tldr", "gist", "recap",
+    "highlights", "main", "key", "point", "points", "takeaway", "takeaways"
+})
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _name_words(source: str) -> List[str]:
+    stem = os.path.splitext(os.path.basename(source))[0].lower()
+    return _WORD_PATTERN.findall(stem)
+
+
+def classify_summary_intent(question: str, sources: Sequence[str] = ()) -> Tuple[bool, Optional[str]]:
+    """
+    Return (is_summary, source): whether the question asks for a summary of the
+    whole corpus (source None) or of one named document, rather than a topic
+    """
+    text = question.lower()
+    if not _SUMMARY_TRIGGER.search(text):
+        return False, None
+
+    words = set(_WORD_PATTERN.findall(text))
+
+    # A document is named when every word of its file name appears in the question
+    source = None
+    matched: set = set()
+    for candidate in sources:
+        name_words = set(_name_words(candidate))
+        if name_words and name_words <= words and len(name_words) > len(matched):
+            source, matched = candidate, name_words
+
+    # Anything left over ("summarize the refund policy") is a topic, better served by retrieval
+    if words - matched - _SUMMARY_FILLER:
+        return False, None
+    return True, source
+
+
+def document_digest(chunks: Sequence[Document]) -> str:
+    """Digest of a document's chunk IDs, which change whenever its content does"""
+    ids = "\n".join(doc.metadata.get("chunk_id") or make_chunk_id(doc) for doc in chunks)
+    return hashlib.sha256(ids.encode("utf-8")).hexdigest()
+
+
+def group_documents(documents: Sequence[Document]) -> Dict[str, List[Document]]:
+    """Chunks grouped by source document, in ingestion order"""
+    grouped: Dict[str, List[Document]] = {}
+    for doc in documents:
+        grouped.setdefault(str(doc.metadata.get("source", "")), []).append(doc)
+    return grouped
+
+
+class SummaryStore:
+    """
+    Document and corpus summaries in a JSON file next to the index, replaced
+    atomically and re-read when another worker rewrites it
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cached_mtime: Optional[int] = None
+        self._state: Dict[str, Any] = {"documents": {}, "corpus": None}
+
+    def read(self) -> Dict[str, Any]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._cached_mtime = None
+                self._state = {"documents": {}, "corpus": None}
+                return self._state
+
+        with self._lock:
+            if mtime != self._cached_mtime:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._state = json.load(f)
+                    self._cached_mtime = mtime
+                except (FileNotFoundError, json.JSONDecodeError) as e:
+                    logger.error(f"❌ Failed to read summaries {self.path}: {str(e)}")
+            return self._state
+
+    def write(self, state: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        state = {**state, "updated_at": datetime.now().isoformat()}
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def sources(self) -> List[str]:
+        return list(self.read()["documents"].keys())
+
+    def get(self, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Summary entry of one document, or of the corpus when source is None"""
+        state = self.read()
+        if source is None:
+            return state.get("corpus")
+        return state["documents"].get(source)
+
+    def get_stats(self) -> Dict[str, Any]:
+        state = self.read()
+        return {
+            "path": self.path,
+            "documents": len(state["documents"]),
+            "corpus_summary": state.get("corpus") is not None,
+            "updated_at": state.get("updated_at")
+        }
+
+
+class DocumentSummarizer:
+    """
+    Builds hierarchical summaries: chunks are grouped up to group_chars and
+    summarized in parallel (map), then partial summaries are merged until one
+    remains per document (reduce), and document summaries are merged into a
+    corpus summary. Unchanged documents keep their previous summary, and the
+    corpus summary is only rebuilt when the set of document digests changes.
+    """
+
+    def __init__(self,
+                 llm: Runnable,
+                 store: SummaryStore,
+                 group_chars: Optional[int] = None,
+                 max_concurrency: Optional[int] = None):
+        self.store = store
+        self.group_chars = group_chars or int(os.getenv("SUMMARY_GROUP_CHARS", "12000"))
+        self.max_concurrency = max_concurrency or int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+        self.map_chain = ChatPromptTemplate.from_template(MAP_PROMPT) | llm | StrOutputParser()
+        self.reduce_chain = ChatPromptTemplate.from_template(REDUCE_PROMPT) | llm | StrOutputParser()
+        self.corpus_chain = ChatPromptTemplate.from_template(CORPUS_PROMPT) | llm | StrOutputParser()
+
+    def _group(self, texts: Sequence[str]) -> List[str]:
+        """Join consecutive texts into groups of at most group_chars"""
+        groups, current, size = [], [], 0
+        for text in texts:
+            if current and size + len(text) > self.group_chars:
+                groups.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(text)
+            size += len(text)
+        if current:
+            groups.append("\n\n".join(current))
+        return groups
+
+    def _reduce(self, chain: Runnable, source: str, summaries: List[str]) -> str:
+        """Merge summaries level by level until a single one remains"""
+        while len(summaries) > 1:
+            groups = self._group(summaries)
+            if len(groups) == len(summaries) and len(groups) > 1:
+                # Every summary is already group-sized: merge pairwise so the level still shrinks
+                groups = ["\n\n".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+            summaries = chain.batch(
+                [{"source": source, "text": group} for group in groups],
+                config={"max_concurrency": self.max_concurrency}
+            )
+        return summaries[0]
+
+    def summarize_document(self, source: str, chunks: Sequence[Document]) -> str:
+        groups = self._group([doc.page_content for doc in chunks])
+        partials = self.map_chain.batch(
+            [{"source": source, "text": group} for group in groups],
+            config={"max_concurrency": self.max_concurrency}
+        )
+        return self._reduce(self.reduce_chain, source, partials)
+
+    def summarize_corpus(self, summaries: Dict[str, str]) -> str:
+        if len(summaries) == 1:
+            return next(iter(summaries.values()))
+        sections = [f"## {source}\n{summary}" for source, summary in summaries.items()]
+        return self._reduce(self.corpus_chain, "collection", sections)
+
+    def update(self, documents: Sequence[Document], merge: bool = False) -> Dict[str, int]:
+        """
+        Bring summaries in line with the ingested chunks: the full corpus, or with
+        merge only the uploaded files, keeping summaries of the other documents
+        """
+        state = self.store.read()
+        previous, previous_corpus = state["documents"], state.get("corpus")
+        grouped = group_documents(documents)
+        kept = {source: entry for source, entry in previous.items() if source not in grouped} if merge else {}
+        digests = {source: document_digest(chunks) for source, chunks in grouped.items()}
+        unchanged = {
+            source: previous[source] for source, digest in digests.items()
+            if source in previous and previous[source]["digest"] == digest
+        }
+        unchanged.update(kept)
+
+        order = [*kept, *grouped]
+        entry_digests = {**{source: entry["digest"] for source, entry in kept.items()}, **digests}
+        corpus_digest = hashlib.sha256(
+            "\n".join(entry_digests[source] for source in order).encode("utf-8")
+        ).hexdigest()
+        corpus_unchanged = previous_corpus is not None and previous_corpus.get("digest") == corpus_digest
+
+        # Stop serving summaries of changed or removed documents while new ones are built;
+        # the previous corpus summary is served until its replacement is ready
+        if set(unchanged) != set(previous):
+            self.store.write({"documents": unchanged, "corpus": previous_corpus})
+
+        summaries = dict(unchanged)
+        changed = [source for source in grouped if source not in unchanged]
+        for source in changed:
+            logger.info(f"📝 Summarizing '{source}' ({len(grouped[source])} chunks)")
+            summaries[source] = {
+                "digest": digests[source],
+                "summary": self.summarize_document(source, grouped[source]),
+                "chunks": len(grouped[source]),
+                "pages": len({doc.metadata.get("page") for doc in grouped[source]})
+            }
+
+        ordered = {source: summaries[source] for source in order}
+        if corpus_unchanged:
+            corpus = previous_corpus
+        else:
+            corpus = {
+                "digest": corpus_digest,
+                "summary": self.summarize_corpus({source: entry["summary"] for source, entry in ordered.items()}),
+                "documents": order
+            }
+        if changed or not corpus_unchanged or set(ordered) != set(previous):
+            self.store.write({"documents": ordered, "corpus": corpus})
+
+        result = {
+            "summarized": len(changed),
+            "unchanged": len(unchanged),
+            "removed": len(set(previous) - set(ordered)),
+            "corpus_summarized": not corpus_unchanged
+        }
+        logger.info(f"✅ Summaries updated: {result}")
+        return result
+
+
+def create_summary_store(index_name: str, summary_dir: Optional[str] = None) -> SummaryStore:
+    """Summary store under SUMMARY_DIR, shared by workers on one host"""
+    summary_dir = summary_dir or os.getenv("SUMMARY_DIR", "summaries")
+    return SummaryStore(os.path.join(summary_dir, f"{index_name}.json"))
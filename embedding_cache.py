@@ -0,0 +1,156 @@
+"""
+Embedding Cache
+Persistent content-addressed cache for document embeddings
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from array import array
+from typing import List, Optional, Dict, Any
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model with a SQLite-backed cache keyed by
+    model name plus a hash of the text, evicting least recently used entries
+    """
+
+    def __init__(self,
+                 embeddings: Embeddings,
+                 model_name: str,
+                 path: Optional[str] = None,
+                 max_entries: Optional[int] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        logger.info(f"✅ Embedding cache opened at {self.path}")
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for keys and refresh their access time"""
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector.tolist()
+            if rows:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows]
+                )
+        return found
+
+    def _store(self, entries: Dict[str, List[float]]) -> None:
+        """Insert new vectors and evict least recently used entries over the limit"""
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+            [(key, array("f", vector).tobytes(), now) for key, vector in entries.items()]
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+            logger.info(f"🧹 Evicted {overflow} embeddings from cache")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors for previously seen texts"""
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(list(set(keys)))
+            self._conn.commit()
+
+        # Embed each missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        hits = sum(1 for key in keys if key in cached)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+                self._conn.commit()
+            cached.update(computed)
+
+        with self._lock:
+            self.hits += hits
+            self.misses += len(texts) - hits
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query (queries are not cached)"""
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query without blocking the event loop (queries are not cached)"""
+        return await self.embeddings.aembed_query(text)
+
+    def clear(self) -> None:
+        """Remove all cached embeddings"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters and size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
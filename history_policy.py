@@ -0,0 +1,166 @@
+"""
+Chat History Policy
+Keeps prompts a roughly constant size: the last few turns go in verbatim and
+everything older is folded into a rolling summary refreshed in the background
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+
+from session_store import SessionChatMessageHistory
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """Progressively summarize the conversation between a user and an assistant
+about company documents, extending the current summary with the new lines.
+Keep names, figures, document references and any open questions the user may come back to.
+
+Current summary:
+{summary}
+
+New lines:
+{new_lines}
+
+New summary:"""
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+
+def _format_lines(messages: Sequence[BaseMessage]) -> str:
+    roles = {"human": "User", "ai": "Assistant"}
+    return "\n".join(f"{roles.get(message.type, message.type)}: {message.content}" for message in messages)
+
+
+class WindowedChatHistory(BaseChatMessageHistory):
+    """
+    View of a session history for prompts: the rolling summary as a system
+    message, any older turns not summarized yet, then the recent turns.
+    Writes go straight to the underlying history.
+    """
+
+    def __init__(self, policy: "HistoryPolicy", session_id: str, history: SessionChatMessageHistory):
+        self.policy = policy
+        self.session_id = session_id
+        self.history = history
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.policy.window(self.session_id, self.history)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.history.add_messages(messages)
+        self.policy.schedule_refresh(self.session_id, self.history)
+
+    def clear(self) -> None:
+        self.history.clear()
+
+
+class HistoryPolicy:
+    """
+    Sliding window plus rolling summary. Turns older than the last recent_turns
+    are summarized incrementally by a background worker (only the turns not yet
+    covered are sent, together with the current summary), so a turn never waits
+    on summarization; until a refresh lands, older turns stay in verbatim.
+    """
+
+    def __init__(self, llm: Runnable, recent_turns: Optional[int] = None):
+        self.recent_turns = recent_turns or int(os.getenv("HISTORY_RECENT_TURNS", "3"))
+        self.summary_chain = ChatPromptTemplate.from_template(SUMMARY_PROMPT) | llm | StrOutputParser()
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "windows": 0,
+            "window_tokens": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "messages_summarized": 0
+        }
+
+    def wrap(self, session_id: str, history: SessionChatMessageHistory) -> WindowedChatHistory:
+        return WindowedChatHistory(self, session_id, history)
+
+    def _split(self, history: SessionChatMessageHistory) -> Tuple[str, int, List[Tuple[int, BaseMessage]],
+                                                                 List[Tuple[int, BaseMessage]]]:
+        """(summary, covered sequence number, older unsummarized records, recent records)"""
+        summary, covered = history.get_summary()
+        records = [(seq, message) for seq, message in history.message_records() if seq > covered]
+        cutoff = max(len(records) - 2 * self.recent_turns, 0)
+        return summary, covered, records[:cutoff], records[cutoff:]
+
+    def window(self, session_id: str, history: SessionChatMessageHistory) -> List[BaseMessage]:
+        summary, _, older, recent = self._split(history)
+        messages = [SystemMessage(content=f"{SUMMARY_PREFIX}\n{summary}")] if summary else []
+        messages += [message for _, message in older + recent]
+
+        with self._lock:
+            self.metrics["windows"] += 1
+            self.metrics["window_tokens"] += sum(count_tokens(str(message.content)) for message in messages)
+
+        if older:
+            self.schedule_refresh(session_id, history)
+        return messages
+
+    def schedule_refresh(self, session_id: str, history: SessionChatMessageHistory) -> None:
+        with self._lock:
+            if session_id in self._refreshing:
+                return
+            self._refreshing.add(session_id)
+        try:
+            self._executor.submit(self._refresh, session_id, history)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._refreshing.discard(session_id)
+
+    def _refresh(self, session_id: str, history: SessionChatMessageHistory) -> None:
+        try:
+            summary, covered, older, _ = self._split(history)
+            if not older:
+                return
+
+            new_summary = self.summary_chain.invoke({
+                "summary": summary or "(none)",
+                "new_lines": _format_lines([message for _, message in older])
+            })
+
+            # Another worker sharing the store may have summarized further meanwhile
+            if history.get_summary()[1] != covered:
+                return
+            history.set_summary(new_summary.strip(), older[-1][0])
+
+            with self._lock:
+                self.metrics["refreshes"] += 1
+                self.metrics["messages_summarized"] += len(older)
+            logger.info(f"📝 Summarized {len(older)} older messages of session {session_id}")
+        except Exception as e:
+            with self._lock:
+                self.metrics["refresh_failures"] += 1
+            logger.error(f"❌ History summary failed for session {session_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(session_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            windows = self.metrics["windows"]
+            return {
+                **self.metrics,
+                "recent_turns": self.recent_turns,
+                "refreshing": len(self._refreshing),
+                "avg_window_tokens": self.metrics["window_tokens"] / windows if windows else 0.0
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
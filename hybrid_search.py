@@ -0,0 +1,364 @@
+"""
+Hybrid Retrieval
+BM25 inverted index over chunks, fused with dense results by reciprocal rank fusion
+"""
+
+import os
+import re
+import json
+import asyncio
+import logging
+from collections import Counter
+from typing import List, Optional, Dict, Any, Tuple, Callable, Sequence
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import run_in_executor
+
+from document_processor import make_chunk_id
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_RETRIEVAL_MODES = ("dense", "hybrid")
+
+# Keeps identifiers such as "POL-2024-017" or "v2.1" whole; their parts are indexed too
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./:#][a-z0-9]+)*")
+_TOKEN_SEPARATORS = re.compile(r"[-_./:#]")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have if in into is it its of on or "
+    "that the their there these this to was were what when where which who will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word and identifier tokens, with compound identifiers also split into parts"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token not in _STOPWORDS:
+            tokens.append(token)
+        if _TOKEN_SEPARATORS.search(token):
+            tokens.extend(part for part in _TOKEN_SEPARATORS.split(token) if part not in _STOPWORDS)
+    return tokens
+
+
+def _to_csr(term_ids: np.ndarray, rows: np.ndarray, term_freqs: np.ndarray,
+            n_terms: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Group (term, row, tf) triples into CSR posting lists sorted by row"""
+    order = np.lexsort((rows, term_ids))
+    counts = np.bincount(term_ids, minlength=n_terms)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return offsets, rows[order].astype(np.int32), term_freqs[order].astype(np.uint16)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunks with CSR posting lists (int32 rows, uint16 term
+    frequencies). Rows are chunk positions; instances are treated as immutable
+    and add/keep/remove return new ones, so readers never see a partial update.
+    """
+
+    def __init__(self,
+                 vocabulary: Dict[str, int],
+                 offsets: np.ndarray,
+                 doc_ids: np.ndarray,
+                 term_freqs: np.ndarray,
+                 doc_lengths: np.ndarray,
+                 chunk_ids: List[str],
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.chunk_ids = chunk_ids
+        self.k1 = k1
+        self.b = b
+        self._row_lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def empty(cls) -> "BM25Index":
+        return cls({}, np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32),
+                   np.empty(0, dtype=np.uint16), np.empty(0, dtype=np.int32), [])
+
+    @classmethod
+    def build(cls, documents: Sequence[Document]) -> "BM25Index":
+        """Index chunks that carry metadata["chunk_id"]"""
+        return cls.empty().add(documents)
+
+    def _triples(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        term_ids = np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets))
+        return term_ids, np.asarray(self.doc_ids), np.asarray(self.term_freqs)
+
+    def add(self, documents: Sequence[Document]) -> "BM25Index":
+        """Return a new index with documents appended, replacing chunks whose IDs already exist"""
+        new_ids = [doc.metadata["chunk_id"] for doc in documents]
+        base = self.remove(new_ids) if self._lookup().keys() & set(new_ids) else self
+        if not documents:
+            return base
+
+        vocabulary = dict(base.vocabulary)
+        term_ids, rows, term_freqs, lengths = [], [], [], []
+        for row, doc in enumerate(documents, start=len(base)):
+            counts = Counter(tokenize(doc.page_content))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                rows.append(row)
+                term_freqs.append(min(count, 65535))
+
+        old_terms, old_rows, old_freqs = base._triples()
+        offsets, doc_ids, freqs = _to_csr(
+            np.concatenate([old_terms, np.asarray(term_ids, dtype=np.int32)]),
+            np.concatenate([old_rows, np.asarray(rows, dtype=np.int32)]),
+            np.concatenate([old_freqs, np.asarray(term_freqs, dtype=np.uint16)]),
+            len(vocabulary)
+        )
+        doc_lengths = np.concatenate([base.doc_lengths, np.asarray(lengths, dtype=np.int32)])
+        return BM25Index(vocabulary, offsets, doc_ids, freqs, doc_lengths,
+                         list(base.chunk_ids) + new_ids, self.k1, self.b)
+
+    def keep(self, rows: np.ndarray) -> "BM25Index":
+        """Return a new index containing only the given rows, renumbered in order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        new_row = np.full(len(self), -1, dtype=np.int64)
+        new_row[rows] = np.arange(len(rows))
+
+        term_ids, old_rows, term_freqs = self._triples()
+        mapped = new_row[old_rows] if len(old_rows) else old_rows.astype(np.int64)
+        kept = mapped >= 0
+        term_ids, mapped, term_freqs = term_ids[kept], mapped[kept], term_freqs[kept]
+
+        # Drop terms that no longer occur so the vocabulary does not grow with churn
+        used = np.unique(term_ids)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        vocabulary = {terms[old]: new for new, old in enumerate(used.tolist())}
+        term_ids = np.searchsorted(used, term_ids).astype(np.int32)
+
+        offsets, doc_ids, freqs = _to_csr(term_ids, mapped, term_freqs, len(vocabulary))
+        chunk_ids = [self.chunk_ids[i] for i in rows.tolist()]
+        return BM25Index(vocabulary, offsets, doc_ids, freqs, np.asarray(self.doc_lengths)[rows],
+                         chunk_ids, self.k1, self.b)
+
+    def remove(self, ids: Sequence[str]) -> "BM25Index":
+        """Return a new index without the given chunk IDs"""
+        drop = set(ids)
+        return self.keep(np.asarray([i for i, chunk_id in enumerate(self.chunk_ids) if chunk_id not in drop]))
+
+    def _lookup(self) -> Dict[str, int]:
+        if self._row_lookup is None:
+            self._row_lookup = {chunk_id: row for row, chunk_id in enumerate(self.chunk_ids)}
+        return self._row_lookup
+
+    def _posting_range(self, term: str) -> Tuple[int, int]:
+        term_id = self.vocabulary.get(term)
+        if term_id is None or term_id >= len(self.offsets) - 1:
+            return 0, 0
+        return int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+
+    def document_frequency(self, term: str) -> int:
+        start, end = self._posting_range(term)
+        return end - start
+
+    @property
+    def total_length(self) -> int:
+        return int(np.sum(self.doc_lengths, dtype=np.int64))
+
+    def score(self, idfs: Dict[str, float], avg_length: float) -> np.ndarray:
+        """BM25 score of every row for query terms with the given IDFs and average length"""
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term, idf in idfs.items():
+            start, end = self._posting_range(term)
+            if start == end:
+                continue
+            rows = self.doc_ids[start:end]
+            term_freqs = self.term_freqs[start:end].astype(np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[rows] / avg_length)
+            # Rows are unique within one posting list, so fancy-index accumulation is safe
+            scores[rows] += idf * term_freqs * (self.k1 + 1.0) / (term_freqs + norm)
+        return scores
+
+    def search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, BM25 score) pairs for a query"""
+        return search_indexes([self], query, k)
+
+    def save(self, path: str) -> None:
+        """Write index arrays, vocabulary and chunk IDs into a directory"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "bm25_offsets.npy"), self.offsets)
+        np.save(os.path.join(path, "bm25_doc_ids.npy"), self.doc_ids)
+        np.save(os.path.join(path, "bm25_term_freqs.npy"), self.term_freqs)
+        np.save(os.path.join(path, "bm25_doc_lengths.npy"), self.doc_lengths)
+        with open(os.path.join(path, "bm25_vocabulary.json"), "w", encoding="utf-8") as f:
+            json.dump(sorted(self.vocabulary, key=self.vocabulary.get), f)
+        with open(os.path.join(path, "bm25_ids.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.chunk_ids))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Memory-map an index written by save(), or return None if absent"""
+        if not os.path.exists(os.path.join(path, "bm25_offsets.npy")):
+            return None
+
+        def open_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        with open(os.path.join(path, "bm25_vocabulary.json"), "r", encoding="utf-8") as f:
+            vocabulary = {term: term_id for term_id, term in enumerate(json.load(f))}
+        with open(os.path.join(path, "bm25_ids.txt"), "r", encoding="utf-8") as f:
+            chunk_ids = f.read().splitlines()
+        return cls(
+            vocabulary,
+            np.asarray(open_array("bm25_offsets.npy")),
+            open_array("bm25_doc_ids.npy"),
+            open_array("bm25_term_freqs.npy"),
+            np.asarray(open_array("bm25_doc_lengths.npy")),
+            chunk_ids
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "type": "bm25",
+            "documents": len(self),
+            "terms": len(self.vocabulary),
+            "postings": int(len(self.doc_ids)),
+            "posting_bytes": int(self.doc_ids.nbytes + self.term_freqs.nbytes + self.offsets.nbytes)
+        }
+
+
+def search_indexes(indexes: Sequence[BM25Index],
+                   query: str,
+                   k: int = 20,
+                   excluded: Sequence[Optional[np.ndarray]] = ()) -> List[Tuple[str, float]]:
+    """
+    Top-k (chunk_id, BM25 score) pairs over several indexes scored as one corpus:
+    document frequencies and the average length are pooled. excluded holds an
+    optional boolean mask per index of rows to leave out of the results (deleted
+    rows still count in the statistics until they are compacted away).
+    """
+    n_docs = sum(len(index) for index in indexes)
+    if not n_docs:
+        return []
+    avg_length = (sum(index.total_length for index in indexes) / n_docs) or 1.0
+
+    idfs = {}
+    for term in set(tokenize(query)):
+        frequency = sum(index.document_frequency(term) for index in indexes)
+        if frequency:
+            idfs[term] = float(np.log(1.0 + (n_docs - frequency + 0.5) / (frequency + 0.5)))
+    if not idfs:
+        return []
+
+    results: List[Tuple[str, float]] = []
+    for position, index in enumerate(indexes):
+        scores = index.score(idfs, avg_length)
+        mask = excluded[position] if position < len(excluded) else None
+        if mask is not None:
+            scores[mask] = 0.0
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            continue
+        top_k = min(k, len(matched))
+        top = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        results.extend((index.chunk_ids[row], float(scores[row])) for row in top.tolist())
+
+    results.sort(key=lambda item: item[1], reverse=True)
+    return results[:k]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]],
+                           weights: Optional[List[float]] = None,
+                           rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: score(id) = sum of weight / (rrf_k + rank)"""
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_settings() -> Dict[str, Any]:
+    """HybridRetriever tuning from the environment"""
+    return {
+        "fetch_k": int(os.getenv("HYBRID_FETCH_K", "20")),
+        "dense_weight": float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0")),
+        "lexical_weight": float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0")),
+        "rrf_k": int(os.getenv("HYBRID_RRF_K", "60"))
+    }
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever that fuses dense similarity search with BM25 keyword search
+    """
+
+    vectorstore: Any
+    lexical_search: Callable[[str, int], List[Tuple[str, float]]]
+    fetch_documents: Callable[[List[str]], List[Document]]
+    k: int = 4
+    fetch_k: int = 20
+    dense_weight: float = 1.0
+    lexical_weight: float = 1.0
+    rrf_k: int = 60
+
+    def _fuse(self,
+              dense_results: List[Document],
+              lexical_results: List[Tuple[str, float]],
+              k: int) -> Tuple[List[str], Dict[str, Document]]:
+        """Fused top-k chunk IDs, plus the documents already in hand keyed by chunk ID"""
+        documents = {doc.metadata.get("chunk_id") or make_chunk_id(doc): doc for doc in dense_results}
+        fused = reciprocal_rank_fusion(
+            [list(documents), [chunk_id for chunk_id, _ in lexical_results]],
+            [self.dense_weight, self.lexical_weight],
+            self.rrf_k
+        )[:k]
+        return [chunk_id for chunk_id, _ in fused], documents
+
+    @staticmethod
+    def _merge(fused: List[str], documents: Dict[str, Document], fetched: List[Document]) -> List[Document]:
+        for doc in fetched:
+            documents[doc.metadata.get("chunk_id") or make_chunk_id(doc)] = doc
+        return [documents[chunk_id] for chunk_id in fused if chunk_id in documents]
+
+    def search(self, query: str, k: Optional[int] = None) -> List[Document]:
+        """Fused top-k chunks; lexical-only hits are fetched from the store by chunk ID"""
+        k = k or self.k
+        fetch_k = max(self.fetch_k, k)
+
+        dense_results = self.vectorstore.similarity_search(query, k=fetch_k)
+        lexical_results = self.lexical_search(query, fetch_k)
+        fused, documents = self._fuse(dense_results, lexical_results, k)
+
+        missing = [chunk_id for chunk_id in fused if chunk_id not in documents]
+        return self._merge(fused, documents, self.fetch_documents(missing) if missing else [])
+
+    async def asearch(self, query: str, k: Optional[int] = None) -> List[Document]:
+        """Async search; dense and keyword searches run concurrently off the event loop"""
+        k = k or self.k
+        fetch_k = max(self.fetch_k, k)
+
+        dense_results, lexical_results = await asyncio.gather(
+            self.vectorstore.asimilarity_search(query, k=fetch_k),
+            run_in_executor(None, self.lexical_search, query, fetch_k)
+        )
+        fused, documents = self._fuse(dense_results, lexical_results, k)
+
+        missing = [chunk_id for chunk_id in fused if chunk_id not in documents]
+        fetched = await run_in_executor(None, self.fetch_documents, missing) if missing else []
+        return self._merge(fused, documents, fetched)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search(query)
+
+    async def _aget_relevant_documents(self,
+                                       query: str,
+                                       *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await self.asearch(query)
@@ -0,0 +1,84 @@
+"""
+Shared Index State
+Active index/corpus version published by the writing worker and read by every other worker
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class BaseIndexState(ABC):
+    """
+    Holds the live index version so workers can detect changes made by other workers.
+    State is a dict with a unique "version" token plus backend-specific fields.
+    """
+
+    @abstractmethod
+    def read(self) -> Optional[Dict[str, Any]]:
+        """Current state, or None if nothing has been published"""
+
+    @abstractmethod
+    def publish(self, **fields: Any) -> Dict[str, Any]:
+        """Replace the state with fields under a new version token and return it"""
+
+
+class FileIndexState(BaseIndexState):
+    """
+    Index state in a JSON file replaced atomically; reads are a stat() unless the file changed
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cached_mtime: Optional[int] = None
+        self._cached_state: Optional[Dict[str, Any]] = None
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            if mtime != self._cached_mtime:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._cached_state = json.load(f)
+                    self._cached_mtime = mtime
+                except (FileNotFoundError, json.JSONDecodeError) as e:
+                    logger.error(f"❌ Failed to read index state {self.path}: {str(e)}")
+                    return self._cached_state
+            return self._cached_state
+
+    def publish(self, **fields: Any) -> Dict[str, Any]:
+        state = {
+            **fields,
+            "version": uuid.uuid4().hex,
+            "updated_at": datetime.now().isoformat(),
+            "pid": os.getpid()
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        return state
+
+
+def create_index_state(index_name: str, state_dir: Optional[str] = None) -> BaseIndexState:
+    """File-backed index state under INDEX_STATE_DIR, shared by workers on one host"""
+    state_dir = state_dir or os.getenv("INDEX_STATE_DIR", "index_state")
+    return FileIndexState(os.path.join(state_dir, f"{index_name}.json"))
@@ -0,0 +1,333 @@
+"""
+Ingestion Job Manager
+Background document ingestion with progress tracking
+"""
+
+import os
+import json
+import math
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Callable, Tuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Job stages, in pipeline order
+STAGE_QUEUED = "queued"
+STAGE_PARSING = "parsing"
+STAGE_EMBEDDING = "embedding"
+STAGE_UPSERTING = "upserting"
+STAGE_SUMMARIZING = "summarizing"
+STAGE_COMPLETED = "completed"
+STAGE_FAILED = "failed"
+
+FINISHED_STAGES = (STAGE_COMPLETED, STAGE_FAILED)
+
+
+class JobQueueFull(Exception):
+    """Too many ingestion jobs are queued or running in this worker; retry after retry_after seconds"""
+
+    def __init__(self, pending: int, retry_after: int):
+        super().__init__(f"{pending} ingestion jobs already pending")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FileJobStore:
+    """
+    Job snapshots as JSON files in a directory shared by the workers on one host,
+    so any worker can report on a job queued by another. Files are replaced atomically.
+    Unfinished jobs whose worker process has exited are marked failed so they can
+    be pruned; jobs without a recorded worker count as abandoned after stale_seconds.
+    """
+
+    def __init__(self, directory: str, stale_seconds: Optional[float] = None):
+        self.directory = directory
+        self.stale_seconds = stale_seconds or float(os.getenv("INGEST_JOB_STALE_SECONDS", "3600"))
+        # File name -> (mtime_ns, parsed job), so listing only re-reads files that changed
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._cache_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def write(self, job: Dict[str, Any]) -> None:
+        path = self._path(job["job_id"])
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp_file, path)
+
+    def read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                job = json.load(f)
+                age = time.time() - os.fstat(f.fileno()).st_mtime_ns / 1e9
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return self._mark_abandoned(job) if self._is_abandoned(job, age) else job
+
+    def delete(self, job_id: str) -> None:
+        try:
+            os.unlink(self._path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _is_abandoned(self, job: Dict[str, Any], age: float) -> bool:
+        if job["stage"] in FINISHED_STAGES:
+            return False
+        if job.get("worker_pid") is not None:
+            return not _process_alive(job["worker_pid"])
+        return age > self.stale_seconds
+
+    def _mark_abandoned(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job = {
+            **job,
+            "stage": STAGE_FAILED,
+            "error": "The worker running this job exited before it finished",
+            "eta_seconds": None,
+            "finished_at": datetime.now().isoformat()
+        }
+        self.write(job)
+        logger.warning(f"⚠️ Marked abandoned ingestion job {job['job_id']} as failed")
+        return job
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All stored jobs, oldest first; unfinished jobs abandoned by their worker are marked failed"""
+        now = time.time()
+        jobs = []
+        with self._cache_lock:
+            names = set()
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                names.add(entry.name)
+
+                cached = self._cache.get(entry.name)
+                if cached is not None and cached[0] == mtime:
+                    job = cached[1]
+                else:
+                    job = self.read(entry.name[:-len(".json")])
+                    if job is None:
+                        continue
+                    self._cache[entry.name] = (mtime, job)
+
+                if self._is_abandoned(job, now - mtime / 1e9):
+                    job = self._mark_abandoned(job)
+                jobs.append(job)
+
+            for name in set(self._cache) - names:
+                del self._cache[name]
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def prune(self, max_jobs: int) -> None:
+        """Delete the oldest finished jobs once more than max_jobs are stored"""
+        jobs = self.list()
+        excess = len(jobs) - max_jobs
+        for job in jobs:
+            if excess <= 0:
+                break
+            if job["stage"] in FINISHED_STAGES:
+                self.delete(job["job_id"])
+                excess -= 1
+
+
+def create_job_store(state_dir: Optional[str] = None) -> FileJobStore:
+    """Job store under INDEX_STATE_DIR/jobs, shared by workers on one host"""
+    state_dir = state_dir or os.getenv("INDEX_STATE_DIR", "index_state")
+    return FileJobStore(os.path.join(state_dir, "jobs"))
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs on a background worker and tracks their progress.
+    At most max_pending jobs may be queued or running at once; further jobs are
+    refused with JobQueueFull. With a job_store, every change is also written
+    there so that other worker processes can answer status requests for jobs
+    they did not queue.
+    """
+
+    def __init__(self,
+                 max_workers: int = 1,
+                 max_jobs: int = 100,
+                 max_pending: Optional[int] = None,
+                 job_store: Optional[FileJobStore] = None):
+        # A single worker keeps index writes serialized
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending or int(os.getenv("INGEST_MAX_PENDING_JOBS", "4"))
+        self.job_store = job_store
+        self.avg_job_seconds = 0.0  # Moving average, 0 until the first job finishes
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+
+    def create_job(self, files: List[str]) -> str:
+        """Register a new queued job and return its ID; raises JobQueueFull when max_pending jobs are unfinished"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "stage": STAGE_QUEUED,
+            "files": files,
+            "chunks_total": 0,
+            "chunks_embedded": 0,
+            "chunks_upserted": 0,
+            "throughput": 0.0,
+            "eta_seconds": None,
+            "file_timings": [],
+            "result": None,
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+            "worker_pid": os.getpid(),
+            "started_at": None,
+            "finished_at": None,
+            "_indexing_started": None
+        }
+        with self._lock:
+            pending = sum(1 for other in self.jobs.values() if other["stage"] not in FINISHED_STAGES)
+            if pending >= self.max_pending:
+                hold = self.avg_job_seconds or 60.0
+                raise JobQueueFull(pending, max(1, math.ceil(hold * pending / self.max_workers)))
+            self.jobs[job_id] = job
+            self._evict_finished_jobs()
+        self._save(job_id)
+        if self.job_store is not None:
+            self.job_store.prune(self.max_jobs)
+        return job_id
+
+    def _evict_finished_jobs(self) -> None:
+        """Drop the oldest finished jobs once more than max_jobs are tracked"""
+        for job_id in list(self.jobs.keys()):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id]["stage"] in FINISHED_STAGES:
+                del self.jobs[job_id]
+
+    def _save(self, job_id: str) -> None:
+        """Write a job's current snapshot to the shared job store"""
+        if self.job_store is None:
+            return
+        # Snapshot and write under one lock so an older snapshot never replaces a newer one
+        with self._store_lock:
+            job = self._snapshot(job_id)
+            if job is None:
+                return
+            try:
+                self.job_store.write(job)
+            except Exception as e:
+                logger.error(f"❌ Failed to save job {job_id}: {str(e)}")
+
+    def submit(self, job_id: str, func: Callable[..., Optional[Dict[str, Any]]], *args: Any) -> None:
+        """Run func(*args) for a job on the background worker"""
+        self._executor.submit(self._run, job_id, func, *args)
+
+    def _run(self, job_id: str, func: Callable[..., Optional[Dict[str, Any]]], *args: Any) -> None:
+        self.update(job_id, started_at=datetime.now().isoformat())
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+            self.update(
+                job_id,
+                stage=STAGE_COMPLETED,
+                result=result,
+                eta_seconds=0.0,
+                finished_at=datetime.now().isoformat()
+            )
+            logger.info(f"✅ Ingestion job {job_id} completed")
+        except Exception as e:
+            logger.error(f"❌ Ingestion job {job_id} failed: {str(e)}")
+            self.update(
+                job_id,
+                stage=STAGE_FAILED,
+                error=str(e),
+                eta_seconds=None,
+                finished_at=datetime.now().isoformat()
+            )
+        finally:
+            duration = time.perf_counter() - started
+            with self._lock:
+                self.avg_job_seconds = (
+                    duration if not self.avg_job_seconds else 0.8 * self.avg_job_seconds + 0.2 * duration
+                )
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update fields on a job"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+        self._save(job_id)
+
+    def report_progress(self, job_id: str, embedded: int, upserted: int, total: int) -> None:
+        """Record embedding/upsert progress and derive throughput and ETA"""
+        now = time.perf_counter()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+
+            if job["_indexing_started"] is None:
+                job["_indexing_started"] = now
+            elapsed = now - job["_indexing_started"]
+
+            job["stage"] = STAGE_EMBEDDING if embedded > upserted else STAGE_UPSERTING
+            job["chunks_total"] = total
+            job["chunks_embedded"] = embedded
+            job["chunks_upserted"] = upserted
+
+            if elapsed > 0 and upserted > 0:
+                throughput = upserted / elapsed
+                job["throughput"] = round(throughput, 2)
+                job["eta_seconds"] = round((total - upserted) / throughput, 2)
+        self._save(job_id)
+
+    def progress_callback(self, job_id: str) -> Callable[[int, int, int], None]:
+        """Build a vector store progress callback bound to a job"""
+        return lambda embedded, upserted, total: self.report_progress(job_id, embedded, upserted, total)
+
+    def _snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if not key.startswith("_")}
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job's public fields, from the shared store if another worker runs it"""
+        job = self._snapshot(job_id)
+        if job is None and self.job_store is not None:
+            job = self.job_store.read(job_id)
+        return job
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Get snapshots of all tracked jobs, oldest first"""
+        if self.job_store is not None:
+            return self.job_store.list()
+        with self._lock:
+            job_ids = list(self.jobs.keys())
+        return [job for job in (self._snapshot(job_id) for job_id in job_ids) if job]
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
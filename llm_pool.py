@@ -0,0 +1,119 @@
+"""
+LLM Client Pool
+Pre-configured ChatOpenAI clients selected per request, sharing one HTTP connection pool
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Iterable
+
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPERATURE = 0.1
+DEFAULT_MAX_TOKENS = 1000
+
+
+class LLMPool:
+    """
+    Bounded LRU pool of ChatOpenAI clients keyed by (temperature, max_tokens).
+    Clients are never mutated after creation, so concurrent requests with
+    different settings cannot race, and all of them share the same httpx
+    connection pools instead of opening new connections per client.
+    """
+
+    def __init__(self,
+                 model_name: str = "gpt-4o-mini",
+                 api_key: Optional[str] = None,
+                 presets: Iterable[Tuple[float, int]] = ((DEFAULT_TEMPERATURE, DEFAULT_MAX_TOKENS),),
+                 max_clients: Optional[int] = None,
+                 max_connections: Optional[int] = None,
+                 timeout: float = 60.0):
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.max_clients = max_clients or int(os.getenv("LLM_POOL_MAX_CLIENTS", "16"))
+        max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+        # One connection pool per I/O style, shared by every client in the pool
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._http_client = httpx.Client(limits=limits, timeout=timeout)
+        self._http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+        self._clients: "OrderedDict[Tuple[float, int], ChatOpenAI]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        for temperature, max_tokens in presets:
+            self.get(temperature, max_tokens)
+
+    @staticmethod
+    def _key(temperature: float, max_tokens: int) -> Tuple[float, int]:
+        # Round so near-identical slider values share a client
+        return round(float(temperature), 2), int(max_tokens)
+
+    def get(self, temperature: float = DEFAULT_TEMPERATURE, max_tokens: int = DEFAULT_MAX_TOKENS) -> ChatOpenAI:
+        """Return the client for these generation settings, creating it on first use"""
+        key = self._key(temperature, max_tokens)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+            self.misses += 1
+
+        client = ChatOpenAI(
+            api_key=self.api_key,
+            model_name=self.model_name,
+            temperature=key[0],
+            max_tokens=key[1],
+            http_client=self._http_client,
+            http_async_client=self._http_async_client
+        )
+        with self._lock:
+            client = self._clients.setdefault(key, client)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        return client
+
+    def _select(self, config: Optional[RunnableConfig]) -> ChatOpenAI:
+        configurable = (config or {}).get("configurable", {})
+        return self.get(
+            configurable.get("llm_temperature", DEFAULT_TEMPERATURE),
+            configurable.get("llm_max_tokens", DEFAULT_MAX_TOKENS)
+        )
+
+    def as_runnable(self) -> Runnable:
+        """
+        Runnable that routes each call to the pooled client named by the run config
+        keys "llm_temperature" and "llm_max_tokens"; streaming passes through.
+        """
+        def route(_input: Any, config: RunnableConfig) -> ChatOpenAI:
+            return self._select(config)
+
+        async def aroute(_input: Any, config: RunnableConfig) -> ChatOpenAI:
+            return self._select(config)
+
+        return RunnableLambda(route, afunc=aroute, name="LLMPool")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    async def aclose(self) -> None:
+        """Close the shared connection pools"""
+        self._http_client.close()
+        await self._http_async_client.aclose()
@@ -0,0 +1,880 @@
+"""
+Local Vector Database Manager
+In-process NumPy vector index with the same interface as PineconeVectorDB
+"""
+
+import os
+import time
+import shutil
+import logging
+import threading
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Callable, Sequence
+from datetime import datetime
+
+# Core imports
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from document_processor import assign_chunk_ids, make_chunk_id, stale_chunk_ids
+
+# NumPy imports
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    raise ImportError("NumPy is required for the local vector backend. Install with: pip install numpy")
+
+from ann_index import IVFIndex
+from quantization import create_quantizer, load_quantizer, quantizer_stats
+from hybrid_search import BM25Index, HybridRetriever, hybrid_settings, search_indexes
+from reranker import RerankingRetriever, get_reranker, with_reranking
+from mmap_store import (
+    chunk_ids, write_store, open_store, current_version,
+    new_segment_path, write_manifest, read_manifest, publish_version
+)
+
+logger = logging.getLogger(__name__)
+
+# Called as progress_callback(chunks_embedded, chunks_upserted, chunks_total)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    """L2-normalize rows so a dot product is cosine similarity"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class _Segment:
+    """
+    Immutable block of rows with its own IVF index, quantized codes and BM25
+    index. Deleted rows are masked until compaction; name is the segment
+    directory once saved.
+    """
+
+    def __init__(self,
+                 vectors: "np.ndarray",
+                 documents: Sequence[Document],
+                 ann: Optional[IVFIndex] = None,
+                 quantizer: Any = None,
+                 lexical: Optional[BM25Index] = None,
+                 deleted: Optional["np.ndarray"] = None,
+                 name: Optional[str] = None):
+        self.vectors = vectors
+        self.documents = documents
+        self.ann = ann
+        self.quantizer = quantizer
+        self.lexical = lexical
+        self.deleted = deleted  # Boolean mask over rows, None while every row is live
+        self.name = name
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def deleted_count(self) -> int:
+        return int(self.deleted.sum()) if self.deleted is not None else 0
+
+    @property
+    def live_count(self) -> int:
+        return len(self) - self.deleted_count
+
+    def live_rows(self) -> "np.ndarray":
+        if self.deleted is None:
+            return np.arange(len(self), dtype=np.int64)
+        return np.flatnonzero(~self.deleted)
+
+    def live_ids(self) -> List[str]:
+        ids = chunk_ids(self.documents)
+        if self.deleted is None:
+            return list(ids)
+        return [ids[row] for row in self.live_rows().tolist()]
+
+    def with_deleted(self, rows: "np.ndarray") -> "_Segment":
+        """Copy sharing every array, with rows additionally marked deleted"""
+        deleted = np.zeros(len(self), dtype=bool) if self.deleted is None else self.deleted.copy()
+        deleted[rows] = True
+        return _Segment(self.vectors, self.documents, self.ann, self.quantizer, self.lexical, deleted, self.name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "rows": len(self),
+            "deleted": self.deleted_count,
+            "ann_index": self.ann.get_stats() if self.ann else None
+        }
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain vector store over float32 matrices with cosine top-k, searched
+    exactly or through an optional IVF approximate index. With int8 or binary
+    quantization, candidates are ranked on compact codes first and only a small
+    shortlist is rescored at full precision. An optional BM25 index over the same
+    rows serves keyword search for hybrid retrieval.
+
+    Rows live in segments: an insert appends a segment and a delete masks rows,
+    so saving writes only the new segments and a small manifest. Segments are
+    merged once there are more than max_segments of them or too many deleted
+    rows. Segments loaded from disk are memory-mapped, so opening a store costs
+    O(1) regardless of size.
+    """
+
+    def __init__(self,
+                 embedding: Embeddings,
+                 dimension: int = 384,
+                 vectors: Optional["np.ndarray"] = None,
+                 documents: Optional[Sequence[Document]] = None,
+                 index_type: str = "flat",
+                 nlist: Optional[int] = None,
+                 nprobe: int = 16,
+                 min_train_size: int = 10000,
+                 quantization: str = "none",
+                 rescore_factor: Optional[int] = None,
+                 hybrid: bool = False,
+                 max_segments: Optional[int] = None,
+                 compact_deleted_ratio: Optional[float] = None,
+                 normalized: bool = False):
+        self.embedding = embedding
+        self.dimension = dimension
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.hybrid = hybrid
+        self.max_segments = max_segments or int(os.getenv("LOCAL_MAX_SEGMENTS", "8"))
+        self.compact_deleted_ratio = compact_deleted_ratio or float(os.getenv("LOCAL_COMPACT_DELETED_RATIO", "0.2"))
+        self._lock = threading.Lock()
+        self._row_lookup: Tuple[Any, Dict[str, Tuple[_Segment, int]]] = (None, {})
+
+        # The segment tuple is swapped as a whole so readers always see a consistent set
+        self._data: Tuple[_Segment, ...] = ()
+        if vectors is not None and len(vectors):
+            self._data = (self._build_segment(vectors if normalized else _normalize(vectors), list(documents)),)
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return sum(segment.live_count for segment in self._data)
+
+    @property
+    def ids(self) -> List[str]:
+        return [chunk_id for segment in self._data for chunk_id in segment.live_ids()]
+
+    @property
+    def segments(self) -> Tuple[_Segment, ...]:
+        return self._data
+
+    def _build_ann(self, vectors: "np.ndarray") -> Optional[IVFIndex]:
+        """Train an IVF index when configured and the segment is large enough to benefit"""
+        if self.index_type != "ivf" or len(vectors) < self.min_train_size:
+            return None
+        return IVFIndex.train(vectors, nlist=self.nlist, nprobe=self.nprobe)
+
+    def _build_segment(self, vectors: "np.ndarray", documents: List[Document]) -> _Segment:
+        return _Segment(
+            vectors, documents,
+            ann=self._build_ann(vectors),
+            quantizer=create_quantizer(self.quantization, vectors),
+            lexical=BM25Index.build(documents) if self.hybrid else None
+        )
+
+    def _merge(self, segments: Sequence[_Segment]) -> _Segment:
+        """Rebuild the live rows of several segments as one segment"""
+        rows = [(segment, segment.live_rows()) for segment in segments]
+        vectors = np.concatenate([np.asarray(segment.vectors[live]) for segment, live in rows])
+        documents = [segment.documents[row] for segment, live in rows for row in live.tolist()]
+        return self._build_segment(vectors, documents)
+
+    def _compact(self, segments: Tuple[_Segment, ...]) -> Tuple[_Segment, ...]:
+        """
+        Merge segments once too many rows are deleted or there are too many
+        segments; the large first segment is only rewritten when the merged tail
+        would outgrow it, so compaction cost stays proportional to recent inserts
+        """
+        segments = tuple(segment for segment in segments if segment.live_count)
+        total = sum(len(segment) for segment in segments)
+        deleted = sum(segment.deleted_count for segment in segments)
+        if total and deleted > self.compact_deleted_ratio * total:
+            return (self._merge(segments),)
+        if len(segments) > self.max_segments:
+            base, tail = segments[0], segments[1:]
+            if sum(segment.live_count for segment in tail) >= base.live_count:
+                return (self._merge(segments),)
+            return (base, self._merge(tail))
+        return segments
+
+    @staticmethod
+    def _delete_ids(segments: Tuple[_Segment, ...], drop: set) -> Tuple[_Segment, ...]:
+        updated = []
+        for segment in segments:
+            rows = [row for row, chunk_id in enumerate(chunk_ids(segment.documents)) if chunk_id in drop]
+            updated.append(segment.with_deleted(np.asarray(rows, dtype=np.int64)) if rows else segment)
+        return tuple(updated)
+
+    def add_vectors(self, vectors: "np.ndarray", documents: List[Document]) -> List[str]:
+        """Append pre-computed vectors as a new segment; chunks whose ID already exists are replaced"""
+        new_ids = [doc.metadata["chunk_id"] for doc in documents]
+        if not new_ids:
+            return []
+        segment = self._build_segment(_normalize(vectors), list(documents))
+        with self._lock:
+            self._data = self._compact(self._delete_ids(self._data, set(new_ids)) + (segment,))
+        return new_ids
+
+    def add_texts(self,
+                  texts: Iterable[str],
+                  metadatas: Optional[List[dict]] = None,
+                  *,
+                  ids: Optional[List[str]] = None,
+                  **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=dict(metadata)) for text, metadata in zip(texts, metadatas)]
+        for i, doc in enumerate(documents):
+            doc.metadata["chunk_id"] = ids[i] if ids else make_chunk_id(doc)
+        vectors = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+        return self.add_vectors(vectors, documents)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete chunks by ID (all chunks when ids is None)"""
+        with self._lock:
+            if ids is None:
+                self._data = ()
+            else:
+                self._data = self._compact(self._delete_ids(self._data, set(ids)))
+        return True
+
+    def _search_segment(self,
+                        segment: _Segment,
+                        query: "np.ndarray",
+                        k: int,
+                        exact: bool,
+                        nprobe: Optional[int]) -> List[Tuple[Document, float]]:
+        vectors, ann, quantizer, deleted = segment.vectors, segment.ann, segment.quantizer, segment.deleted
+        rows = ann.candidates(query, nprobe) if ann is not None and not exact else None
+
+        if quantizer is not None and not exact:
+            # First pass over compact codes, then rescore a shortlist at full precision
+            coarse_scores = quantizer.score(query, rows)
+            if deleted is not None:
+                coarse_scores[deleted[rows] if rows is not None else deleted] = -np.inf
+            shortlist = min(k * (self.rescore_factor or quantizer.default_rescore_factor), len(coarse_scores))
+            if shortlist == 0:
+                return []
+            candidates = np.argpartition(-coarse_scores, shortlist - 1)[:shortlist]
+            rows = np.sort(rows[candidates] if rows is not None else candidates)
+            scores = np.asarray(vectors[rows] @ query)
+        elif rows is not None:
+            scores = np.asarray(vectors[rows] @ query)
+        else:
+            scores = np.asarray(vectors @ query)
+        if deleted is not None:
+            scores[deleted[rows] if rows is not None else deleted] = -np.inf
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        row_ids = rows[top] if rows is not None else top
+        return [
+            (segment.documents[row], float(score))
+            for row, score in zip(row_ids.tolist(), scores[top].tolist()) if np.isfinite(score)
+        ]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        """Cosine top-k; pass exact=True to bypass the IVF index and quantization, nprobe to override it"""
+        segments = self._data
+        if not segments:
+            return []
+
+        query = _normalize(np.asarray([embedding], dtype=np.float32))[0]
+        exact = kwargs.get("exact", False)
+        results = []
+        for segment in segments:
+            results.extend(self._search_segment(segment, query, k, exact, kwargs.get("nprobe")))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:k]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def lexical_search(self, query: str, k: int = 20) -> List[Tuple[str, float]]:
+        """BM25 top-k (chunk_id, score) pairs across segments, or none when hybrid search is off"""
+        segments = [segment for segment in self._data if segment.lexical is not None]
+        return search_indexes(
+            [segment.lexical for segment in segments], query, k,
+            excluded=[segment.deleted for segment in segments]
+        )
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        """Look up chunks by chunk ID, skipping IDs that are not stored"""
+        segments = self._data
+        owner, lookup = self._row_lookup
+        if owner is not segments:
+            lookup = {}
+            for segment in segments:
+                segment_ids = chunk_ids(segment.documents)
+                for row in segment.live_rows().tolist():
+                    lookup[segment_ids[row]] = (segment, row)
+            self._row_lookup = (segments, lookup)
+        return [lookup[chunk_id][0].documents[lookup[chunk_id][1]] for chunk_id in ids if chunk_id in lookup]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Map cosine similarity [-1, 1] to a relevance score in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def evaluate_recall(self, k: int = 10, sample_size: int = 100, nprobe: Optional[int] = None) -> Dict[str, Any]:
+        """Measure ANN/quantized recall@k and latency against exact search, using stored vectors as queries"""
+        segments = [segment for segment in self._data if segment.live_count]
+        anns = [segment.ann for segment in segments if segment.ann is not None]
+        quantizers = [segment.quantizer for segment in segments if segment.quantizer is not None]
+        if (not anns and not quantizers) or not segments:
+            return {"index_type": "flat", "quantization": "none", "recall": 1.0, "k": k}
+
+        # Sample live rows uniformly across segments
+        live_rows = [segment.live_rows() for segment in segments]
+        bounds = np.cumsum([len(rows) for rows in live_rows])
+        rng = np.random.default_rng(0)
+        sample = rng.choice(int(bounds[-1]), min(sample_size, int(bounds[-1])), replace=False)
+        hits = 0
+        ann_times, exact_times = [], []
+        for position in sample.tolist():
+            index = int(np.searchsorted(bounds, position, side="right"))
+            offset = position - (int(bounds[index - 1]) if index else 0)
+            query = np.asarray(segments[index].vectors[live_rows[index][offset]]).tolist()
+
+            start_time = time.perf_counter()
+            approximate = self.similarity_search_with_score_by_vector(query, k, nprobe=nprobe)
+            ann_times.append(time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            exact = self.similarity_search_with_score_by_vector(query, k, exact=True)
+            exact_times.append(time.perf_counter() - start_time)
+
+            exact_ids = {doc.metadata["chunk_id"] for doc, _ in exact}
+            hits += sum(1 for doc, _ in approximate if doc.metadata["chunk_id"] in exact_ids)
+
+        return {
+            "index_type": "ivf" if anns else "flat",
+            "quantization": quantizers[0].mode if quantizers else "none",
+            "k": k,
+            "queries": len(sample),
+            "nprobe": (nprobe or anns[0].nprobe) if anns else None,
+            "recall": hits / (k * len(sample)),
+            "ann_p50_ms": float(np.percentile(ann_times, 50) * 1000),
+            "exact_p50_ms": float(np.percentile(exact_times, 50) * 1000)
+        }
+
+    @classmethod
+    def from_texts(cls,
+                   texts: List[str],
+                   embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None,
+                   **kwargs: Any) -> "LocalVectorStore":
+        ids = kwargs.pop("ids", None)
+        store = cls(embedding=embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def _open_segment(self, path: str, name: str, deleted_rows: Sequence[int]) -> _Segment:
+        """Memory-map a saved segment with its indexes"""
+        segment_path = os.path.join(path, name)
+        vectors, documents, manifest = open_store(segment_path)
+        ann = IVFIndex.load(segment_path, nprobe=self.nprobe) if self.index_type == "ivf" else None
+        quantizer = load_quantizer(self.quantization, segment_path, manifest["dimension"])
+        lexical = None
+        if self.hybrid:
+            lexical = BM25Index.load(segment_path) or BM25Index.build(documents)
+        deleted = None
+        if len(deleted_rows):
+            deleted = np.zeros(len(documents), dtype=bool)
+            deleted[np.asarray(deleted_rows, dtype=np.int64)] = True
+        return _Segment(vectors, documents, ann, quantizer, lexical, deleted, name)
+
+    def save(self, path: str) -> None:
+        """
+        Write the segments not saved yet and a manifest of all segments with
+        their deleted rows, then atomically publish it. Newly written segments
+        are swapped for their memory-mapped copies so pages are shared.
+        """
+        with self._lock:
+            saved, written = [], []
+            try:
+                for segment in self._data:
+                    if segment.name is None:
+                        segment_path = new_segment_path(path)
+                        written.append(segment_path)
+                        write_store(segment_path, segment.vectors, segment.documents)
+                        if segment.ann is not None:
+                            segment.ann.save(segment_path)
+                        if segment.quantizer is not None:
+                            segment.quantizer.save(segment_path)
+                        if segment.lexical is not None:
+                            segment.lexical.save(segment_path)
+                        deleted_rows = np.flatnonzero(segment.deleted) if segment.deleted is not None else []
+                        segment = self._open_segment(path, os.path.basename(segment_path), deleted_rows)
+                    saved.append(segment)
+                version = write_manifest(path, self.dimension, [
+                    {
+                        "name": segment.name,
+                        "deleted": np.flatnonzero(segment.deleted).tolist() if segment.deleted is not None else []
+                    }
+                    for segment in saved
+                ])
+            except Exception:
+                for segment_path in written:
+                    shutil.rmtree(segment_path, ignore_errors=True)
+                raise
+            publish_version(path, version)
+            self._data = tuple(saved)
+
+    @classmethod
+    def load(cls,
+             path: str,
+             embedding: Embeddings,
+             previous: Optional["LocalVectorStore"] = None,
+             **kwargs: Any) -> "LocalVectorStore":
+        """Memory-map the published store under path, reusing segments already open in previous"""
+        version = current_version(path)
+        if version is None:
+            raise FileNotFoundError(f"No published store version in {path}")
+
+        store = cls(embedding=embedding, **kwargs)
+        reusable = {segment.name: segment for segment in previous.segments if segment.name} if previous else {}
+        segments = []
+        for entry in read_manifest(path, version)["segments"]:
+            known = reusable.get(entry["name"])
+            if known is None:
+                segments.append(store._open_segment(path, entry["name"], entry["deleted"]))
+                continue
+            deleted = None
+            if entry["deleted"]:
+                deleted = np.zeros(len(known), dtype=bool)
+                deleted[np.asarray(entry["deleted"], dtype=np.int64)] = True
+            segments.append(_Segment(
+                known.vectors, known.documents, known.ann, known.quantizer, known.lexical, deleted, known.name
+            ))
+        store._data = tuple(segments)
+        return store
+
+
+class LocalVectorDB:
+    """
+    Local in-process vector database manager, interchangeable with PineconeVectorDB
+    """
+
+    def __init__(self,
+                 index_name: str = "enterprise-rag",
+                 embeddings: Optional[Embeddings] = None,
+                 dimension: int = 384,
+                 persist_dir: Optional[str] = None,
+                 batch_size: int = 100,
+                 index_type: Optional[str] = None,
+                 nlist: Optional[int] = None,
+                 nprobe: Optional[int] = None,
+                 min_train_size: Optional[int] = None,
+                 quantization: Optional[str] = None,
+                 rescore_factor: Optional[int] = None,
+                 retrieval_mode: Optional[str] = None):
+        self.index_name = index_name
+        self.embeddings = embeddings
+        self.dimension = dimension
+        self.persist_dir = persist_dir or os.getenv("LOCAL_INDEX_DIR", "local_index")
+        self.index_path = os.path.join(self.persist_dir, index_name)
+        self.batch_size = batch_size
+        
+        # ANN index parameters ("flat" = exact search, "ivf" = inverted-file ANN)
+        self.index_type = (index_type or os.getenv("LOCAL_INDEX_TYPE", "flat")).lower()
+        self.nlist = nlist or int(os.getenv("IVF_NLIST", "0")) or None
+        self.nprobe = nprobe or int(os.getenv("IVF_NPROBE", "16"))
+        self.min_train_size = min_train_size or int(os.getenv("IVF_MIN_TRAIN_SIZE", "10000"))
+        
+        # Quantized first-pass search ("none", "int8" or "binary") with full-precision rescoring
+        self.quantization = (quantization or os.getenv("LOCAL_QUANTIZATION", "none")).lower()
+        self.rescore_factor = rescore_factor or int(os.getenv("QUANTIZATION_RESCORE_FACTOR", "0")) or None
+        
+        # "hybrid" fuses dense and BM25 keyword results; "dense" is vector search only
+        self.retrieval_mode = (retrieval_mode or os.getenv("RETRIEVAL_MODE", "hybrid")).lower()
+        self.ann_stats: Optional[Dict[str, Any]] = None
+        
+        self.vectorstore = None
+        self.retriever = None
+        self.backend = "local"
+        self.version = 0  # Bumped whenever the live retriever changes
+        self._loaded_version: Optional[str] = None  # Store version (CURRENT pointer) currently attached
+        self._write_lock = threading.Lock()
+
+        # Metrics
+        self.metrics = {
+            "documents_indexed": 0,
+            "queries_processed": 0,
+            "avg_query_time": 0.0,
+            "last_updated": datetime.now()
+        }
+
+        self._load_persisted()
+
+    def _load_persisted(self) -> None:
+        """Memory-map the persisted index from disk, if there is one"""
+        version = current_version(self.index_path)
+        if version is None:
+            return
+        try:
+            store = LocalVectorStore.load(
+                self.index_path, self.embeddings, previous=self.vectorstore, **self._store_params()
+            )
+            if len(store):
+                self._activate(store)
+                self.metrics["documents_indexed"] = len(store)
+                logger.info(f"✅ Loaded local index '{self.index_name}' with {len(store)} vectors")
+            self._loaded_version = version
+        except Exception as e:
+            logger.error(f"❌ Failed to load local index: {str(e)}")
+
+    def _reattach(self) -> bool:
+        """Follow the CURRENT pointer if another worker published a new version (caller holds the write lock)"""
+        version = current_version(self.index_path)
+        if version == self._loaded_version:
+            return False
+
+        if version is None:
+            self.vectorstore, self.retriever = None, None
+            self.version += 1
+            self.metrics["documents_indexed"] = 0
+            self._loaded_version = None
+        else:
+            self._load_persisted()
+        self.metrics["last_updated"] = datetime.now()
+        logger.info(f"🔄 Attached to local index version {version}")
+        return True
+
+    def refresh(self) -> bool:
+        """Reattach to the store version published by another worker, if it changed"""
+        if current_version(self.index_path) == self._loaded_version:
+            return False
+        with self._write_lock:
+            return self._reattach()
+
+    def _store_params(self) -> Dict[str, Any]:
+        return {
+            "dimension": self.dimension,
+            "index_type": self.index_type,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "min_train_size": self.min_train_size,
+            "quantization": self.quantization,
+            "rescore_factor": self.rescore_factor,
+            "hybrid": self.retrieval_mode == "hybrid"
+        }
+    
+    def _embed_documents(self,
+                         documents: List[Document],
+                         progress_callback: Optional[ProgressCallback] = None) -> "np.ndarray":
+        """Embed documents batch by batch, reporting progress"""
+        total = len(documents)
+        batches = []
+        for start in range(0, total, self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            batches.append(np.asarray(
+                self.embeddings.embed_documents([doc.page_content for doc in batch]),
+                dtype=np.float32
+            ))
+            if progress_callback:
+                embedded = min(start + self.batch_size, total)
+                progress_callback(embedded, 0, total)
+
+        if not batches:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.concatenate(batches)
+
+    def _activate(self, store: LocalVectorStore) -> None:
+        """Make a store live, swapping vector store and retriever together"""
+        def build_retriever(k: int):
+            if store.hybrid:
+                return HybridRetriever(
+                    vectorstore=store,
+                    lexical_search=store.lexical_search,
+                    fetch_documents=store.get_by_ids,
+                    k=k,
+                    **hybrid_settings()
+                )
+            return store.as_retriever(search_kwargs={"k": k})
+
+        # Return top 4 most relevant chunks (over-fetched and reranked if RERANKER is set)
+        retriever = with_reranking(build_retriever, k=4)
+        self.vectorstore, self.retriever = store, retriever
+        self.version += 1
+
+    def _persist(self) -> None:
+        """Save the segments written since the last save and publish the new manifest"""
+        if self.vectorstore is not None:
+            self.vectorstore.save(self.index_path)
+            self._activate(self.vectorstore)
+            self._loaded_version = current_version(self.index_path)
+
+    def create_vectorstore(self,
+                           documents: List[Document],
+                           progress_callback: Optional[ProgressCallback] = None) -> bool:
+        """Create local vector store"""
+        return self.replace_documents(documents, progress_callback)
+
+    def add_documents(self,
+                      documents: List[Document],
+                      progress_callback: Optional[ProgressCallback] = None) -> bool:
+        """Add documents to existing vector store"""
+        try:
+            if not self.vectorstore:
+                raise ValueError("Vector store not initialized. Call create_vectorstore first.")
+
+            if not documents:
+                logger.warning("No documents provided to add")
+                return True
+
+            documents = assign_chunk_ids(documents)
+            logger.info(f"🔄 Adding {len(documents)} documents to local vector store...")
+
+            with self._write_lock:
+                self._reattach()
+                if not self.vectorstore:
+                    raise ValueError("Vector store not initialized. Call create_vectorstore first.")
+                vectors = self._embed_documents(documents, progress_callback)
+                self.vectorstore.add_vectors(vectors, documents)
+                if progress_callback:
+                    progress_callback(len(documents), len(documents), len(documents))
+                self._persist()
+
+            # Update metrics
+            self.metrics["documents_indexed"] = len(self.vectorstore)
+            self.metrics["last_updated"] = datetime.now()
+
+            logger.info(f"✅ Added {len(documents)} documents successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Failed to add documents: {str(e)}")
+            raise RuntimeError(f"Adding documents failed: {str(e)}")
+
+    def clear_index(self) -> bool:
+        """Clear all vectors from the local index"""
+        try:
+            logger.info(f"🧹 Clearing all vectors from local index: {self.index_name}")
+
+            with self._write_lock:
+                shutil.rmtree(self.index_path, ignore_errors=True)
+
+                # Reset vector store and retriever
+                self.vectorstore = None
+                self.retriever = None
+                self.version += 1
+                self._loaded_version = None
+
+            # Reset metrics
+            self.metrics["documents_indexed"] = 0
+            self.metrics["last_updated"] = datetime.now()
+
+            logger.info("✅ Index cleared successfully")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Failed to clear index: {str(e)}")
+            return False
+
+    def replace_documents(self,
+                          documents: List[Document],
+                          progress_callback: Optional[ProgressCallback] = None) -> bool:
+        """Replace all documents by building a new store and swapping it in"""
+        try:
+            if not documents:
+                raise ValueError("No documents provided")
+
+            if not self.embeddings:
+                raise ValueError("Embeddings not configured")
+
+            documents = assign_chunk_ids(documents)
+            logger.info(f"🔄 Building local vector store with {len(documents)} documents...")
+
+            with self._write_lock:
+                vectors = self._embed_documents(documents, progress_callback)
+                store = LocalVectorStore(self.embeddings, vectors=vectors, documents=documents, **self._store_params())
+                self._activate(store)
+                if progress_callback:
+                    progress_callback(len(documents), len(documents), len(documents))
+                self._persist()
+
+            # Update metrics
+            self.metrics["documents_indexed"] = len(documents)
+            self.metrics["last_updated"] = datetime.now()
+
+            logger.info(f"✅ Successfully replaced all documents with {len(documents)} new documents")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Document replacement failed: {str(e)}")
+            raise RuntimeError(f"Document replacement failed: {str(e)}")
+
+    def sync_documents(self,
+                       documents: List[Document],
+                       progress_callback: Optional[ProgressCallback] = None) -> Dict[str, int]:
+        """
+        Incrementally sync the uploaded files: add their new chunks and delete
+        their stale ones, leaving chunks of other files untouched
+        """
+        try:
+            if not documents:
+                raise ValueError("No documents provided")
+
+            if not self.embeddings:
+                raise ValueError("Embeddings not configured")
+
+            documents = assign_chunk_ids(documents)
+
+            with self._write_lock:
+                self._reattach()
+                existing_ids = set(self.vectorstore.ids) if self.vectorstore else set()
+                new_documents = [doc for doc in documents if doc.metadata["chunk_id"] not in existing_ids]
+                stale_ids = stale_chunk_ids(existing_ids, documents)
+
+                logger.info(
+                    f"🔄 Syncing local index: {len(new_documents)} new, "
+                    f"{len(documents) - len(new_documents)} unchanged, {len(stale_ids)} stale"
+                )
+
+                vectors = self._embed_documents(new_documents, progress_callback)
+                if self.vectorstore is None:
+                    self._activate(LocalVectorStore(
+                        self.embeddings, vectors=vectors, documents=new_documents, **self._store_params()
+                    ))
+                else:
+                    if len(new_documents):
+                        self.vectorstore.add_vectors(vectors, new_documents)
+                    if stale_ids:
+                        self.vectorstore.delete(list(stale_ids))
+                if progress_callback:
+                    progress_callback(len(new_documents), len(new_documents), len(new_documents))
+                self._persist()
+
+            # Update metrics
+            self.metrics["documents_indexed"] = len(existing_ids) + len(new_documents) - len(stale_ids)
+            self.metrics["last_updated"] = datetime.now()
+
+            diff = {
+                "added": len(new_documents),
+                "unchanged": len(documents) - len(new_documents),
+                "deleted": len(stale_ids),
+                "total": len(documents)
+            }
+            logger.info(f"✅ Index sync complete: {diff}")
+            return diff
+
+        except Exception as e:
+            logger.error(f"❌ Document sync failed: {str(e)}")
+            raise RuntimeError(f"Document sync failed: {str(e)}")
+
+    def get_retriever(self):
+        """Get retriever for the vector store"""
+        self.refresh()
+        if not self.retriever:
+            raise ValueError("Vector store not initialized. Call create_vectorstore first.")
+        return self.retriever
+
+    def search(self, query: str, k: int = 4) -> List[Document]:
+        """Search for similar documents"""
+        try:
+            self.refresh()
+            if not self.vectorstore:
+                raise ValueError("Vector store not initialized")
+
+            start_time = time.perf_counter()
+            if isinstance(self.retriever, (HybridRetriever, RerankingRetriever)):
+                results = self.retriever.search(query, k=k)
+            else:
+                results = self.vectorstore.similarity_search(query, k=k)
+            query_time = time.perf_counter() - start_time
+
+            # Update metrics
+            self.metrics["queries_processed"] += 1
+            self.metrics["avg_query_time"] += (
+                (query_time - self.metrics["avg_query_time"]) / self.metrics["queries_processed"]
+            )
+
+            logger.info(f"🔍 Search completed in {query_time:.4f}s, found {len(results)} results")
+            return results
+
+        except Exception as e:
+            logger.error(f"❌ Search failed: {str(e)}")
+            raise RuntimeError(f"Search failed: {str(e)}")
+
+    def evaluate_recall(self, k: int = 10, sample_size: int = 100, nprobe: Optional[int] = None) -> Dict[str, Any]:
+        """Measure ANN recall@k against exact search and keep the result for get_status()"""
+        if not self.vectorstore:
+            raise ValueError("Vector store not initialized")
+        self.ann_stats = self.vectorstore.evaluate_recall(k=k, sample_size=sample_size, nprobe=nprobe)
+        logger.info(f"📏 Approximate search recall@{k}: {self.ann_stats['recall']:.3f}")
+        return self.ann_stats
+    
+    def delete_index(self) -> bool:
+        """Delete the local index from disk"""
+        return self.clear_index()
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Get local index statistics"""
+        vector_count = len(self.vectorstore) if self.vectorstore else 0
+        segments = self.vectorstore.segments if self.vectorstore else ()
+        lexical = [segment.lexical.get_stats() for segment in segments if segment.lexical is not None]
+        return {
+            "total_vector_count": vector_count,
+            "dimension": self.dimension,
+            "memory_bytes": sum(len(segment) for segment in segments) * self.dimension * 4,
+            "path": self.index_path,
+            "index_type": self.index_type,
+            "segments": [segment.get_stats() for segment in segments],
+            "deleted_rows": sum(segment.deleted_count for segment in segments),
+            "quantization": quantizer_stats([segment.quantizer for segment in segments], vector_count, self.dimension),
+            "lexical_index": {
+                "type": "bm25",
+                "documents": sum(stats["documents"] for stats in lexical),
+                "postings": sum(stats["postings"] for stats in lexical),
+                "posting_bytes": sum(stats["posting_bytes"] for stats in lexical)
+            } if lexical else None,
+            "ann_recall": self.ann_stats
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get comprehensive status information"""
+        return {
+            "backend": self.backend,
+            "index_name": self.index_name,
+            "dimension": self.dimension,
+            "version": self.version,
+            "state_version": self._loaded_version,
+            "retrieval_mode": self.retrieval_mode,
+            "reranker": get_reranker().get_stats() if get_reranker() else None,
+            "initialized": self.vectorstore is not None,
+            "metrics": self.metrics,
+            "embedding_cache": self.embeddings.get_stats() if hasattr(self.embeddings, "get_stats") else None,
+            "index_stats": self.get_index_stats()
+        }
+
+    def health_check(self) -> Dict[str, Any]:
+        """Perform health check"""
+        return {
+            "status": "healthy",
+            "persist_dir_writable": os.access(self.persist_dir, os.W_OK) if os.path.exists(self.persist_dir) else True,
+            "vector_store_initialized": self.vectorstore is not None,
+            "timestamp": datetime.now().isoformat()
+        }
@@ -6,26 +6,38 @@ from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
+import time
 import logging
 import asyncio
 import json
 from datetime import datetime
 import tempfile
 import shutil
+import threading
 
 # Import existing components
-from pinecone_vector_db import PineconeVectorDB
+from vector_db_factory import create_vector_db
+from document_processor import DocumentProcessor
+from ingestion_jobs import IngestionJobManager, JobQueueFull, STAGE_PARSING, STAGE_SUMMARIZING, create_job_store
+from embedding_cache import CachedEmbeddings
+from llm_pool import LLMPool
+from session_store import create_session_store
+from query_rewriter import QuestionRewriter, is_self_contained, refers_to_history
+from answer_cache import SemanticAnswerCache
+from document_summaries import DocumentSummarizer, classify_summary_intent, create_summary_store
+from context_packing import ContextPacker
+from history_policy import HistoryPolicy
+from single_flight import SingleFlight, normalize_query
+from admission import AdmissionRejected, AdmissionTicket, LANE_CHAT, LANE_INGESTION, create_admission_controller
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
@@ -68,6 +80,7 @@ class ChatMessage(BaseModel):
     session_id: str = "default"
     temperature: float = 0.1
     max_tokens: int = 1000
+    bypass_cache: bool = False  # Always run the full pipeline: no summary answers, answer cache or coalescing
 
 class ChatResponse(BaseModel):
     response: str
@@ -88,41 +101,77 @@ class SystemStatus(BaseModel):
 embeddings = None
 vector_db = None
 llm = None
-store = {}
+llm_pool = None
+answer_cache = None
+summary_store = None
+summarizer = None
+history_policy = None
+document_processor = None
+job_manager = None
+store = create_session_store()  # SESSION_BACKEND=sqlite shares sessions across workers
+question_rewriter = QuestionRewriter()  # Outlives chain rebuilds, so memoized rewrites survive re-ingestion
+context_packer = ContextPacker()  # Merges overlapping chunks and caps prompt context at CONTEXT_MAX_TOKENS
+
+# Concurrent identical requests share one execution (per worker process)
+chat_flights = SingleFlight("chat")
+stream_flights = SingleFlight("chat_stream")
+search_flights = SingleFlight("search")
+
+# Concurrency limits and bounded wait queues per endpoint, chat ahead of ingestion
+admission = create_admission_controller()
+
+# Conversational and history-free RAG chains, rebuilt only when the retriever or model changes
+rag_chain_cache = {"key": None, "chains": None, "builds": 0}
+rag_chain_lock = threading.Lock()
 
 # Initialize components
 def initialize_components():
-    global embeddings, vector_db, llm
+    global embeddings, vector_db, llm, llm_pool, answer_cache, summary_store, summarizer, history_policy, document_processor, job_manager
     
     # Load API keys
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key:
         raise ValueError("OpenAI API key not found")
     
-    # Initialize embeddings
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    # Initialize embeddings (wrapped in a persistent embedding cache)
+    embedding_model = "all-MiniLM-L6-v2"
+    embeddings = CachedEmbeddings(
+        HuggingFaceEmbeddings(model_name=embedding_model),
+        model_name=embedding_model
+    )
     
-    # Initialize vector database
-    vector_db = PineconeVectorDB(
+    # Initialize vector database (backend selected by VECTOR_BACKEND)
+    vector_db = create_vector_db(
         index_name="enterprise-rag-chatbot",
         embeddings=embeddings
     )
     
-    # Initialize LLM
-    llm = ChatOpenAI(
-        api_key=openai_api_key,
-        model_name="gpt-4o-mini",
-        temperature=0.1,
-        max_tokens=1000
-    )
+    # Initialize LLM clients: one pooled client per (temperature, max_tokens), chosen per request
+    llm_pool = LLMPool(model_name="gpt-4o-mini", api_key=openai_api_key)
+    llm = llm_pool.as_runnable()
+    
+    # Semantic answer cache in front of the chat pipeline (scoped to the index version)
+    answer_cache = SemanticAnswerCache(embeddings)
+    
+    # Precomputed document/corpus summaries, rebuilt by ingestion jobs
+    summary_store = create_summary_store(vector_db.index_name)
+    summarizer = DocumentSummarizer(llm, summary_store)
+    
+    # Recent turns verbatim plus a rolling summary of older ones (HISTORY_RECENT_TURNS)
+    history_policy = HistoryPolicy(llm)
+    
+    # Initialize parallel document processor (pool size from INGEST_WORKERS)
+    document_processor = DocumentProcessor()
+    
+    # Initialize background ingestion worker (at most INGEST_MAX_PENDING_JOBS queued or running)
+    job_manager = IngestionJobManager(job_store=create_job_store())
     
     logger.info("✅ All components initialized successfully")
 
 # Chat session management
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in store:
-        store[session_id] = ChatMessageHistory()
-    return store[session_id]
+    history = store.get(session_id)
+    return history_policy.wrap(session_id, history) if history_policy else history
 
 # Create RAG chain
 def create_rag_chain():
@@ -138,10 +187,9 @@ def create_rag_chain():
         ("human", "{input}"),
     ])
     
-    # Create history-aware retriever
-    history_aware_retriever = create_history_aware_retriever(
-        llm, vector_db.get_retriever(), contextualize_q_prompt
-    )
+    # Create history-aware retriever (rephrases only follow-ups that need it; identical concurrent searches run once)
+    retriever = search_flights.coalesce_retriever(vector_db.get_retriever(), scope=vector_db.version)
+    history_aware_retriever = question_rewriter.as_retriever(llm, retriever, contextualize_q_prompt)
     
     # Answer question prompt
     qa_system_prompt = """You are an enterprise AI assistant with access to company documents. 
@@ -159,8 +207,10 @@ def create_rag_chain():
     # Create question answer chain
     question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
     
-    # Create retrieval chain
-    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+    # Create retrieval chain (retrieved chunks are merged and trimmed to the context token budget)
+    rag_chain = create_retrieval_chain(
+        history_aware_retriever | context_packer.as_runnable(), question_answer_chain
+    )
     
     # Add message history
     conversational_rag_chain = RunnableWithMessageHistory(
@@ -171,7 +221,23 @@ def create_rag_chain():
         output_messages_key="answer",
     )
     
-    return conversational_rag_chain
+    # The bare chain answers session-independent questions with an empty history
+    return conversational_rag_chain, rag_chain
+
+def get_rag_chains():
+    """Return the cached (conversational, history-free) RAG chains, rebuilding them if the live retriever has changed"""
+    key = (vector_db.version, llm_pool.model_name)
+    chains = rag_chain_cache["chains"]
+    if chains is not None and rag_chain_cache["key"] == key:
+        return chains
+    
+    with rag_chain_lock:
+        if rag_chain_cache["chains"] is None or rag_chain_cache["key"] != key:
+            rag_chain_cache["chains"] = create_rag_chain()
+            rag_chain_cache["key"] = key
+            rag_chain_cache["builds"] += 1
+            logger.info(f"🔗 Built RAG chain for index version {key[0]}")
+        return rag_chain_cache["chains"]
 
 # Startup event
 @app.on_event("startup")
@@ -183,6 +249,18 @@ async def startup_event():
         logger.error(f"❌ Failed to initialize: {str(e)}")
         raise e
 
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    if job_manager:
+        job_manager.shutdown()
+    if document_processor:
+        document_processor.shutdown()
+    if history_policy:
+        history_policy.shutdown()
+    if llm_pool:
+        await llm_pool.aclose()
+
 # Serve main HTML page
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -210,19 +288,186 @@ async def get_system_status():
     if not vector_db:
         raise HTTPException(status_code=503, detail="System not initialized")
     
-    status = vector_db.get_status()
+    await asyncio.to_thread(vector_db.refresh)
+    status = await asyncio.to_thread(vector_db.get_status)
     return {
         "backend": status["backend"],
         "documents_indexed": status["metrics"]["documents_indexed"],
         "queries_processed": status["metrics"]["queries_processed"],
         "avg_query_time": status["metrics"]["avg_query_time"],
         "last_updated": status["metrics"]["last_updated"].isoformat(),
+        "embedding_cache": status["embedding_cache"],
+        "rag_chain_builds": rag_chain_cache["builds"],
+        "llm_pool": llm_pool.get_stats() if llm_pool else None,
+        "sessions": await asyncio.to_thread(store.get_stats),
+        "question_rewrites": question_rewriter.get_stats(),
+        "answer_cache": answer_cache.get_stats() if answer_cache else None,
+        "summaries": summary_store.get_stats() if summary_store else None,
+        "context_packing": context_packer.get_stats(),
+        "admission": admission.get_stats(),
+        "coalescing": {flights.name: flights.get_stats() for flights in (chat_flights, stream_flights, search_flights)},
+        "history_policy": history_policy.get_stats() if history_policy else None,
         "status": "online"
     }
 
+def chain_config(chat_message: ChatMessage) -> Dict[str, Any]:
+    """Per-request run config: chat session and LLM parameters"""
+    return {"configurable": {
+        "session_id": chat_message.session_id,
+        "llm_temperature": chat_message.temperature,
+        "llm_max_tokens": chat_message.max_tokens
+    }}
+
+def format_sources(documents) -> List[Dict[str, Any]]:
+    """Source snippets returned alongside an answer"""
+    return [
+        {"content": doc.page_content[:200] + "...", "metadata": doc.metadata}
+        for doc in documents
+    ]
+
+def answer_cache_scope(chat_message: ChatMessage) -> tuple:
+    """Cached answers are only reused for the same model and generation settings"""
+    return (llm_pool.model_name, round(chat_message.temperature, 2), chat_message.max_tokens)
+
+def coalescing_key(chat_message: ChatMessage, corpus_version: int) -> tuple:
+    """Requests with the same key get the same answer, so concurrent ones can share one execution"""
+    return (normalize_query(chat_message.message), corpus_version, answer_cache_scope(chat_message))
+
+def record_turn(chat_message: ChatMessage, answer: str) -> None:
+    """
+    Add a question and an answer produced without this session's history to the session
+    history; each caller of a shared execution records its own turn
+    """
+    get_session_history(chat_message.session_id).add_messages(
+        [HumanMessage(content=chat_message.message), AIMessage(content=answer)]
+    )
+
+def is_session_independent(chat_message: ChatMessage) -> bool:
+    """Whether the question can be answered without this session's history"""
+    history = store.get(chat_message.session_id)
+    return not history.messages or is_self_contained(chat_message.message)
+
+async def lookup_cached_answer(chat_message: ChatMessage, corpus_version: int):
+    """
+    Return (session_independent, entry). Only questions that do not depend on the chat
+    history can be answered for other sessions (cached or coalesced); those are answered
+    without the session history in the prompt, and a hit is still recorded in the history.
+    """
+    if chat_message.bypass_cache:
+        return False, None
+    
+    # Session stores may hit SQLite, so they are kept off the event loop
+    if not await asyncio.to_thread(is_session_independent, chat_message):
+        return False, None
+    
+    if answer_cache is None:
+        return True, None
+    
+    entry = await answer_cache.alookup(chat_message.message, corpus_version, answer_cache_scope(chat_message))
+    if entry is not None:
+        await asyncio.to_thread(record_turn, chat_message, entry["answer"])
+    return True, entry
+
+def lookup_summary_answer(chat_message: ChatMessage) -> Optional[Dict[str, Any]]:
+    """
+    Answer summary-style questions ("summarize", "main points of handbook.pdf") from the
+    precomputed summaries, without retrieval or an LLM call; None if not applicable
+    """
+    if summary_store is None or chat_message.bypass_cache:
+        return None
+    
+    is_summary, source = classify_summary_intent(chat_message.message, summary_store.sources())
+    if not is_summary:
+        return None
+    
+    entry = summary_store.get(source)
+    if entry is None:
+        return None
+    
+    # "Summarize that" after an answer is about the conversation, not the corpus
+    history = store.get(chat_message.session_id)
+    if history.messages and refers_to_history(chat_message.message):
+        return None
+    
+    documents = [source] if source else entry["documents"]
+    sources = [
+        {"content": f"Summary of {name}", "metadata": {"source": name, "summary": "document" if source else "corpus"}}
+        for name in documents
+    ]
+    history.add_messages([HumanMessage(content=chat_message.message), AIMessage(content=entry["summary"])])
+    return {"answer": entry["summary"], "sources": sources}
+
+async def admit_request(lane: str) -> AdmissionTicket:
+    """Slot in an admission lane, or 429/503 with Retry-After when the lane is saturated"""
+    try:
+        return await admission.acquire(lane)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Server busy: {e.reason}. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def rag_chain_input(chat_message: ChatMessage, session_independent: bool) -> tuple:
+    """(chain, input): session-independent questions run without the session history so their answers can be shared"""
+    conversational_chain, history_free_chain = get_rag_chains()
+    if session_independent:
+        return history_free_chain, {"input": chat_message.message, "chat_history": []}
+    return conversational_chain, {"input": chat_message.message}
+
+async def run_rag_chain(chat_message: ChatMessage, corpus_version: int, session_independent: bool) -> Dict[str, Any]:
+    """Answer a question with the RAG chain, storing session-independent answers in the answer cache"""
+    start_time = datetime.now()
+    
+    # Process the message without blocking the event loop (LLM parameters are per-request runtime config)
+    rag_chain, chain_input = rag_chain_input(chat_message, session_independent)
+    response = await rag_chain.ainvoke(chain_input, config=chain_config(chat_message))
+    
+    # Extract sources
+    sources = format_sources(response.get("context", []))
+    
+    if session_independent and answer_cache is not None:
+        await answer_cache.astore(
+            chat_message.message, response["answer"], sources, (datetime.now() - start_time).total_seconds(),
+            corpus_version, answer_cache_scope(chat_message)
+        )
+    return {"answer": response["answer"], "sources": sources}
+
+async def stream_rag_chain(chat_message: ChatMessage, corpus_version: int, session_independent: bool):
+    """Stream RAG chain chunks, storing the complete session-independent answer in the answer cache"""
+    start_time = time.perf_counter()
+    sources, answer_parts = [], []
+    rag_chain, chain_input = rag_chain_input(chat_message, session_independent)
+    async for chunk in rag_chain.astream(chain_input, config=chain_config(chat_message)):
+        if "context" in chunk:
+            sources = format_sources(chunk["context"])
+        if chunk.get("answer"):
+            answer_parts.append(chunk["answer"])
+        yield chunk
+    
+    if session_independent and answer_cache is not None:
+        await answer_cache.astore(
+            chat_message.message, "".join(answer_parts), sources, time.perf_counter() - start_time,
+            corpus_version, answer_cache_scope(chat_message)
+        )
+
 # Chat endpoint
 @app.post("/api/chat")
 async def chat(chat_message: ChatMessage):
+    ticket = await admit_request(LANE_CHAT)
+    try:
+        return await answer_chat(chat_message)
+    finally:
+        ticket.release()
+
+async def answer_chat(chat_message: ChatMessage) -> Dict[str, Any]:
+    if vector_db:
+        # Pick up an index published by another worker
+        await asyncio.to_thread(vector_db.refresh)
     if not vector_db or not vector_db.vectorstore:
         raise HTTPException(
             status_code=400, 
@@ -231,119 +476,303 @@ async def chat(chat_message: ChatMessage):
     
     try:
         start_time = datetime.now()
+        corpus_version = vector_db.version
         
-        # Create RAG chain
-        rag_chain = create_rag_chain()
-        
-        # Update LLM parameters
-        global llm
-        llm.temperature = chat_message.temperature
-        llm.max_tokens = chat_message.max_tokens
-        
-        # Process the message
-        response = rag_chain.invoke(
-            {"input": chat_message.message},
-            config={"configurable": {"session_id": chat_message.session_id}}
-        )
+        # Answer summary requests from precomputed summaries
+        summary = await asyncio.to_thread(lookup_summary_answer, chat_message)
+        if summary is not None:
+            return {
+                "response": summary["answer"],
+                "sources": summary["sources"],
+                "session_id": chat_message.session_id,
+                "timestamp": datetime.now().isoformat(),
+                "processing_time": (datetime.now() - start_time).total_seconds(),
+                "cached": False,
+                "summary": True
+            }
         
-        # Extract sources
-        sources = []
-        if "context" in response:
-            for doc in response["context"]:
-                sources.append({
-                    "content": doc.page_content[:200] + "...",
-                    "metadata": doc.metadata
-                })
+        # Answer repeated questions from the semantic cache
+        session_independent, cached = await lookup_cached_answer(chat_message, corpus_version)
+        if cached is not None:
+            return {
+                "response": cached["answer"],
+                "sources": cached["sources"],
+                "session_id": chat_message.session_id,
+                "timestamp": datetime.now().isoformat(),
+                "processing_time": (datetime.now() - start_time).total_seconds(),
+                "cached": True
+            }
         
-        processing_time = (datetime.now() - start_time).total_seconds()
+        # Identical session-independent questions in flight share one history-free pipeline run
+        shared = False
+        if session_independent:
+            result, shared = await chat_flights.do(
+                coalescing_key(chat_message, corpus_version),
+                lambda: run_rag_chain(chat_message, corpus_version, session_independent=True)
+            )
+            await asyncio.to_thread(record_turn, chat_message, result["answer"])
+        else:
+            result = await run_rag_chain(chat_message, corpus_version, session_independent=False)
         
         return {
-            "response": response["answer"],
-            "sources": sources,
+            "response": result["answer"],
+            "sources": result["sources"],
             "session_id": chat_message.session_id,
             "timestamp": datetime.now().isoformat(),
-            "processing_time": processing_time
+            "processing_time": (datetime.now() - start_time).total_seconds(),
+            "cached": False,
+            "coalesced": shared
         }
         
     except Exception as e:
         logger.error(f"❌ Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Streaming chat endpoint (Server-Sent Events)
+@app.post("/api/chat/stream")
+async def chat_stream(chat_message: ChatMessage):
+    """Stream sources, then answer tokens as they are generated, then timings"""
+    # The slot is held until the stream ends
+    ticket = await admit_request(LANE_CHAT)
+    try:
+        if vector_db:
+            await asyncio.to_thread(vector_db.refresh)
+        if not vector_db or not vector_db.vectorstore:
+            raise HTTPException(
+                status_code=400, 
+                detail="No documents uploaded. Please upload documents first."
+            )
+        
+        corpus_version = vector_db.version
+    except BaseException:
+        ticket.release()
+        raise
+    
+    async def event_stream():
+        start_time = time.perf_counter()
+        retrieval_time = None
+        first_token_time = None
+        try:
+            # A precomputed summary or cached answer is sent as one token
+            summary = await asyncio.to_thread(lookup_summary_answer, chat_message)
+            session_independent, cached = (False, summary) if summary is not None else (
+                await lookup_cached_answer(chat_message, corpus_version)
+            )
+            if cached is not None:
+                yield sse_event("sources", {"sources": cached["sources"]})
+                yield sse_event("token", {"token": cached["answer"]})
+                processing_time = time.perf_counter() - start_time
+                yield sse_event("done", {
+                    "session_id": chat_message.session_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "processing_time": processing_time,
+                    "cached": summary is None,
+                    "summary": summary is not None,
+                    "timings": {
+                        "retrieval_time": None,
+                        "time_to_first_token": processing_time,
+                        "total_time": processing_time
+                    }
+                })
+                return
+            
+            # Identical session-independent questions in flight share one history-free stream, replayed to each caller
+            shared = False
+            if session_independent:
+                chunks, shared = stream_flights.stream(
+                    coalescing_key(chat_message, corpus_version),
+                    lambda: stream_rag_chain(chat_message, corpus_version, session_independent=True)
+                )
+            else:
+                chunks = stream_rag_chain(chat_message, corpus_version, session_independent=False)
+            
+            sources, answer_parts = [], []
+            async for chunk in chunks:
+                if "context" in chunk:
+                    retrieval_time = time.perf_counter() - start_time
+                    sources = format_sources(chunk["context"])
+                    yield sse_event("sources", {"sources": sources})
+                
+                token = chunk.get("answer")
+                if token:
+                    if first_token_time is None:
+                        first_token_time = time.perf_counter() - start_time
+                    answer_parts.append(token)
+                    yield sse_event("token", {"token": token})
+            
+            if session_independent:
+                await asyncio.to_thread(record_turn, chat_message, "".join(answer_parts))
+            
+            processing_time = time.perf_counter() - start_time
+            yield sse_event("done", {
+                "session_id": chat_message.session_id,
+                "timestamp": datetime.now().isoformat(),
+                "processing_time": processing_time,
+                "cached": False,
+                "coalesced": shared,
+                "timings": {
+                    "retrieval_time": retrieval_time,
+                    "time_to_first_token": first_token_time,
+                    "total_time": processing_time
+                }
+            })
+            
+        except Exception as e:
+            logger.error(f"❌ Chat stream error: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            ticket.release()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release)  # In case the stream never starts
+    )
+
+# Background ingestion pipeline
+def run_ingestion_job(job_id: str, temp_files: List[tuple], mode: str = "sync") -> Dict[str, Any]:
+    """Parse, embed and index uploaded files for a job (runs on the ingestion worker)"""
+    start_time = datetime.now()
+    try:
+        # Parse and split all files in parallel worker processes
+        job_manager.update(job_id, stage=STAGE_PARSING)
+        all_documents, file_timings = document_processor.process_files(temp_files)
+        job_manager.update(job_id, file_timings=file_timings, chunks_total=len(all_documents))
+        
+        if not all_documents:
+            raise ValueError("No valid documents found")
+        
+        progress_callback = job_manager.progress_callback(job_id)
+        diff = None
+        if mode == "sync":
+            # Upsert only new/changed chunks of the uploaded files and delete their stale ones
+            logger.info(f"🔄 Syncing vector store with {len(all_documents)} document chunks...")
+            diff = vector_db.sync_documents(all_documents, progress_callback=progress_callback)
+        else:
+            # Replace documents in vector store (clears old documents first)
+            logger.info(f"🔄 Replacing vector store with {len(all_documents)} new documents...")
+            success = vector_db.replace_documents(all_documents, progress_callback=progress_callback)
+            
+            if not success:
+                raise RuntimeError("Failed to replace documents in vector store")
+        
+        # Precompute document and corpus summaries; chat works meanwhile, and a failure leaves the index usable
+        job_manager.update(job_id, stage=STAGE_SUMMARIZING)
+        summaries = None
+        try:
+            summaries = summarizer.update(all_documents, merge=(mode == "sync"))
+        except Exception as e:
+            logger.error(f"❌ Summarization failed: {str(e)}")
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        
+        return {
+            "success": True,
+            "message": f"Successfully processed {len(all_documents)} document chunks",
+            "documents_processed": len(all_documents),
+            "processing_time": processing_time,
+            "mode": mode,
+            "diff": diff,
+            "summaries": summaries,
+            "file_timings": file_timings
+        }
+    finally:
+        # Clean up temp files
+        for temp_path, _ in temp_files:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
 # Document upload endpoint
-@app.post("/api/upload")
-async def upload_documents(files: List[UploadFile] = File(...)):
+@app.post("/api/upload", status_code=202)
+async def upload_documents(files: List[UploadFile] = File(...), mode: str = Form("sync")):
     if not vector_db:
         raise HTTPException(status_code=503, detail="System not initialized")
     
+    if mode not in ("sync", "replace"):
+        raise HTTPException(status_code=400, detail="mode must be 'sync' or 'replace'")
+    
+    # The ingestion slot covers saving and queueing the upload; the job queue itself is bounded by the job manager
+    ticket = await admit_request(LANE_INGESTION)
+    
+    temp_files = []
     try:
-        start_time = datetime.now()
-        all_documents = []
-        
-        # Process each file
+        # Save uploaded PDFs to temporary files
         for file in files:
             if file.content_type == "application/pdf":
-                # Save temporary file
                 with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
                     shutil.copyfileobj(file.file, temp_file)
-                    temp_path = temp_file.name
-                
-                # Load and process PDF
-                loader = PyPDFLoader(temp_path)
-                documents = loader.load()
-                
-                # Split documents
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=1000,
-                    chunk_overlap=200
-                )
-                splits = text_splitter.split_documents(documents)
-                
-                # Add metadata
-                for doc in splits:
-                    doc.metadata["source"] = file.filename
-                    doc.metadata["upload_time"] = datetime.now().isoformat()
-                
-                all_documents.extend(splits)
-                
-                # Clean up temp file
-                os.unlink(temp_path)
-            
+                    temp_files.append((temp_file.name, file.filename))
             else:
                 logger.warning(f"Unsupported file type: {file.content_type}")
         
-        if not all_documents:
+        if not temp_files:
             raise HTTPException(status_code=400, detail="No valid documents found")
         
-        # Replace documents in vector store (clears old documents first)
-        logger.info(f"🔄 Replacing vector store with {len(all_documents)} new documents...")
-        success = vector_db.replace_documents(all_documents)
-        
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to replace documents in vector store")
-        
-        processing_time = (datetime.now() - start_time).total_seconds()
+        # Queue ingestion on the background worker
+        job_id = job_manager.create_job([filename for _, filename in temp_files])
+        job_manager.submit(job_id, run_ingestion_job, job_id, temp_files, mode)
+        logger.info(f"📥 Queued ingestion job {job_id} for {len(temp_files)} files")
         
         return {
             "success": True,
-            "message": f"Successfully processed {len(all_documents)} document chunks",
-            "documents_processed": len(all_documents),
-            "processing_time": processing_time
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}",
+            "message": f"Queued {len(temp_files)} files for processing"
         }
         
+    except HTTPException:
+        raise
+    except JobQueueFull as e:
+        logger.warning(f"⚠️ Upload rejected: {str(e)}")
+        for temp_path, _ in temp_files:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy: ingestion queue is full. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"❌ Upload error: {str(e)}")
+        for temp_path, _ in temp_files:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        ticket.release()
+
+# Ingestion job status
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = await asyncio.to_thread(job_manager.get_job, job_id) if job_manager else None
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# List ingestion jobs
+@app.get("/api/jobs")
+async def list_jobs():
+    return {"jobs": await asyncio.to_thread(job_manager.list_jobs) if job_manager else []}
 
 # Get chat sessions
 @app.get("/api/sessions")
 async def get_sessions():
-    return {"sessions": list(store.keys())}
+    return {"sessions": await asyncio.to_thread(store.session_ids)}
+
+# Session history size
+@app.get("/api/sessions/{session_id}")
+async def get_session(session_id: str):
+    # Inspecting a session must not count as using it (LRU order, idle TTL)
+    history = await asyncio.to_thread(store.peek, session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, **await asyncio.to_thread(history.token_counts)}
 
 # Clear session
 @app.delete("/api/sessions/{session_id}")
 async def clear_session(session_id: str):
-    if session_id in store:
-        del store[session_id]
+    if await asyncio.to_thread(store.delete, session_id):
         return {"message": f"Session {session_id} cleared"}
     return {"message": "Session not found"}
 
@@ -357,7 +786,8 @@ async def clear_documents():
     try:
         logger.info("🧹 API request to clear all documents")
         
-        # Check if vector store exists
+        # Check if vector store exists (here or in another worker)
+        await asyncio.to_thread(vector_db.refresh)
         if not vector_db.vectorstore:
             logger.info("ℹ️ No vector store initialized, nothing to clear")
             return {
@@ -366,9 +796,10 @@ async def clear_documents():
             }
         
         # Attempt to clear the index
-        success = vector_db.clear_index()
+        success = await asyncio.to_thread(vector_db.clear_index)
         
         if success:
+            summary_store.clear()
             logger.info("✅ Documents cleared successfully via API")
             return {
                 "success": True,
@@ -378,7 +809,7 @@ async def clear_documents():
             logger.error("❌ Failed to clear documents - clear_index returned False")
             raise HTTPException(
                 status_code=500, 
-                detail="Failed to clear documents from Pinecone index"
+                detail="Failed to clear documents from vector index"
             )
     
     except HTTPException:
@@ -0,0 +1,203 @@
+"""
+Memory-Mapped Vector Store Format
+Zero-copy on-disk layout for vectors and chunks, shared through the page cache
+"""
+
+import os
+import json
+import mmap
+import uuid
+import shutil
+import logging
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Iterator
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Layout of an index directory:
+#   CURRENT        - name of the published store manifest
+#   m-<time>.json  - store manifest: segment names in order, each with its deleted rows
+#   s-<time>/      - one immutable segment, written once:
+#     manifest.json  - format, dimension, count
+#     vectors.f32    - row-major float32 matrix (count x dimension)
+#     chunks.bin     - concatenated UTF-8 JSON records {"text", "metadata"}
+#     offsets.u64    - count + 1 byte offsets into chunks.bin
+#     ids.txt        - one chunk ID per line
+# Stores written before segments existed published a single v-<time> segment
+# directory, which is read as a store with that one segment.
+CURRENT_FILE = "CURRENT"
+STORE_FORMAT_VERSION = 2
+
+
+class MmapDocuments(Sequence):
+    """
+    Read-only sequence of Documents decoded on access from a memory-mapped blob
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = np.memmap(os.path.join(path, "offsets.u64"), dtype=np.uint64, mode="r")
+        blob_path = os.path.join(path, "chunks.bin")
+        if os.path.getsize(blob_path):
+            with open(blob_path, "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._blob = b""
+        self._ids: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("document index out of range")
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        record = json.loads(self._blob[start:end].decode("utf-8"))
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def __iter__(self) -> Iterator[Document]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def ids(self) -> List[str]:
+        """Chunk IDs, read on first use without decoding chunk records"""
+        if self._ids is None:
+            with open(os.path.join(self.path, "ids.txt"), "r", encoding="utf-8") as f:
+                self._ids = f.read().splitlines()
+        return self._ids
+
+
+def chunk_ids(documents: Sequence[Document]) -> List[str]:
+    """Chunk IDs of a document sequence, avoiding a full decode for mmap-backed ones"""
+    if isinstance(documents, MmapDocuments):
+        return documents.ids
+    return [doc.metadata["chunk_id"] for doc in documents]
+
+
+def write_store(path: str, vectors: np.ndarray, documents: Sequence[Document]) -> None:
+    """Write a segment directory"""
+    os.makedirs(path, exist_ok=True)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    vectors.tofile(os.path.join(path, "vectors.f32"))
+
+    offsets = np.zeros(len(documents) + 1, dtype=np.uint64)
+    with open(os.path.join(path, "chunks.bin"), "wb") as blob:
+        for i, doc in enumerate(documents):
+            record = json.dumps({"text": doc.page_content, "metadata": doc.metadata}).encode("utf-8")
+            blob.write(record)
+            offsets[i + 1] = offsets[i] + len(record)
+    offsets.tofile(os.path.join(path, "offsets.u64"))
+
+    with open(os.path.join(path, "ids.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(chunk_ids(documents)))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "dimension": int(vectors.shape[1]),
+        "count": len(documents),
+        "created_at": datetime.now().isoformat()
+    }
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def open_store(path: str) -> Tuple[np.ndarray, MmapDocuments, Dict[str, Any]]:
+    """Memory-map a segment directory; cost is independent of its size"""
+    with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported store format: {manifest.get('format')}")
+
+    shape = (manifest["count"], manifest["dimension"])
+    if manifest["count"]:
+        vectors = np.memmap(os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=shape)
+    else:
+        vectors = np.empty(shape, dtype=np.float32)
+    return vectors, MmapDocuments(path), manifest
+
+
+def current_version(index_path: str) -> Optional[str]:
+    """Name of the published store manifest, or None"""
+    try:
+        with open(os.path.join(index_path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _new_name(prefix: str) -> str:
+    # Time first so names sort by creation; the suffix keeps names written in the same microsecond apart
+    return f"{prefix}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+
+
+def _created(name: str) -> str:
+    """Creation time part of a segment or manifest name"""
+    return name[2:22]
+
+
+def new_segment_path(index_path: str) -> str:
+    """Directory for a new segment"""
+    return os.path.join(index_path, _new_name("s"))
+
+
+def write_manifest(index_path: str, dimension: int, segments: List[Dict[str, Any]]) -> str:
+    """Write a not-yet-published store manifest listing {"name", "deleted"} segments; returns its name"""
+    name = f"{_new_name('m')}.json"
+    manifest = {
+        "format": STORE_FORMAT_VERSION,
+        "dimension": dimension,
+        "segments": segments,
+        "created_at": datetime.now().isoformat()
+    }
+    with open(os.path.join(index_path, name), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    return name
+
+
+def read_manifest(index_path: str, version: str) -> Dict[str, Any]:
+    """Store manifest for a published version"""
+    if version.startswith("v-"):
+        return {"format": STORE_FORMAT_VERSION, "segments": [{"name": version, "deleted": []}]}
+    with open(os.path.join(index_path, version), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported store manifest format: {manifest.get('format')}")
+    return manifest
+
+
+def publish_version(index_path: str, version: str) -> None:
+    """Atomically point CURRENT at a manifest and remove older manifests and unreferenced segments"""
+    tmp_file = os.path.join(index_path, f"{CURRENT_FILE}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, os.path.join(index_path, CURRENT_FILE))
+
+    # Readers that still map an old segment keep working: unlinked files stay mapped.
+    # Newer unpublished segments and manifests may belong to a writer in another process.
+    referenced = {segment["name"] for segment in read_manifest(index_path, version)["segments"]}
+    for name in os.listdir(index_path):
+        if name[:2] not in ("v-", "s-", "m-") or name in referenced or name == version:
+            continue
+        if _created(name) < _created(version):
+            path = os.path.join(index_path, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
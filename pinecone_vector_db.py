@@ -4,14 +4,22 @@ Enterprise-grade vector database for RAG applications
 """
 
 import os
+import time
 import logging
-from typing import List, Optional, Dict, Any
+import shutil
+import threading
+from typing import List, Optional, Dict, Any, Callable, Set
 from datetime import datetime
 
 # Core imports
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
+from document_processor import assign_chunk_ids, stale_chunk_ids
+from hybrid_search import BM25Index, HybridRetriever, hybrid_settings
+from reranker import RerankingRetriever, get_reranker, with_reranking
+from index_state import create_index_state
+
 # Pinecone imports
 try:
     from langchain_pinecone import PineconeVectorStore
@@ -23,6 +31,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Called as progress_callback(chunks_embedded, chunks_upserted, chunks_total)
+ProgressCallback = Callable[[int, int, int], None]
+
 class PineconeVectorDB:
     """
     Pinecone vector database manager for enterprise RAG applications
@@ -33,15 +44,34 @@ class PineconeVectorDB:
                  embeddings: Optional[Embeddings] = None,
                  dimension: int = 384,
                  cloud: str = "aws",
-                 region: str = "us-east-1"):
+                 region: str = "us-east-1",
+                 batch_size: int = 100,
+                 validation_timeout: float = 60.0,
+                 retire_delay: float = 10.0,
+                 retrieval_mode: Optional[str] = None):
         self.index_name = index_name
         self.embeddings = embeddings
         self.dimension = dimension
         self.cloud = cloud
         self.region = region
+        self.batch_size = batch_size
+        self.text_key = "text"
+        self.validation_timeout = validation_timeout
+        self.retire_delay = retire_delay
+        self.namespace = ""  # Live namespace ("" is Pinecone's default namespace)
         self.vectorstore = None
         self.retriever = None
+        
+        # "hybrid" fuses dense and BM25 keyword results; "dense" is vector search only
+        self.retrieval_mode = (retrieval_mode or os.getenv("RETRIEVAL_MODE", "hybrid")).lower()
+        self.lexical_index: Optional[BM25Index] = None
+        self.lexical_dir = os.path.join(os.getenv("LEXICAL_INDEX_DIR", "lexical_index"), index_name)
         self.backend = "pinecone"
+        self.version = 0  # Bumped whenever the live retriever changes
+        
+        # Live namespace shared with other worker processes
+        self.index_state = create_index_state(index_name)
+        self._state_version: Optional[str] = None
         
         # Metrics
         self.metrics = {
@@ -54,6 +84,9 @@ class PineconeVectorDB:
         # Initialize Pinecone
         self.pc = None
         self._init_pinecone()
+        
+        # Serve whatever the index already holds instead of waiting for a re-upload
+        self._attach_existing_index()
     
     def _init_pinecone(self) -> None:
         """Initialize Pinecone client"""
@@ -89,7 +122,6 @@ class PineconeVectorDB:
                 )
                 
                 # Wait for index to be ready
-                import time
                 logger.info("⏳ Waiting for index to be ready...")
                 for i in range(60):  # Wait up to 2 minutes
                     try:
@@ -109,7 +141,307 @@ class PineconeVectorDB:
             logger.error(f"❌ Failed to ensure index exists: {str(e)}")
             raise RuntimeError(f"Index creation/verification failed: {str(e)}")
     
-    def create_vectorstore(self, documents: List[Document]) -> bool:
+    def _upsert_documents(self,
+                          documents: List[Document],
+                          progress_callback: Optional[ProgressCallback] = None,
+                          namespace: Optional[str] = None) -> None:
+        """Embed and upsert documents batch by batch, reporting progress"""
+        index = self.pc.Index(self.index_name)
+        namespace = self.namespace if namespace is None else namespace
+        total = len(documents)
+        embedded = 0
+        upserted = 0
+        
+        for start in range(0, total, self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            
+            # Embed batch
+            vectors = self.embeddings.embed_documents([doc.page_content for doc in batch])
+            embedded += len(batch)
+            if progress_callback:
+                progress_callback(embedded, upserted, total)
+            
+            # Upsert batch (text stored under text_key, as PineconeVectorStore expects)
+            records = []
+            for doc, vector in zip(batch, vectors):
+                metadata = dict(doc.metadata)
+                metadata[self.text_key] = doc.page_content
+                records.append({
+                    "id": metadata["chunk_id"],
+                    "values": vector,
+                    "metadata": metadata
+                })
+            index.upsert(vectors=records, namespace=namespace)
+            upserted += len(batch)
+            if progress_callback:
+                progress_callback(embedded, upserted, total)
+    
+    def _list_ids(self, namespace: Optional[str] = None) -> set:
+        """List all vector IDs currently stored in a namespace (the live one by default)"""
+        index = self.pc.Index(self.index_name)
+        ids = set()
+        for id_batch in index.list(namespace=self.namespace if namespace is None else namespace):
+            ids.update(id_batch)
+        return ids
+    
+    def _delete_ids(self, ids: List[str]) -> None:
+        """Delete vectors by ID in batches from the live namespace"""
+        index = self.pc.Index(self.index_name)
+        ids = list(ids)
+        for start in range(0, len(ids), 1000):
+            index.delete(ids=ids[start:start + 1000], namespace=self.namespace)
+    
+    def _lexical_path(self, namespace: str) -> str:
+        return os.path.join(self.lexical_dir, namespace or "default")
+    
+    def _save_lexical_index(self, namespace: str, lexical_index: Optional[BM25Index]) -> None:
+        """Persist the BM25 index for a namespace and drop those of other namespaces"""
+        if lexical_index is None:
+            return
+        try:
+            tmp_path = f"{self._lexical_path(namespace)}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            lexical_index.save(tmp_path)
+            shutil.rmtree(self._lexical_path(namespace), ignore_errors=True)
+            os.replace(tmp_path, self._lexical_path(namespace))
+            for name in os.listdir(self.lexical_dir):
+                if name != (namespace or "default"):
+                    shutil.rmtree(os.path.join(self.lexical_dir, name), ignore_errors=True)
+        except Exception as e:
+            logger.error(f"❌ Failed to save lexical index: {str(e)}")
+    
+    def _fetch_documents(self, namespace: str, ids: List[str]) -> List[Document]:
+        """Fetch chunks by ID for keyword hits that dense search did not return"""
+        response = self.pc.Index(self.index_name).fetch(ids=ids, namespace=namespace)
+        documents = []
+        for vector_id, vector in response.vectors.items():
+            metadata = dict(vector.metadata or {})
+            text = metadata.pop(self.text_key, "")
+            metadata.setdefault("chunk_id", vector_id)
+            documents.append(Document(page_content=text, metadata=metadata))
+        return documents
+    
+    def _attach_vectorstore(self,
+                            namespace: Optional[str] = None,
+                            lexical_index: Optional[BM25Index] = None,
+                            save_lexical: bool = True) -> None:
+        """Wrap a populated namespace with a vector store and retriever and make it live"""
+        namespace = self.namespace if namespace is None else namespace
+        
+        # Build the new objects first so readers never see a half-built store
+        vectorstore = PineconeVectorStore(
+            index_name=self.index_name,
+            embedding=self.embeddings,
+            text_key=self.text_key,
+            namespace=namespace or None
+        )
+        
+        if self.retrieval_mode == "hybrid":
+            if lexical_index is None:
+                lexical_index = (
+                    self.lexical_index if namespace == self.namespace and self.lexical_index is not None
+                    else BM25Index.load(self._lexical_path(namespace)) or BM25Index.empty()
+                )
+        else:
+            lexical_index = None
+        
+        def build_retriever(k: int):
+            if lexical_index is not None:
+                return HybridRetriever(
+                    vectorstore=vectorstore,
+                    lexical_search=lexical_index.search,
+                    fetch_documents=lambda ids: self._fetch_documents(namespace, ids),
+                    k=k,
+                    **hybrid_settings()
+                )
+            return vectorstore.as_retriever(search_kwargs={"k": k})
+        
+        # Return top 4 most relevant chunks (over-fetched and reranked if RERANKER is set)
+        retriever = with_reranking(build_retriever, k=4)
+        
+        lexical_changed = lexical_index is not self.lexical_index
+        self.namespace, self.vectorstore, self.lexical_index, self.retriever = (
+            namespace, vectorstore, lexical_index, retriever
+        )
+        self.version += 1
+        if lexical_changed and save_lexical:
+            self._save_lexical_index(namespace, lexical_index)
+    
+    def _publish_state(self) -> None:
+        """Publish the live namespace so other workers reattach to it"""
+        try:
+            state = self.index_state.publish(
+                active=self.vectorstore is not None,
+                namespace=self.namespace,
+                documents_indexed=self.metrics["documents_indexed"]
+            )
+            self._state_version = state["version"]
+        except Exception as e:
+            logger.error(f"❌ Failed to publish index state: {str(e)}")
+    
+    def refresh(self) -> bool:
+        """Reattach to the namespace published by another worker, if it changed"""
+        state = self.index_state.read()
+        if state is None or state["version"] == self._state_version:
+            return False
+        
+        if state.get("active"):
+            lexical_index = None
+            if self.retrieval_mode == "hybrid":
+                lexical_index = BM25Index.load(self._lexical_path(state["namespace"])) or BM25Index.empty()
+            self._attach_vectorstore(state["namespace"], lexical_index, save_lexical=False)
+        else:
+            self.vectorstore, self.retriever, self.lexical_index = None, None, None
+            self.version += 1
+        
+        self.metrics["documents_indexed"] = state.get("documents_indexed", 0)
+        self.metrics["last_updated"] = datetime.now()
+        self._state_version = state["version"]
+        logger.info(f"🔄 Attached to index version {state['version']} (namespace '{state.get('namespace') or 'default'}')")
+        return True
+    
+    def _select_existing_namespace(self, namespaces: Dict[str, Any]) -> Optional[str]:
+        """Pick the namespace to serve from index stats when no worker has published one"""
+        populated = {name: stats.vector_count for name, stats in namespaces.items() if stats.vector_count}
+        if not populated:
+            return None
+        
+        # Only the live namespace keeps a persisted lexical index
+        if os.path.isdir(self.lexical_dir):
+            for name in os.listdir(self.lexical_dir):
+                namespace = "" if name == "default" else name
+                if namespace in populated:
+                    return namespace
+        
+        # Otherwise prefer the default namespace, then the largest (an unretired old one is smaller or equal)
+        return "" if "" in populated else max(populated, key=populated.get)
+    
+    def _rebuild_lexical_index(self, namespace: str, batch_size: int = 100) -> BM25Index:
+        """Rebuild the BM25 index from chunk text stored in Pinecone metadata (no re-embedding)"""
+        ids = sorted(self._list_ids(namespace))
+        documents = []
+        for start in range(0, len(ids), batch_size):
+            documents.extend(self._fetch_documents(namespace, ids[start:start + batch_size]))
+        logger.info(f"🔤 Rebuilt lexical index for namespace '{namespace or 'default'}' from {len(documents)} chunks")
+        return BM25Index.build(documents)
+    
+    def _sync_lexical_index(self,
+                            existing_ids: Set[str],
+                            new_documents: List[Document],
+                            stale_ids: Set[str],
+                            batch_size: int = 100) -> BM25Index:
+        """
+        Apply a sync's additions and deletions to the BM25 index. Chunks the index is
+        missing (e.g. written before hybrid mode was on) are fetched by ID, so the cost
+        follows the change and the drift rather than the corpus size.
+        """
+        base = self.lexical_index if self.lexical_index is not None else BM25Index.empty()
+        indexed_ids = set(base.chunk_ids)
+        missing_ids = sorted(existing_ids - indexed_ids - stale_ids)
+        orphaned_ids = indexed_ids - existing_ids
+        
+        documents = list(new_documents)
+        for start in range(0, len(missing_ids), batch_size):
+            documents.extend(self._fetch_documents(self.namespace, missing_ids[start:start + batch_size]))
+        return base.remove(list(stale_ids | orphaned_ids)).add(documents)
+    
+    def _attach_existing_index(self) -> None:
+        """Reattach to a populated index left by a previous run, restoring documents_indexed from index stats"""
+        try:
+            if self.index_name not in [idx.name for idx in self.pc.list_indexes()]:
+                logger.info(f"ℹ️ Pinecone index '{self.index_name}' does not exist yet")
+                return
+            
+            namespaces = self.pc.Index(self.index_name).describe_index_stats().namespaces
+            
+            # Another worker may already have published the live namespace
+            state = self.index_state.read()
+            if state is not None and self.refresh():
+                if state.get("active") and state.get("namespace", "") in namespaces:
+                    self.metrics["documents_indexed"] = namespaces[state["namespace"]].vector_count
+                return
+            
+            namespace = self._select_existing_namespace(namespaces)
+            if namespace is None:
+                logger.info(f"ℹ️ Pinecone index '{self.index_name}' is empty")
+                return
+            
+            lexical_index = None
+            if self.retrieval_mode == "hybrid":
+                lexical_index = BM25Index.load(self._lexical_path(namespace))
+                if lexical_index is None:
+                    lexical_index = self._rebuild_lexical_index(namespace)
+                    self._save_lexical_index(namespace, lexical_index)
+            self._attach_vectorstore(namespace, lexical_index, save_lexical=False)
+            
+            self.metrics["documents_indexed"] = namespaces[namespace].vector_count
+            self.metrics["last_updated"] = datetime.now()
+            self._publish_state()
+            logger.info(
+                f"✅ Reattached to index '{self.index_name}' (namespace '{namespace or 'default'}') "
+                f"with {self.metrics['documents_indexed']} vectors"
+            )
+        except Exception as e:
+            # Startup still succeeds; the next upload creates the vector store as before
+            logger.warning(f"⚠️ Could not reattach to existing index: {str(e)}")
+    
+    def _namespace_vector_count(self, namespace: str) -> int:
+        """Get the number of vectors stored in a namespace"""
+        stats = self.pc.Index(self.index_name).describe_index_stats()
+        namespace_stats = stats.namespaces.get(namespace)
+        return namespace_stats.vector_count if namespace_stats else 0
+    
+    def _validate_namespace(self, namespace: str, documents: List[Document], samples: int = 3) -> None:
+        """Check a freshly built namespace holds every vector and answers sample queries"""
+        # Pinecone is eventually consistent, so wait for the vector count to catch up
+        expected = len(documents)
+        deadline = time.time() + self.validation_timeout
+        count = self._namespace_vector_count(namespace)
+        while count < expected:
+            if time.time() > deadline:
+                raise RuntimeError(
+                    f"Validation failed: namespace '{namespace}' has {count}/{expected} vectors"
+                )
+            time.sleep(2)
+            count = self._namespace_vector_count(namespace)
+        
+        # Each sample chunk should retrieve itself (or a chunk with identical text) as the top match
+        index = self.pc.Index(self.index_name)
+        step = max(1, len(documents) // samples)
+        for doc in documents[::step][:samples]:
+            vector = self.embeddings.embed_query(doc.page_content)
+            result = index.query(vector=vector, top_k=1, namespace=namespace, include_metadata=True)
+            if not result.matches:
+                raise RuntimeError(f"Validation failed: sample query returned no results in '{namespace}'")
+            top = result.matches[0]
+            if top.id != doc.metadata["chunk_id"] and (top.metadata or {}).get(self.text_key) != doc.page_content:
+                raise RuntimeError(
+                    f"Validation failed: sample chunk {doc.metadata['chunk_id']} retrieved {top.id} in '{namespace}'"
+                )
+        
+        logger.info(f"✅ Namespace '{namespace}' validated with {count} vectors")
+    
+    def _retire_namespace(self, namespace: str) -> None:
+        """Delete an old namespace in the background once in-flight queries have drained"""
+        def retire():
+            time.sleep(self.retire_delay)
+            try:
+                self.pc.Index(self.index_name).delete(delete_all=True, namespace=namespace)
+                logger.info(f"🗑️ Retired namespace '{namespace or '(default)'}'")
+            except Exception as e:
+                logger.error(f"❌ Failed to retire namespace '{namespace}': {str(e)}")
+        
+        threading.Thread(target=retire, name="retire-namespace", daemon=True).start()
+    
+    def _build_lexical_index(self, documents: List[Document]) -> Optional[BM25Index]:
+        """Build the BM25 keyword index alongside the vectors when hybrid retrieval is on"""
+        if self.retrieval_mode != "hybrid":
+            return None
+        return BM25Index.build(documents)
+    
+    def create_vectorstore(self,
+                           documents: List[Document],
+                           progress_callback: Optional[ProgressCallback] = None) -> bool:
         """Create Pinecone vector store"""
         try:
             if not documents:
@@ -121,22 +453,17 @@ class PineconeVectorDB:
             # Ensure index exists
             self._ensure_index_exists()
             
+            documents = assign_chunk_ids(documents)
             logger.info(f"🔄 Creating Pinecone vector store with {len(documents)} documents...")
             
-            # Create vector store
-            self.vectorstore = PineconeVectorStore.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                index_name=self.index_name
-            )
-            
-            self.retriever = self.vectorstore.as_retriever(
-                search_kwargs={"k": 4}  # Return top 4 most relevant chunks
-            )
+            # Embed and upload documents, then create vector store and keyword index
+            self._upsert_documents(documents, progress_callback)
+            self._attach_vectorstore(lexical_index=self._build_lexical_index(documents))
             
             # Update metrics
             self.metrics["documents_indexed"] = len(documents)
             self.metrics["last_updated"] = datetime.now()
+            self._publish_state()
             
             logger.info(f"✅ Pinecone vector store created successfully with {len(documents)} documents")
             return True
@@ -145,9 +472,12 @@ class PineconeVectorDB:
             logger.error(f"❌ Pinecone vector store creation failed: {str(e)}")
             raise RuntimeError(f"Vector store creation failed: {str(e)}")
     
-    def add_documents(self, documents: List[Document]) -> bool:
+    def add_documents(self,
+                      documents: List[Document],
+                      progress_callback: Optional[ProgressCallback] = None) -> bool:
         """Add documents to existing vector store"""
         try:
+            self.refresh()
             if not self.vectorstore:
                 raise ValueError("Vector store not initialized. Call create_vectorstore first.")
             
@@ -155,13 +485,19 @@ class PineconeVectorDB:
                 logger.warning("No documents provided to add")
                 return True
             
+            documents = assign_chunk_ids(documents)
             logger.info(f"🔄 Adding {len(documents)} documents to existing vector store...")
             
-            self.vectorstore.add_documents(documents)
+            self._upsert_documents(documents, progress_callback)
+            
+            # Always reattach: the version bump invalidates cached answers and chains in every mode
+            lexical_index = self.lexical_index.add(documents) if self.lexical_index is not None else None
+            self._attach_vectorstore(lexical_index=lexical_index)
             
             # Update metrics
             self.metrics["documents_indexed"] += len(documents)
             self.metrics["last_updated"] = datetime.now()
+            self._publish_state()
             
             logger.info(f"✅ Added {len(documents)} documents successfully")
             return True
@@ -181,16 +517,21 @@ class PineconeVectorDB:
             # Get the index
             index = self.pc.Index(self.index_name)
             
-            # Delete all vectors using the correct syntax
-            index.delete(delete_all=True)
+            # Delete all vectors in every namespace
+            for namespace in list(index.describe_index_stats().namespaces.keys()):
+                index.delete(delete_all=True, namespace=namespace)
             
-            # Reset vector store and retriever
+            # Reset vector store, retriever and keyword index
             self.vectorstore = None
             self.retriever = None
+            self.lexical_index = None
+            self.version += 1
+            shutil.rmtree(self.lexical_dir, ignore_errors=True)
             
             # Reset metrics
             self.metrics["documents_indexed"] = 0
             self.metrics["last_updated"] = datetime.now()
+            self._publish_state()
             
             logger.info("✅ Index cleared successfully")
             return True
@@ -201,8 +542,10 @@ class PineconeVectorDB:
             logger.error(f"❌ Error details: {str(e)}")
             return False
     
-    def replace_documents(self, documents: List[Document]) -> bool:
-        """Replace all documents in the vector store with new ones"""
+    def replace_documents(self,
+                          documents: List[Document],
+                          progress_callback: Optional[ProgressCallback] = None) -> bool:
+        """Replace all documents with new ones via a build-then-swap of namespaces"""
         try:
             if not documents:
                 raise ValueError("No documents provided")
@@ -213,28 +556,28 @@ class PineconeVectorDB:
             # Ensure index exists
             self._ensure_index_exists()
             
-            # Clear existing documents
-            logger.info("🧹 Clearing existing documents...")
-            if not self.clear_index():
-                logger.warning("⚠️ Failed to clear index, proceeding anyway...")
+            # Build the new corpus in a shadow namespace while the live one keeps serving
+            self.refresh()
+            documents = assign_chunk_ids(documents)
+            shadow_namespace = f"corpus-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+            logger.info(f"🔄 Building {len(documents)} documents in shadow namespace '{shadow_namespace}'...")
             
-            # Add new documents
-            logger.info(f"🔄 Adding {len(documents)} new documents...")
+            try:
+                self._upsert_documents(documents, progress_callback, namespace=shadow_namespace)
+                self._validate_namespace(shadow_namespace, documents)
+            except Exception:
+                self._retire_namespace(shadow_namespace)
+                raise
             
-            # Create fresh vector store
-            self.vectorstore = PineconeVectorStore.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                index_name=self.index_name
-            )
-            
-            self.retriever = self.vectorstore.as_retriever(
-                search_kwargs={"k": 4}  # Return top 4 most relevant chunks
-            )
+            # Swap the live retriever over, then retire the old namespace
+            old_namespace = self.namespace
+            self._attach_vectorstore(shadow_namespace, self._build_lexical_index(documents))
+            self._retire_namespace(old_namespace)
             
             # Update metrics
             self.metrics["documents_indexed"] = len(documents)
             self.metrics["last_updated"] = datetime.now()
+            self._publish_state()
             
             logger.info(f"✅ Successfully replaced all documents with {len(documents)} new documents")
             return True
@@ -243,8 +586,71 @@ class PineconeVectorDB:
             logger.error(f"❌ Document replacement failed: {str(e)}")
             raise RuntimeError(f"Document replacement failed: {str(e)}")
     
+    def sync_documents(self,
+                       documents: List[Document],
+                       progress_callback: Optional[ProgressCallback] = None) -> Dict[str, int]:
+        """
+        Incrementally sync the uploaded files: add their new chunks and delete
+        their stale ones, leaving chunks of other files untouched
+        """
+        try:
+            if not documents:
+                raise ValueError("No documents provided")
+            
+            if not self.embeddings:
+                raise ValueError("Embeddings not configured")
+            
+            # Ensure index exists
+            self._ensure_index_exists()
+            
+            self.refresh()
+            documents = assign_chunk_ids(documents)
+            existing_ids = self._list_ids()
+            
+            new_documents = [doc for doc in documents if doc.metadata["chunk_id"] not in existing_ids]
+            stale_ids = stale_chunk_ids(existing_ids, documents)
+            
+            logger.info(
+                f"🔄 Syncing index: {len(new_documents)} new, "
+                f"{len(documents) - len(new_documents)} unchanged, {len(stale_ids)} stale"
+            )
+            
+            # Upsert before deleting so the index is never empty mid-sync
+            if new_documents:
+                self._upsert_documents(new_documents, progress_callback)
+            elif progress_callback:
+                progress_callback(0, 0, 0)
+            
+            if stale_ids:
+                self._delete_ids(stale_ids)
+            
+            # Update the keyword index from the change itself: listing right after writes may lag
+            lexical_index = None
+            if self.retrieval_mode == "hybrid":
+                lexical_index = self._sync_lexical_index(existing_ids, new_documents, stale_ids)
+            self._attach_vectorstore(lexical_index=lexical_index)
+            
+            # Update metrics
+            self.metrics["documents_indexed"] = len(existing_ids) + len(new_documents) - len(stale_ids)
+            self.metrics["last_updated"] = datetime.now()
+            self._publish_state()
+            
+            diff = {
+                "added": len(new_documents),
+                "unchanged": len(documents) - len(new_documents),
+                "deleted": len(stale_ids),
+                "total": len(documents)
+            }
+            logger.info(f"✅ Index sync complete: {diff}")
+            return diff
+            
+        except Exception as e:
+            logger.error(f"❌ Document sync failed: {str(e)}")
+            raise RuntimeError(f"Document sync failed: {str(e)}")
+    
     def get_retriever(self):
         """Get retriever for the vector store"""
+        self.refresh()
         if not self.retriever:
             raise ValueError("Vector store not initialized. Call create_vectorstore first.")
         return self.retriever
@@ -252,11 +658,15 @@ class PineconeVectorDB:
     def search(self, query: str, k: int = 4) -> List[Document]:
         """Search for similar documents"""
         try:
+            self.refresh()
             if not self.vectorstore:
                 raise ValueError("Vector store not initialized")
             
             start_time = datetime.now()
-            results = self.vectorstore.similarity_search(query, k=k)
+            if isinstance(self.retriever, (HybridRetriever, RerankingRetriever)):
+                results = self.retriever.search(query, k=k)
+            else:
+                results = self.vectorstore.similarity_search(query, k=k)
             end_time = datetime.now()
             
             # Update metrics
@@ -288,7 +698,9 @@ class PineconeVectorDB:
             # Reset state
             self.vectorstore = None
             self.retriever = None
+            self.version += 1
             self.metrics["documents_indexed"] = 0
+            self._publish_state()
             
             logger.info(f"✅ Index '{self.index_name}' deleted successfully")
             return True
@@ -322,9 +734,16 @@ class PineconeVectorDB:
             "dimension": self.dimension,
             "cloud": self.cloud,
             "region": self.region,
+            "namespace": self.namespace,
+            "version": self.version,
+            "state_version": self._state_version,
+            "retrieval_mode": self.retrieval_mode,
+            "reranker": get_reranker().get_stats() if get_reranker() else None,
+            "lexical_index": self.lexical_index.get_stats() if self.lexical_index else None,
             "initialized": self.vectorstore is not None,
             "pinecone_available": PINECONE_AVAILABLE,
             "metrics": self.metrics,
+            "embedding_cache": self.embeddings.get_stats() if hasattr(self.embeddings, "get_stats") else None,
             "index_stats": index_stats
         }
     
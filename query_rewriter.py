@@ -0,0 +1,147 @@
+"""
+Question Rewriter
+History-aware retrieval that only asks the LLM to rephrase follow-up questions,
+skipping first turns and self-contained questions and memoizing past rewrites
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import BasePromptTemplate
+from langchain_core.retrievers import RetrieverLike
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+logger = logging.getLogger(__name__)
+
+# Words that usually point back into the conversation ("what about its limits?")
+REFERRING_WORDS = frozenset({
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "theirs",
+    "he", "him", "his", "she", "her", "hers", "there", "former", "latter", "above",
+    "previous", "earlier", "same", "such", "else", "another", "again", "also", "too"
+})
+
+# Openers that continue the previous turn rather than start a new topic
+FOLLOW_UP_PREFIXES = ("and ", "but ", "or ", "so ", "then ", "what about", "how about", "what else")
+
+MIN_SELF_CONTAINED_WORDS = 4
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def refers_to_history(question: str) -> bool:
+    """Whether a question opens as a follow-up or uses words pointing back into the conversation"""
+    text = question.lower().strip()
+    return text.startswith(FOLLOW_UP_PREFIXES) or bool(REFERRING_WORDS.intersection(_WORD_PATTERN.findall(text)))
+
+
+def is_self_contained(question: str) -> bool:
+    """Cheap check that a question can be retrieved on without the chat history"""
+    if len(_WORD_PATTERN.findall(question.lower())) < MIN_SELF_CONTAINED_WORDS:
+        return False
+    return not refers_to_history(question)
+
+
+class QuestionRewriter:
+    """
+    Replacement for create_history_aware_retriever that removes the rephrasing
+    round trip from most turns. The LLM is only called for follow-ups with
+    history, and rewrites are memoized by (recent history hash, question).
+    """
+
+    def __init__(self,
+                 max_entries: Optional[int] = None,
+                 history_messages: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("REWRITE_CACHE_SIZE", "1024"))
+        self.history_messages = history_messages or int(os.getenv("REWRITE_HISTORY_MESSAGES", "6"))
+
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "questions": 0,
+            "skipped_first_turn": 0,
+            "skipped_self_contained": 0,
+            "cache_hits": 0,
+            "llm_rewrites": 0
+        }
+
+    def _memo_key(self, question: str, history: List[BaseMessage]) -> str:
+        recent = [(message.type, str(message.content)) for message in history[-self.history_messages:]]
+        payload = json.dumps([recent, " ".join(question.split())], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, question: str, history: List[BaseMessage]) -> Tuple[Optional[str], Optional[str]]:
+        """Return (standalone question, None) when no LLM call is needed, else (None, memo key)"""
+        with self._lock:
+            self.metrics["questions"] += 1
+            if not history:
+                self.metrics["skipped_first_turn"] += 1
+                return question, None
+            if is_self_contained(question):
+                self.metrics["skipped_self_contained"] += 1
+                return question, None
+
+            key = self._memo_key(question, history)
+            rewritten = self._memo.get(key)
+            if rewritten is not None:
+                self._memo.move_to_end(key)
+                self.metrics["cache_hits"] += 1
+                return rewritten, None
+
+            self.metrics["llm_rewrites"] += 1
+            return None, key
+
+    def _remember(self, key: str, rewritten: str) -> str:
+        with self._lock:
+            self._memo[key] = rewritten
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return rewritten
+
+    def as_retriever(self,
+                     llm: Runnable,
+                     retriever: RetrieverLike,
+                     prompt: BasePromptTemplate) -> Runnable:
+        """
+        Retriever chain taking {"input", "chat_history"} like create_history_aware_retriever,
+        rephrasing with prompt | llm only when the question depends on the history
+        """
+        rewrite_chain = prompt | llm | StrOutputParser()
+
+        def rewrite(inputs: Dict[str, Any], config: RunnableConfig) -> str:
+            question, key = self._lookup(inputs["input"], inputs.get("chat_history") or [])
+            if question is None:
+                question = self._remember(key, rewrite_chain.invoke(inputs, config))
+            return question
+
+        async def arewrite(inputs: Dict[str, Any], config: RunnableConfig) -> str:
+            question, key = self._lookup(inputs["input"], inputs.get("chat_history") or [])
+            if question is None:
+                question = self._remember(key, await rewrite_chain.ainvoke(inputs, config))
+            return question
+
+        return (
+            RunnableLambda(rewrite, afunc=arewrite, name="rewrite_question") | retriever
+        ).with_config(run_name="chat_retriever_chain")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            questions = self.metrics["questions"]
+            skipped = self.metrics["skipped_first_turn"] + self.metrics["skipped_self_contained"]
+            with_lookup = self.metrics["cache_hits"] + self.metrics["llm_rewrites"]
+            return {
+                **self.metrics,
+                "memo_entries": len(self._memo),
+                "max_entries": self.max_entries,
+                "skip_rate": skipped / questions if questions else 0.0,
+                "hit_rate": self.metrics["cache_hits"] / with_lookup if with_lookup else 0.0,
+                "llm_calls_avoided_rate": 1 - self.metrics["llm_rewrites"] / questions if questions else 0.0
+            }
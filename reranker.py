@@ -0,0 +1,215 @@
+"""
+Cross-Encoder Reranking
+Over-fetch candidates, rescore (query, chunk) pairs with a small CPU cross-encoder
+in one batched pass, and keep the best k
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Callable
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables.config import run_in_executor
+
+from document_processor import make_chunk_id
+
+# Cross-encoder imports
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CROSS_ENCODER_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_RERANKERS = ("none", "cross-encoder")
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """
+    Scores (query, chunk) pairs with a cross-encoder. Scores are cached per
+    (query, chunk ID) so repeated questions only score new chunks. When the
+    estimated time for the pairs already in flight plus this request exceeds
+    budget_ms, reranking is skipped and the retriever's own order is kept.
+    """
+
+    def __init__(self,
+                 model_name: Optional[str] = None,
+                 fetch_k: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 cache_size: Optional[int] = None,
+                 budget_ms: Optional[float] = None):
+        if not CROSS_ENCODER_AVAILABLE:
+            raise RuntimeError("sentence-transformers is required for reranking. Install with: pip install sentence-transformers")
+
+        self.model_name = model_name or os.getenv("RERANK_MODEL", DEFAULT_RERANK_MODEL)
+        self.fetch_k = fetch_k or int(os.getenv("RERANK_FETCH_K", "20"))
+        self.batch_size = batch_size or int(os.getenv("RERANK_BATCH_SIZE", "32"))
+        self.cache_size = cache_size or int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+        self.budget_ms = budget_ms if budget_ms is not None else float(os.getenv("RERANK_BUDGET_MS", "200"))
+
+        try:
+            self.model = CrossEncoder(self.model_name, device="cpu")
+            logger.info(f"✅ Loaded cross-encoder '{self.model_name}'")
+        except Exception as e:
+            logger.error(f"❌ Failed to load cross-encoder: {str(e)}")
+            raise RuntimeError(f"Cross-encoder initialization failed: {str(e)}")
+
+        self._scores: "OrderedDict[tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight_pairs = 0
+        self._seconds_per_pair = 0.0  # Moving average, 0 until the first batch is timed
+
+        self.metrics = {
+            "reranks": 0,
+            "skipped_over_budget": 0,
+            "pairs_scored": 0,
+            "cache_hits": 0,
+            "avg_rerank_ms": 0.0
+        }
+
+    @staticmethod
+    def _chunk_key(doc: Document) -> str:
+        return doc.metadata.get("chunk_id") or make_chunk_id(doc)
+
+    def _cached_scores(self, query_key: str, documents: List[Document]) -> Dict[int, float]:
+        """Scores already known for these chunks, by position (caller holds the lock)"""
+        known = {}
+        for position, doc in enumerate(documents):
+            key = (query_key, self._chunk_key(doc))
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+                known[position] = score
+        return known
+
+    def rerank(self, query: str, documents: List[Document], k: int) -> List[Document]:
+        """Best k documents by cross-encoder score, or the first k if over budget"""
+        if len(documents) <= 1:
+            return documents[:k]
+
+        start_time = time.perf_counter()
+        query_key = hashlib.sha256(" ".join(query.split()).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            scores = self._cached_scores(query_key, documents)
+            missing = [position for position in range(len(documents)) if position not in scores]
+            self.metrics["cache_hits"] += len(scores)
+
+            estimated_ms = (self._in_flight_pairs + len(missing)) * self._seconds_per_pair * 1000
+            if missing and self.budget_ms > 0 and estimated_ms > self.budget_ms:
+                self.metrics["skipped_over_budget"] += 1
+                return documents[:k]
+            self._in_flight_pairs += len(missing)
+
+        try:
+            if missing:
+                score_start = time.perf_counter()
+                predicted = self.model.predict(
+                    [(query, documents[position].page_content) for position in missing],
+                    batch_size=self.batch_size,
+                    show_progress_bar=False
+                )
+                per_pair = (time.perf_counter() - score_start) / len(missing)
+                scores.update(zip(missing, (float(score) for score in predicted)))
+        finally:
+            with self._lock:
+                self._in_flight_pairs -= len(missing)
+
+        with self._lock:
+            if missing:
+                self._seconds_per_pair = (
+                    per_pair if not self._seconds_per_pair else 0.8 * self._seconds_per_pair + 0.2 * per_pair
+                )
+                for position in missing:
+                    self._scores[(query_key, self._chunk_key(documents[position]))] = scores[position]
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+                self.metrics["pairs_scored"] += len(missing)
+
+            self.metrics["reranks"] += 1
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            self.metrics["avg_rerank_ms"] += (elapsed_ms - self.metrics["avg_rerank_ms"]) / self.metrics["reranks"]
+
+        ranked = sorted(range(len(documents)), key=lambda position: scores[position], reverse=True)
+        return [documents[position] for position in ranked[:k]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "fetch_k": self.fetch_k,
+                "budget_ms": self.budget_ms,
+                "cached_scores": len(self._scores),
+                "ms_per_pair": self._seconds_per_pair * 1000,
+                **self.metrics
+            }
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Retriever that over-fetches from base_retriever (configured to return
+    fetch_k chunks) and keeps the k best according to the reranker
+    """
+
+    base_retriever: BaseRetriever
+    reranker: Any
+    k: int = 4
+
+    def search(self, query: str, k: Optional[int] = None) -> List[Document]:
+        return self.reranker.rerank(query, self.base_retriever.invoke(query), k or self.k)
+
+    async def asearch(self, query: str, k: Optional[int] = None) -> List[Document]:
+        """Async search; scoring runs off the event loop"""
+        candidates = await self.base_retriever.ainvoke(query)
+        return await run_in_executor(None, self.reranker.rerank, query, candidates, k or self.k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search(query)
+
+    async def _aget_relevant_documents(self,
+                                       query: str,
+                                       *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await self.asearch(query)
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+_reranker_loaded = False
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Process-wide reranker selected by RERANKER ("none" or "cross-encoder"), loaded
+    once and shared by every retriever; None when disabled or unavailable
+    """
+    global _reranker, _reranker_loaded
+    with _reranker_lock:
+        if not _reranker_loaded:
+            mode = os.getenv("RERANKER", "none").lower()
+            if mode not in SUPPORTED_RERANKERS:
+                raise ValueError(f"Unknown reranker '{mode}'. Expected one of: {', '.join(SUPPORTED_RERANKERS)}")
+            _reranker_loaded = True
+            if mode == "cross-encoder":
+                try:
+                    _reranker = CrossEncoderReranker()
+                except RuntimeError as e:
+                    logger.warning(f"⚠️ Reranking disabled: {str(e)}")
+        return _reranker
+
+
+def with_reranking(build_retriever: Callable[[int], BaseRetriever], k: int = 4) -> BaseRetriever:
+    """Retriever returning k chunks, built over-fetching and wrapped for reranking when a reranker is enabled"""
+    reranker = get_reranker()
+    if reranker is None:
+        return build_retriever(k)
+    return RerankingRetriever(base_retriever=build_retriever(max(reranker.fetch_k, k)), reranker=reranker, k=k)
@@ -0,0 +1,495 @@
+"""
+Chat Session Store
+Bounded chat history storage with LRU eviction, idle TTL and per-session message caps,
+in process memory or in SQLite shared by every worker process
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def _message_text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _message_bytes(message: BaseMessage) -> int:
+    """Approximate memory held by one message's content"""
+    return sys.getsizeof(_message_text(message))
+
+
+def _message_tokens(message: BaseMessage) -> int:
+    return count_tokens(_message_text(message))
+
+
+class SessionChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history of one session that can also hold a rolling summary of its
+    older turns. Messages carry increasing sequence numbers so the summary can
+    record how far it reaches.
+    """
+
+    @abstractmethod
+    def message_records(self) -> List[Tuple[int, BaseMessage]]:
+        """(sequence number, message) pairs, oldest first"""
+
+    @abstractmethod
+    def get_summary(self) -> Tuple[str, int]:
+        """Rolling summary and the sequence number of the last message it covers"""
+
+    @abstractmethod
+    def set_summary(self, summary: str, covered_seq: int) -> None:
+        """Replace the rolling summary"""
+
+    @abstractmethod
+    def token_counts(self) -> Dict[str, int]:
+        """Message count plus tokens held in messages and in the summary"""
+
+
+class BoundedChatMessageHistory(SessionChatMessageHistory):
+    """
+    In-memory chat history that keeps at most max_messages, dropping the
+    oldest whole exchanges first so history always starts with a user turn
+    """
+
+    def __init__(self, max_messages: int = 50):
+        self.max_messages = max_messages
+        self._messages: List[BaseMessage] = []
+        self._seqs: List[int] = []
+        self._next_seq = 1
+        self.nbytes = 0
+        self.ntokens = 0
+        self._summary = ""
+        self._summary_seq = 0
+        self._summary_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self._lock:
+            return list(self._messages)
+
+    def message_records(self) -> List[Tuple[int, BaseMessage]]:
+        with self._lock:
+            return list(zip(self._seqs, self._messages))
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with self._lock:
+            self._messages.extend(messages)
+            self._seqs.extend(range(self._next_seq, self._next_seq + len(messages)))
+            self._next_seq += len(messages)
+            self.nbytes += sum(_message_bytes(message) for message in messages)
+            self.ntokens += sum(_message_tokens(message) for message in messages)
+
+            excess = len(self._messages) - self.max_messages
+            if excess > 0:
+                excess += excess % 2
+                dropped, self._messages = self._messages[:excess], self._messages[excess:]
+                self._seqs = self._seqs[excess:]
+                self.nbytes -= sum(_message_bytes(message) for message in dropped)
+                self.ntokens -= sum(_message_tokens(message) for message in dropped)
+
+    def get_summary(self) -> Tuple[str, int]:
+        with self._lock:
+            return self._summary, self._summary_seq
+
+    def set_summary(self, summary: str, covered_seq: int) -> None:
+        with self._lock:
+            self._summary, self._summary_seq = summary, covered_seq
+            self._summary_tokens = count_tokens(summary)
+
+    def token_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "messages": len(self._messages),
+                "history_tokens": self.ntokens,
+                "summary_tokens": self._summary_tokens
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._messages, self._seqs = [], []
+            self.nbytes = 0
+            self.ntokens = 0
+            self._summary, self._summary_seq, self._summary_tokens = "", 0, 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+
+class BaseSessionStore(ABC):
+    """
+    Session ID -> chat history map bounded by session count (LRU) and idle TTL
+    """
+
+    def __init__(self,
+                 max_sessions: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 max_messages: Optional[int] = None):
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+        self.max_messages = max_messages or int(os.getenv("SESSION_MAX_MESSAGES", "50"))
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    @abstractmethod
+    def get(self, session_id: str) -> SessionChatMessageHistory:
+        """Return a session's history, creating it if needed (plugs into RunnableWithMessageHistory)"""
+
+    @abstractmethod
+    def peek(self, session_id: str) -> Optional[SessionChatMessageHistory]:
+        """Return a live session's history without creating it or updating its LRU position and last access"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a session; returns False if it did not exist"""
+
+    @abstractmethod
+    def session_ids(self) -> List[str]:
+        """IDs of live sessions, most recently used last"""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Session, message, token and memory counts"""
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.session_ids()
+
+    def __len__(self) -> int:
+        return len(self.session_ids())
+
+    def _limits(self) -> Dict[str, Any]:
+        return {
+            "max_sessions": self.max_sessions,
+            "max_messages": self.max_messages,
+            "ttl_seconds": self.ttl_seconds,
+            "lru_evictions": self.lru_evictions,
+            "ttl_evictions": self.ttl_evictions
+        }
+
+
+class MemorySessionStore(BaseSessionStore):
+    """
+    Session store held in this process (single-worker deployments)
+    """
+
+    backend = "memory"
+
+    def __init__(self,
+                 max_sessions: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 max_messages: Optional[int] = None):
+        super().__init__(max_sessions, ttl_seconds, max_messages)
+
+        # Ordered least recently used first: (history, last_access)
+        self._sessions: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        """Drop idle sessions, then least recently used ones over the cap (caller holds the lock)"""
+        while self._sessions:
+            session_id, (_, last_access) = next(iter(self._sessions.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.ttl_evictions += 1
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.lru_evictions += 1
+
+    def get(self, session_id: str) -> SessionChatMessageHistory:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or now - entry[1] > self.ttl_seconds:
+                entry = [BoundedChatMessageHistory(self.max_messages), now]
+                self._sessions[session_id] = entry
+            entry[1] = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return entry[0]
+
+    def peek(self, session_id: str) -> Optional[SessionChatMessageHistory]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                return None
+            return entry[0]
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            self._evict(time.time())
+            return list(self._sessions.keys())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(time.time())
+            histories = [history for history, _ in self._sessions.values()]
+            return {
+                "backend": self.backend,
+                "sessions": len(histories),
+                "messages": sum(len(history) for history in histories),
+                "history_tokens": sum(history.ntokens for history in histories),
+                "summary_tokens": sum(history.token_counts()["summary_tokens"] for history in histories),
+                "memory_bytes": sum(history.nbytes for history in histories),
+                **self._limits()
+            }
+
+
+class SQLiteChatMessageHistory(SessionChatMessageHistory):
+    """
+    Chat history of one session, read from and written to a SQLiteSessionStore
+    """
+
+    def __init__(self, store: "SQLiteSessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.store._load_messages(self.session_id)
+
+    def message_records(self) -> List[Tuple[int, BaseMessage]]:
+        return self.store._load_records(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.store._append_messages(self.session_id, messages)
+
+    def get_summary(self) -> Tuple[str, int]:
+        return self.store._get_summary(self.session_id)
+
+    def set_summary(self, summary: str, covered_seq: int) -> None:
+        self.store._set_summary(self.session_id, summary, covered_seq)
+
+    def token_counts(self) -> Dict[str, int]:
+        return self.store._token_counts(self.session_id)
+
+    def clear(self) -> None:
+        self.store._clear_messages(self.session_id)
+
+
+class SQLiteSessionStore(BaseSessionStore):
+    """
+    Session store in a SQLite database, so every worker process on a host sees
+    the same sessions. Limits are enforced on access by whichever worker is active.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_sessions: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 max_messages: Optional[int] = None):
+        super().__init__(max_sessions, ttl_seconds, max_messages)
+        self.path = path or os.getenv("SESSION_DB_PATH", "sessions.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+            "message TEXT NOT NULL, nbytes INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)"
+        )
+
+        # Token counts and rolling summaries, added to databases created before them
+        self._ensure_column("messages", "ntokens", "INTEGER NOT NULL DEFAULT 0")
+        self._ensure_column("sessions", "summary", "TEXT NOT NULL DEFAULT ''")
+        self._ensure_column("sessions", "summary_seq", "INTEGER NOT NULL DEFAULT 0")
+        self._ensure_column("sessions", "summary_tokens", "INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        logger.info(f"✅ Session store opened at {self.path}")
+
+    def _ensure_column(self, table: str, column: str, definition: str) -> None:
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _delete_sessions(self, session_ids: List[str]) -> None:
+        self._conn.executemany("DELETE FROM messages WHERE session_id = ?", [(sid,) for sid in session_ids])
+        self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", [(sid,) for sid in session_ids])
+
+    def _evict(self, now: float) -> None:
+        """Drop idle sessions, then least recently used ones over the cap (caller holds the lock)"""
+        expired = [row[0] for row in self._conn.execute(
+            "SELECT session_id FROM sessions WHERE last_access < ?", (now - self.ttl_seconds,)
+        )]
+        if expired:
+            self._delete_sessions(expired)
+            self.ttl_evictions += len(expired)
+
+        count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        if count > self.max_sessions:
+            oldest = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM sessions ORDER BY last_access LIMIT ?", (count - self.max_sessions,)
+            )]
+            self._delete_sessions(oldest)
+            self.lru_evictions += len(oldest)
+
+    def _touch(self, session_id: str, now: float) -> None:
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, last_access) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+            (session_id, now)
+        )
+
+    def get(self, session_id: str) -> SessionChatMessageHistory:
+        now = time.time()
+        with self._lock, self._conn:
+            self._evict(now)
+            self._touch(session_id, now)
+        return SQLiteChatMessageHistory(self, session_id)
+
+    def peek(self, session_id: str) -> Optional[SessionChatMessageHistory]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND last_access >= ?",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return SQLiteChatMessageHistory(self, session_id) if row else None
+
+    def _load_messages(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT message FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in rows])
+
+    def _load_records(self, session_id: str) -> List[Tuple[int, BaseMessage]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, message FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        messages = messages_from_dict([json.loads(row[1]) for row in rows])
+        return [(row[0], message) for row, message in zip(rows, messages)]
+
+    def _get_summary(self, session_id: str) -> Tuple[str, int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, summary_seq FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def _set_summary(self, session_id: str, summary: str, covered_seq: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE sessions SET summary = ?, summary_seq = ?, summary_tokens = ? WHERE session_id = ?",
+                (summary, covered_seq, count_tokens(summary), session_id)
+            )
+
+    def _token_counts(self, session_id: str) -> Dict[str, int]:
+        with self._lock:
+            messages, tokens = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(ntokens), 0) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            row = self._conn.execute(
+                "SELECT summary_tokens FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return {"messages": messages, "history_tokens": tokens, "summary_tokens": row[0] if row else 0}
+
+    def _append_messages(self, session_id: str, messages: Sequence[BaseMessage]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._touch(session_id, now)
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, message, nbytes, ntokens) VALUES (?, ?, ?, ?)",
+                [
+                    (session_id, json.dumps(message_to_dict(message)), _message_bytes(message), _message_tokens(message))
+                    for message in messages
+                ]
+            )
+
+            # Trim whole exchanges from the front, as BoundedChatMessageHistory does
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            excess = count - self.max_messages
+            if excess > 0:
+                excess += excess % 2
+                self._conn.execute(
+                    "DELETE FROM messages WHERE id IN "
+                    "(SELECT id FROM messages WHERE session_id = ? ORDER BY id LIMIT ?)",
+                    (session_id, excess)
+                )
+
+    def _clear_messages(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute(
+                "UPDATE sessions SET summary = '', summary_seq = 0, summary_tokens = 0 WHERE session_id = ?",
+                (session_id,)
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone() is not None
+            self._delete_sessions([session_id])
+        return exists
+
+    def session_ids(self) -> List[str]:
+        with self._lock, self._conn:
+            self._evict(time.time())
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions ORDER BY last_access")]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock, self._conn:
+            self._evict(time.time())
+            sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            messages, nbytes, ntokens = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0), COALESCE(SUM(ntokens), 0) FROM messages"
+            ).fetchone()
+            summary_tokens = self._conn.execute(
+                "SELECT COALESCE(SUM(summary_tokens), 0) FROM sessions"
+            ).fetchone()[0]
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "sessions": sessions,
+            "messages": messages,
+            "history_tokens": ntokens,
+            "summary_tokens": summary_tokens,
+            "memory_bytes": nbytes,
+            **self._limits()
+        }
+
+
+def create_session_store(backend: Optional[str] = None) -> BaseSessionStore:
+    """Create the session store selected by SESSION_BACKEND ("memory" or "sqlite")"""
+    backend = (backend or os.getenv("SESSION_BACKEND", "memory")).lower()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown session backend '{backend}'. Expected one of: memory, sqlite")
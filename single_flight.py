@@ -0,0 +1,149 @@
+"""
+Single-Flight Coalescing
+Concurrent identical requests share one execution: the first caller runs it,
+later callers with the same key wait for (or replay) its result
+"""
+
+import asyncio
+from typing import Optional, Dict, Any, Callable, Awaitable, AsyncIterator, Hashable, List, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a question used in coalescing keys"""
+    return " ".join(text.split()).lower()
+
+
+class _Broadcast:
+    """Items of one streamed execution, replayed to every subscriber from the start"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional["asyncio.Task[None]"] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, item: Any) -> None:
+        self.items.append(item)
+        self._notify()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        self.done, self.error = True, error
+        self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            if position < len(self.items):
+                yield self.items[position]
+                position += 1
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+class SingleFlight:
+    """
+    In-flight request coalescing for one event loop. Calls are keyed by the
+    caller; a call made while another with the same key is running shares that
+    execution instead of starting its own. Shared work runs in its own task, so
+    a disconnecting caller does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.metrics = {
+            "executions": 0,
+            "coalesced": 0,
+            "max_waiters": 0
+        }
+
+    def _join(self, key: Hashable, leader: bool) -> None:
+        if leader:
+            self.metrics["executions"] += 1
+            self._waiters[key] = 1
+        else:
+            self.metrics["coalesced"] += 1
+            self._waiters[key] = self._waiters.get(key, 1) + 1
+            self.metrics["max_waiters"] = max(self.metrics["max_waiters"], self._waiters[key])
+
+    def _finish(self, flights: Dict[Hashable, Any], key: Hashable) -> None:
+        flights.pop(key, None)
+        self._waiters.pop(key, None)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared): fn's result, and whether it came from another caller's execution"""
+        future = self._calls.get(key)
+        shared = future is not None
+        if not shared:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+
+            def done(completed: "asyncio.Future[Any]") -> None:
+                if self._calls.get(key) is completed:
+                    self._finish(self._calls, key)
+                if not completed.cancelled():
+                    completed.exception()  # Retrieved here so a failure nobody awaits is not reported as lost
+
+            future.add_done_callback(done)
+        self._join(key, leader=not shared)
+        return await asyncio.shield(future), shared
+
+    def stream(self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]) -> Tuple[AsyncIterator[Any], bool]:
+        """
+        Return (items, shared): an iterator over the items of factory's stream,
+        replayed from the first item for callers that join while it is running
+        """
+        broadcast = self._streams.get(key)
+        shared = broadcast is not None
+        if not shared:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+
+            async def pump() -> None:
+                error = None
+                try:
+                    async for item in factory():
+                        broadcast.publish(item)
+                except Exception as e:
+                    error = e
+                finally:
+                    if self._streams.get(key) is broadcast:
+                        self._finish(self._streams, key)
+                    broadcast.close(error)
+
+            broadcast.task = asyncio.ensure_future(pump())
+        self._join(key, leader=not shared)
+        return broadcast.subscribe(), shared
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.metrics["executions"] + self.metrics["coalesced"]
+        return {
+            **self.metrics,
+            "in_flight": len(self._calls) + len(self._streams),
+            "coalesced_rate": self.metrics["coalesced"] / requests if requests else 0.0
+        }
+
+    def coalesce_retriever(self, retriever: Runnable, scope: Hashable = None) -> Runnable:
+        """Retriever stage whose concurrent identical async searches (same query and scope) run once"""
+
+        async def asearch(query: str, config: RunnableConfig) -> List[Document]:
+            documents, _ = await self.do((normalize_query(query), scope), lambda: retriever.ainvoke(query, config))
+            return documents
+
+        return RunnableLambda(
+            lambda query, config: retriever.invoke(query, config), afunc=asearch, name="coalesced_search"
+        )
@@ -222,55 +222,50 @@ class EnterpriseRAGChatbot {
                 formData.append('files', file);
             });
 
-            // Simulate realistic progress with better timing
-            let currentProgress = 0;
-            const progressInterval = setInterval(() => {
-                if (currentProgress < 70) {
-                    currentProgress += Math.random() * 10 + 5;
-                    this.updateUploadProgress(Math.min(currentProgress, 70), 'Processing documents...');
-                }
-            }, 300);
-
             // Start upload
-            this.updateUploadProgress(10, 'Uploading files...');
+            this.updateUploadProgress(5, 'Uploading files...');
             
             const response = await fetch('/api/upload', {
                 method: 'POST',
                 body: formData
             });
 
-            clearInterval(progressInterval);
-
             if (!response.ok) {
                 const error = await response.json();
                 throw new Error(error.detail || 'Upload failed');
             }
 
-            const result = await response.json();
-            
-            // Complete progress
-            this.updateUploadProgress(90, 'Finalizing...');
+            const queued = await response.json();
+            this.updateUploadProgress(10, 'Queued for processing...');
+
+            // Follow the background ingestion job until it finishes
+            const job = await this.pollIngestionJob(queued.job_id);
+            if (job.stage === 'failed') {
+                throw new Error(job.error || 'Document processing failed');
+            }
+
+            const result = job.result;
+            this.updateUploadProgress(100, 'Upload complete!');
             
             setTimeout(() => {
-                this.updateUploadProgress(100, 'Upload complete!');
+                this.hideUploadModal();
+                const changes = result.diff
+                    ? ` (${result.diff.added} added, ${result.diff.unchanged} unchanged, ${result.diff.deleted} removed)`
+                    : '';
+                this.showToast('success', 'Upload Successful', `Processed ${result.documents_processed} document chunks in ${result.processing_time.toFixed(2)}s${changes}`);
+                
+                // Clear files and update UI
+                this.currentFiles = [];
+                this.updateFileList();
+                this.updateUploadButton();
+                this.documentsUploaded = true;
+                this.updateChatInterface();
                 
+                // Force update system status after upload
                 setTimeout(() => {
-                    this.hideUploadModal();
-                    this.showToast('success', 'Upload Successful', `Processed ${result.documents_processed} document chunks in ${result.processing_time.toFixed(2)}s`);
-                    
-                    // Clear files and update UI
-                    this.currentFiles = [];
-                    this.updateFileList();
-                    this.updateUploadButton();
-                    this.documentsUploaded = true;
-                    this.updateChatInterface();
-                    
-                    // Force update system status after upload
-                    setTimeout(() => {
-                        this.checkSystemStatus();
-                    }, 500);
-                }, 800);
-            }, 300);
+                    this.checkSystemStatus();
+                }, 500);
+            }, 800);
 
         } catch (error) {
             console.error('Upload error:', error);
@@ -281,6 +276,43 @@ class EnterpriseRAGChatbot {
         }
     }
 
+    async pollIngestionJob(jobId, interval = 1000) {
+        while (true) {
+            const response = await fetch(`/api/jobs/${jobId}`);
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.detail || 'Failed to get job status');
+            }
+
+            const job = await response.json();
+            this.updateJobProgress(job);
+
+            if (job.stage === 'completed' || job.stage === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    }
+
+    updateJobProgress(job) {
+        // Parsing covers 10-20%, embedding and upserting cover 20-95%, then summarizing
+        if (job.stage === 'queued') {
+            this.updateUploadProgress(10, 'Queued for processing...');
+        } else if (job.stage === 'parsing') {
+            this.updateUploadProgress(15, `Parsing ${job.files.length} file${job.files.length > 1 ? 's' : ''}...`);
+        } else if (job.stage === 'embedding' || job.stage === 'upserting') {
+            const total = job.chunks_total || 1;
+            const done = (job.chunks_embedded + job.chunks_upserted) / (2 * total);
+            const eta = job.eta_seconds !== null ? ` - ETA ${Math.ceil(job.eta_seconds)}s` : '';
+            const label = job.stage === 'embedding' ? 'Embedding' : 'Indexing';
+            this.updateUploadProgress(20 + done * 75, `${label} ${job.chunks_upserted}/${job.chunks_total} chunks${eta}`);
+        } else if (job.stage === 'summarizing') {
+            this.updateUploadProgress(95, 'Summarizing documents...');
+        } else if (job.stage === 'completed') {
+            this.updateUploadProgress(95, 'Finalizing...');
+        }
+    }
+
     updateUploadProgress(percentage, status) {
         // Ensure elements exist before updating
         if (this.uploadProgress && this.progressPercentage && this.progressStatus) {
@@ -366,7 +398,7 @@ class EnterpriseRAGChatbot {
         this.showTypingIndicator();
 
         try {
-            const response = await fetch('/api/chat', {
+            const response = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -384,13 +416,51 @@ class EnterpriseRAGChatbot {
                 throw new Error(error.detail || 'Failed to get response');
             }
 
-            const result = await response.json();
-            
-            // Hide typing indicator and add response
+            // Render tokens as they arrive; sources come first and are shown once the answer completes
+            let answer = '';
+            let sources = [];
+            let messageDiv = null;
+            let result = null;
+
+            await this.readEventStream(response, (event, data) => {
+                if (event === 'sources') {
+                    sources = data.sources;
+                } else if (event === 'token') {
+                    if (!messageDiv) {
+                        this.hideTypingIndicator();
+                        messageDiv = this.addMessage('', 'assistant');
+                    }
+                    answer += data.token;
+                    messageDiv.querySelector('.message-text').innerHTML = this.formatMessage(answer);
+                    this.scrollToBottom();
+                } else if (event === 'done') {
+                    result = data;
+                } else if (event === 'error') {
+                    throw new Error(data.detail || 'Failed to get response');
+                }
+            });
+
+            if (!result) {
+                throw new Error('Response stream ended unexpectedly');
+            }
+
+            // Replace the streamed message with the final one, including sources and timing
             this.hideTypingIndicator();
-            this.addMessage(result.response, 'assistant', result.sources, result.processing_time);
+            const finalDiv = this.createMessageElement(answer, 'assistant', sources, result.processing_time);
+            if (messageDiv) {
+                messageDiv.replaceWith(finalDiv);
+            } else {
+                this.chatMessages.appendChild(finalDiv);
+            }
+            this.scrollToBottom();
             
-            this.showToast('success', 'Response Generated', `Processed in ${result.processing_time.toFixed(2)}s`);
+            const firstToken = result.timings.time_to_first_token;
+            this.showToast(
+                'success',
+                'Response Generated',
+                `Processed in ${result.processing_time.toFixed(2)}s` +
+                (firstToken !== null ? ` (first token ${firstToken.toFixed(2)}s)` : '')
+            );
             
             // Update query counter immediately
             this.updateQueryCounter();
@@ -409,7 +479,53 @@ class EnterpriseRAGChatbot {
         }
     }
 
+    async readEventStream(response, onEvent) {
+        // Parse a Server-Sent Events body from fetch (EventSource only supports GET)
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                const dataLines = [];
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event:')) {
+                        event = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        dataLines.push(line.slice(5).trim());
+                    }
+                }
+                if (dataLines.length) {
+                    onEvent(event, JSON.parse(dataLines.join('\n')));
+                }
+            }
+        }
+    }
+
     addMessage(content, type, sources = null, processingTime = null) {
+        const messageDiv = this.createMessageElement(content, type, sources, processingTime);
+
+        // Remove welcome message if it exists
+        const welcomeMessage = this.chatMessages.querySelector('.welcome-message');
+        if (welcomeMessage) {
+            welcomeMessage.remove();
+        }
+
+        this.chatMessages.appendChild(messageDiv);
+        this.scrollToBottom();
+        return messageDiv;
+    }
+
+    createMessageElement(content, type, sources = null, processingTime = null) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${type}`;
         
@@ -450,14 +566,7 @@ class EnterpriseRAGChatbot {
             </div>
         `;
 
-        // Remove welcome message if it exists
-        const welcomeMessage = this.chatMessages.querySelector('.welcome-message');
-        if (welcomeMessage) {
-            welcomeMessage.remove();
-        }
-
-        this.chatMessages.appendChild(messageDiv);
-        this.scrollToBottom();
+        return messageDiv;
     }
 
     formatMessage(content) {
@@ -13,17 +13,16 @@ from typing import List, Dict, Any, Optional
 import base64
 
 # Import existing components
-try:
-    from pinecone_vector_db import PineconeVectorDB
-except ImportError as e:
-    st.error(f"❌ Failed to import PineconeVectorDB: {e}")
-    st.stop()
+from vector_db_factory import create_vector_db
 
+from embedding_cache import CachedEmbeddings
+from llm_pool import LLMPool
+from query_rewriter import QuestionRewriter
+from context_packing import ContextPacker
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
@@ -300,22 +299,21 @@ def initialize_components():
             st.error("OpenAI API key not found in environment variables")
             return None, None, None
         
-        # Initialize embeddings
-        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        # Initialize embeddings (wrapped in a persistent embedding cache)
+        embedding_model = "all-MiniLM-L6-v2"
+        embeddings = CachedEmbeddings(
+            HuggingFaceEmbeddings(model_name=embedding_model),
+            model_name=embedding_model
+        )
         
-        # Initialize vector database
-        vector_db = PineconeVectorDB(
+        # Initialize vector database (backend selected by VECTOR_BACKEND)
+        vector_db = create_vector_db(
             index_name=os.getenv("PINECONE_INDEX_NAME", "enterprise-rag-chatbot"),
             embeddings=embeddings
         )
         
-        # Initialize LLM
-        llm = ChatOpenAI(
-            api_key=openai_api_key,
-            model_name="gpt-4o-mini",
-            temperature=0.1,
-            max_tokens=1000
-        )
+        # Initialize LLM (shared by all sessions; settings are chosen per call, never mutated)
+        llm = LLMPool(model_name="gpt-4o-mini", api_key=openai_api_key).as_runnable()
         
         logger.info("✅ All components initialized successfully")
         return embeddings, vector_db, llm
@@ -385,8 +383,8 @@ def create_rag_chain(llm, vector_db):
             ("human", "{input}"),
         ])
         
-        # Create history-aware retriever
-        history_aware_retriever = create_history_aware_retriever(
+        # Create history-aware retriever (rephrases only follow-ups that need it)
+        history_aware_retriever = QuestionRewriter().as_retriever(
             llm, retriever, contextualize_q_prompt
         )
         
@@ -412,8 +410,10 @@ def create_rag_chain(llm, vector_db):
         # Create document chain
         question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
         
-        # Create RAG chain
-        rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+        # Create RAG chain (retrieved chunks are merged and trimmed to the context token budget)
+        rag_chain = create_retrieval_chain(
+            history_aware_retriever | ContextPacker().as_runnable(), question_answer_chain
+        )
         
         # Add message history
         conversational_rag_chain = RunnableWithMessageHistory(
@@ -460,7 +460,8 @@ def process_documents(uploaded_files, vector_db):
                     chunk_size=1000,
                     chunk_overlap=200,
                     length_function=len,
-                    separators=["\n\n", "\n", " ", ""]
+                    separators=["\n\n", "\n", " ", ""],
+                    add_start_index=True
                 )
                 
                 docs = text_splitter.split_documents(pages)
@@ -683,14 +684,14 @@ def main():
                 try:
                     start_time = time.time()
                     
-                    # Update LLM settings
-                    st.session_state.llm.temperature = temperature
-                    st.session_state.llm.max_tokens = max_tokens
-                    
-                    # Get response using enhanced prompt
+                    # Get response using enhanced prompt (LLM settings are per-call run config)
                     response = st.session_state.rag_chain.invoke(
                         {"input": enhanced_prompt},
-                        config={"configurable": {"session_id": "default"}}
+                        config={"configurable": {
+                            "session_id": "default",
+                            "llm_temperature": temperature,
+                            "llm_max_tokens": max_tokens
+                        }}
                     )
                     
                     processing_time = time.time() - start_time
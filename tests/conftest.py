@@ -0,0 +1,130 @@
+"""
+Shared fixtures: deterministic embeddings and an in-memory Pinecone stand-in
+"""
+
+import os
+import sys
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashEmbeddings(Embeddings):
+    """Bag-of-words vectors hashed into a fixed dimension"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimension] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class FakeIndex:
+    def __init__(self):
+        self.namespaces = {}
+
+    def upsert(self, vectors, namespace=""):
+        store = self.namespaces.setdefault(namespace, {})
+        for record in vectors:
+            store[record["id"]] = (np.asarray(record["values"], dtype=np.float32), record["metadata"])
+
+    def list(self, namespace=""):
+        ids = list(self.namespaces.get(namespace, {}))
+        for start in range(0, len(ids), 100):
+            yield ids[start:start + 100]
+
+    def delete(self, ids=None, delete_all=False, namespace=""):
+        store = self.namespaces.get(namespace, {})
+        if delete_all:
+            self.namespaces.pop(namespace, None)
+            return
+        for vector_id in ids or []:
+            store.pop(vector_id, None)
+
+    def fetch(self, ids, namespace=""):
+        store = self.namespaces.get(namespace, {})
+        return SimpleNamespace(vectors={
+            vector_id: SimpleNamespace(id=vector_id, metadata=dict(store[vector_id][1]))
+            for vector_id in ids if vector_id in store
+        })
+
+    def query(self, vector, top_k=10, namespace="", include_metadata=False, **kwargs):
+        query = np.asarray(vector, dtype=np.float32)
+        scored = []
+        for vector_id, (values, metadata) in self.namespaces.get(namespace, {}).items():
+            norm = float(np.linalg.norm(values) * np.linalg.norm(query)) or 1.0
+            scored.append((float(values @ query) / norm, vector_id, metadata))
+        scored.sort(key=lambda match: match[0], reverse=True)
+        return SimpleNamespace(matches=[
+            SimpleNamespace(id=vector_id, score=score, metadata=dict(metadata) if include_metadata else None)
+            for score, vector_id, metadata in scored[:top_k]
+        ])
+
+    def describe_index_stats(self):
+        return SimpleNamespace(namespaces={
+            name: SimpleNamespace(vector_count=len(store)) for name, store in self.namespaces.items() if store
+        })
+
+
+class FakePinecone:
+    def __init__(self, api_key=None):
+        self.indexes = {}
+
+    def list_indexes(self):
+        return [SimpleNamespace(name=name) for name in self.indexes]
+
+    def create_index(self, name, **kwargs):
+        self.indexes[name] = FakeIndex()
+
+    def describe_index(self, name):
+        return SimpleNamespace(status=SimpleNamespace(ready=True))
+
+    def Index(self, name):
+        return self.indexes[name]
+
+
+class FakeVectorStore:
+    def __init__(self, index_name, embedding, text_key, namespace=None):
+        self.namespace = namespace
+
+    def as_retriever(self, search_kwargs=None):
+        return SimpleNamespace(search_kwargs=search_kwargs)
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
+
+
+@pytest.fixture
+def pinecone_db(monkeypatch, tmp_path, embeddings):
+    """Factory for PineconeVectorDB instances backed by one shared in-memory Pinecone"""
+    import pinecone_vector_db
+
+    client = FakePinecone()
+    monkeypatch.setattr(pinecone_vector_db, "Pinecone", lambda api_key: client)
+    monkeypatch.setattr(pinecone_vector_db, "PineconeVectorStore", FakeVectorStore)
+    monkeypatch.setenv("PINECONE_API_KEY", "test-key")
+    monkeypatch.setenv("INDEX_STATE_DIR", str(tmp_path / "index_state"))
+    monkeypatch.setenv("LEXICAL_INDEX_DIR", str(tmp_path / "lexical_index"))
+    monkeypatch.setenv("RERANKER", "none")
+
+    def create(**kwargs):
+        return pinecone_vector_db.PineconeVectorDB(index_name="test", embeddings=embeddings, **kwargs)
+
+    create.client = client
+    return create
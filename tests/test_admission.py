@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, LANE_CHAT, LANE_INGESTION, create_admission_controller
+
+
+@pytest.fixture
+def default_limits(monkeypatch):
+    for name in ("ADMISSION_MAX_CONCURRENT", "CHAT_MAX_CONCURRENT", "CHAT_MAX_QUEUE", "CHAT_QUEUE_TIMEOUT_SECONDS",
+                 "UPLOAD_MAX_CONCURRENT", "UPLOAD_MAX_QUEUE", "UPLOAD_QUEUE_TIMEOUT_SECONDS"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_default_shared_limit_binds(default_limits):
+    stats = create_admission_controller().get_stats()
+    lane_sum = sum(lane["max_concurrent"] for lane in stats["lanes"].values())
+    assert stats["max_concurrent"] < lane_sum
+
+
+def test_freed_slot_goes_to_chat_before_ingestion_with_default_limits(default_limits):
+    async def scenario():
+        controller = create_admission_controller()
+        chat_limit = controller.get_stats()["lanes"][LANE_CHAT]["max_concurrent"]
+        shared_limit = controller.max_concurrent
+
+        ingestion = [await controller.acquire(LANE_INGESTION) for _ in range(2)]
+        chats = [await controller.acquire(LANE_CHAT) for _ in range(shared_limit - 2)]
+        assert len(chats) < chat_limit
+
+        order = []
+
+        async def wait_for(lane):
+            ticket = await controller.acquire(lane)
+            order.append(lane)
+            return ticket
+
+        waiting = [asyncio.create_task(wait_for(LANE_INGESTION)), asyncio.create_task(wait_for(LANE_CHAT))]
+        await asyncio.sleep(0)
+        assert controller.get_stats()["lanes"][LANE_CHAT]["queue_depth"] == 1
+
+        ingestion[0].release()
+        await asyncio.sleep(0.01)
+        assert order == [LANE_CHAT]
+
+        chats[0].release()
+        tickets = await asyncio.gather(*waiting)
+        assert order == [LANE_CHAT, LANE_INGESTION]
+
+        for ticket in [*tickets, *ingestion, *chats]:
+            ticket.release()
+        await asyncio.sleep(0.01)
+        assert controller.get_stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_ingestion_yields_while_chat_is_queued():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=4)
+        controller.add_lane(LANE_CHAT, priority=0, max_concurrent=1, max_queue=4, queue_timeout=5)
+        controller.add_lane(LANE_INGESTION, priority=1, max_concurrent=2, max_queue=4, queue_timeout=0.05)
+
+        chat = await controller.acquire(LANE_CHAT)
+        queued_chat = asyncio.create_task(controller.acquire(LANE_CHAT))
+        await asyncio.sleep(0)
+
+        # Shared capacity is free, but a chat request is waiting
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(LANE_INGESTION)
+        assert rejected.value.status_code == 503
+
+        chat.release()
+        (await queued_chat).release()
+        (await controller.acquire(LANE_INGESTION)).release()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1)
+        controller.add_lane(LANE_CHAT, priority=0, max_concurrent=1, max_queue=1, queue_timeout=5)
+
+        ticket = await controller.acquire(LANE_CHAT)
+        queued = asyncio.create_task(controller.acquire(LANE_CHAT))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(LANE_CHAT)
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+        assert controller.get_stats()["lanes"][LANE_CHAT]["rejected_queue_full"] == 1
+
+        ticket.release()
+        (await queued).release()
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from ann_index import IVFIndex
+from local_vector_db import LocalVectorStore, _normalize
+
+
+def clustered_vectors(n=4000, dimension=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    points = centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dimension))
+    return _normalize(points)
+
+
+def exact_top_k(vectors, query, k):
+    return set(np.argsort(-(vectors @ query))[:k].tolist())
+
+
+def test_ivf_recall_on_clustered_vectors():
+    vectors = clustered_vectors()
+    index = IVFIndex.train(vectors, nprobe=8)
+
+    hits = 0
+    for query in vectors[:50]:
+        rows = index.candidates(query)
+        approximate = set(rows[np.argsort(-(vectors[rows] @ query))[:10]].tolist())
+        hits += len(approximate & exact_top_k(vectors, query, 10))
+
+    assert hits / (50 * 10) >= 0.9
+
+
+def test_ivf_probing_every_list_is_exhaustive():
+    vectors = clustered_vectors(n=500)
+    index = IVFIndex.train(vectors, nlist=10)
+
+    assert sorted(index.candidates(vectors[0], nprobe=10).tolist()) == list(range(500))
+
+
+def test_ivf_save_and_load_round_trip(tmp_path):
+    vectors = clustered_vectors(n=500)
+    index = IVFIndex.train(vectors, nlist=10, nprobe=3)
+    index.save(str(tmp_path))
+
+    loaded = IVFIndex.load(str(tmp_path), nprobe=3)
+
+    assert loaded.trained_size == index.trained_size
+    assert np.array_equal(loaded.candidates(vectors[7]), index.candidates(vectors[7]))
+    assert IVFIndex.load(str(tmp_path / "missing")) is None
+
+
+def test_store_trains_ivf_only_past_min_train_size(embeddings):
+    vectors = clustered_vectors(n=2000)
+    documents = [None] * len(vectors)
+
+    small = LocalVectorStore(embeddings, dimension=32, index_type="ivf", min_train_size=5000,
+                             vectors=vectors, documents=documents)
+    large = LocalVectorStore(embeddings, dimension=32, index_type="ivf", min_train_size=1000, nprobe=8,
+                             vectors=vectors, documents=documents)
+
+    assert small.segments[0].ann is None
+    assert large.segments[0].ann is not None
+    assert large.segments[0].ann.nlist == pytest.approx(np.sqrt(len(vectors)), abs=1)
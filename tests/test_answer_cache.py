@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from answer_cache import SemanticAnswerCache
+
+
+@pytest.fixture
+def cache(embeddings):
+    return SemanticAnswerCache(embeddings, threshold=0.9, max_entries=2, ttl_seconds=60)
+
+
+def test_equivalent_question_hits_and_different_question_misses(cache):
+    cache.store("what is the refund policy", "thirty days", [], 1.5, corpus_version=1)
+
+    entry = cache.lookup("What is the refund policy", corpus_version=1)
+
+    assert entry["answer"] == "thirty days"
+    assert entry["similarity"] >= 0.9
+    assert cache.lookup("how much annual leave do I get", corpus_version=1) is None
+    assert cache.get_stats()["hits"] == 1 and cache.get_stats()["misses"] == 1
+
+
+def test_entries_are_only_reused_within_their_scope(cache):
+    cache.store("what is the refund policy", "thirty days", [], 1.0, corpus_version=1, scope=("gpt-4o-mini", 0.7, 512))
+
+    assert cache.lookup("what is the refund policy", 1, scope=("gpt-4o-mini", 0.0, 512)) is None
+    assert cache.lookup("what is the refund policy", 1, scope=("gpt-4o-mini", 0.7, 512)) is not None
+
+
+def test_new_corpus_version_drops_every_entry(cache):
+    cache.store("what is the refund policy", "thirty days", [], 1.0, corpus_version=1)
+
+    assert cache.lookup("what is the refund policy", corpus_version=2) is None
+    assert cache.get_stats()["entries"] == 0
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_answer_generated_against_an_older_corpus_is_not_stored(cache):
+    cache.lookup("what is the refund policy", corpus_version=2)
+
+    cache.store("what is the refund policy", "thirty days", [], 1.0, corpus_version=1)
+
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.store("what is the refund policy", "thirty days", [], 1.0, corpus_version=1)
+    cache.store("how much annual leave do I get", "25 days", [], 1.0, corpus_version=1)
+    cache.lookup("what is the refund policy", corpus_version=1)
+
+    cache.store("who approves expense claims", "your manager", [], 1.0, corpus_version=1)
+
+    assert cache.lookup("how much annual leave do I get", corpus_version=1) is None
+    assert cache.lookup("what is the refund policy", corpus_version=1) is not None
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_expired_entries_are_not_served(cache, monkeypatch):
+    import answer_cache
+
+    cache.store("what is the refund policy", "thirty days", [], 1.0, corpus_version=1)
+    now = answer_cache.time.time()
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now + 61)
+
+    assert cache.lookup("what is the refund policy", corpus_version=1) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_async_lookup_and_store(cache):
+    async def run():
+        await cache.astore("what is the refund policy", "thirty days", [], 1.0, corpus_version=1)
+        return await cache.alookup("what is the refund policy", corpus_version=1)
+
+    assert asyncio.run(run())["answer"] == "thirty days"
@@ -0,0 +1,74 @@
+from langchain_core.documents import Document
+
+from context_packing import ContextPacker
+
+
+TEXT = " ".join(f"clause {i} of the travel policy applies to every trip." for i in range(40))
+
+
+def chunk(chunk_id, text, start=None, source="policy.pdf", page=0):
+    metadata = {"chunk_id": chunk_id, "source": source, "page": page}
+    if start is not None:
+        metadata["start_index"] = start
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_overlapping_positioned_chunks_merge_into_one_passage():
+    packer = ContextPacker(max_tokens=10000)
+
+    packed = packer.pack([chunk("b", TEXT[300:700], start=300), chunk("a", TEXT[0:400], start=0)])
+
+    assert len(packed) == 1
+    assert packed[0].page_content == TEXT[0:700]
+    assert packed[0].metadata["chunk_id"] == "b"
+    assert packed[0].metadata["merged_chunk_ids"] == ["a", "b"]
+
+
+def test_splitter_overlap_is_merged_without_start_index():
+    packer = ContextPacker(max_tokens=10000)
+
+    packed = packer.pack([chunk("a", TEXT[0:400]), chunk("b", TEXT[350:800])])
+
+    assert [doc.page_content for doc in packed] == [TEXT[0:800]]
+
+
+def test_duplicates_and_contained_chunks_are_dropped():
+    packer = ContextPacker(max_tokens=10000)
+
+    packed = packer.pack([
+        chunk("a", TEXT[0:400]),
+        chunk("a-copy", TEXT[0:400], source="copy.pdf"),
+        chunk("inner", TEXT[100:200])
+    ])
+
+    assert [doc.page_content for doc in packed] == [TEXT[0:400]]
+
+
+def test_chunks_from_other_pages_are_kept_apart_in_rank_order():
+    packer = ContextPacker(max_tokens=10000)
+
+    packed = packer.pack([chunk("p2", TEXT[0:400], page=2), chunk("p1", TEXT[350:800], page=1)])
+
+    assert [doc.metadata["chunk_id"] for doc in packed] == ["p2", "p1"]
+
+
+def test_passages_fill_the_token_budget_in_rank_order():
+    passages = [chunk(f"c{i}", f"topic {i}: " + TEXT, page=i) for i in range(4)]
+    first_tokens = ContextPacker().count_tokens(passages[0].page_content)
+    packer = ContextPacker(max_tokens=first_tokens + 100)
+
+    packed = packer.pack(passages)
+
+    # The first passage fits whole, the second is truncated to the remaining 100 tokens
+    assert [doc.metadata["chunk_id"] for doc in packed] == ["c0", "c1"]
+    assert packed[0].page_content == passages[0].page_content
+    assert passages[1].page_content.startswith(packed[1].page_content)
+    assert packer.count_tokens(packed[1].page_content) <= 101
+    assert packer.get_stats()["tokens_out"] == first_tokens + 100
+
+
+def test_tail_too_small_to_be_useful_is_not_added():
+    passages = [chunk(f"c{i}", f"topic {i}: " + TEXT, page=i) for i in range(2)]
+    packer = ContextPacker(max_tokens=ContextPacker().count_tokens(passages[0].page_content) + 10)
+
+    assert [doc.metadata["chunk_id"] for doc in packer.pack(passages)] == ["c0"]
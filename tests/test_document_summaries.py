@@ -0,0 +1,79 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from document_processor import assign_chunk_ids
+from document_summaries import DocumentSummarizer, SummaryStore, classify_summary_intent
+
+
+SOURCES = ["employee_handbook.pdf", "travel-policy.pdf"]
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Summarize the documents", (True, None)),
+    ("Can you give me a quick overview of all the files?", (True, None)),
+    ("What are the main points of the employee handbook?", (True, "employee_handbook.pdf")),
+    ("tl;dr travel policy please", (True, "travel-policy.pdf")),
+    ("Summarize the refund policy", (False, None)),
+    ("How many vacation days do I get?", (False, None)),
+])
+def test_classify_summary_intent(question, expected):
+    assert classify_summary_intent(question, SOURCES) == expected
+
+
+def chunks(source, *texts):
+    return [Document(page_content=text, metadata={"source": source, "page": page}) for page, text in enumerate(texts)]
+
+
+@pytest.fixture
+def summarizer(tmp_path):
+    prompts = []
+
+    def llm(prompt):
+        prompts.append(prompt.to_string())
+        return f"summary {len(prompts)}"
+
+    summarizer = DocumentSummarizer(RunnableLambda(llm), SummaryStore(str(tmp_path / "summaries.json")))
+    summarizer.prompts = prompts
+    return summarizer
+
+
+def test_update_skips_llm_calls_when_nothing_changed(summarizer):
+    documents = assign_chunk_ids(chunks("a.pdf", "alpha") + chunks("b.pdf", "beta"))
+    summarizer.update(documents)
+    calls = len(summarizer.prompts)
+    corpus = summarizer.store.get()
+
+    result = summarizer.update(assign_chunk_ids(chunks("a.pdf", "alpha") + chunks("b.pdf", "beta")))
+
+    assert len(summarizer.prompts) == calls
+    assert result == {"summarized": 0, "unchanged": 2, "removed": 0, "corpus_summarized": False}
+    assert summarizer.store.get() == corpus
+
+
+def test_merge_keeps_other_documents_and_rebuilds_corpus(summarizer):
+    summarizer.update(assign_chunk_ids(chunks("a.pdf", "alpha") + chunks("b.pdf", "beta")))
+    first_corpus = summarizer.store.get()
+
+    result = summarizer.update(assign_chunk_ids(chunks("b.pdf", "beta revised")), merge=True)
+
+    assert result["summarized"] == 1 and result["corpus_summarized"]
+    assert summarizer.store.sources() == ["a.pdf", "b.pdf"]
+    assert summarizer.store.get()["digest"] != first_corpus["digest"]
+
+
+def test_previous_corpus_summary_is_served_while_rebuilding(summarizer):
+    summarizer.update(assign_chunk_ids(chunks("a.pdf", "alpha") + chunks("b.pdf", "beta")))
+    corpus = summarizer.store.get()
+    served = []
+
+    original = summarizer.summarize_document
+
+    def summarize_document(source, document_chunks):
+        served.append((summarizer.store.get(), summarizer.store.get("b.pdf")))
+        return original(source, document_chunks)
+
+    summarizer.summarize_document = summarize_document
+    summarizer.update(assign_chunk_ids(chunks("a.pdf", "alpha") + chunks("b.pdf", "beta revised")))
+
+    assert served == [(corpus, None)]
@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+from history_policy import SUMMARY_PREFIX, HistoryPolicy
+from session_store import BoundedChatMessageHistory
+
+
+def add_turns(history, start, count):
+    for i in range(start, start + count):
+        history.add_messages([HumanMessage(content=f"question {i}"), AIMessage(content=f"answer {i}")])
+
+
+@pytest.fixture
+def policy():
+    prompts = []
+
+    def llm(prompt):
+        prompts.append(prompt.to_string())
+        return f"summary after {len(prompts)} refreshes"
+
+    policy = HistoryPolicy(RunnableLambda(llm), recent_turns=2)
+    policy.prompts = prompts
+    yield policy
+    policy.shutdown()
+
+
+def test_window_keeps_older_turns_verbatim_until_summarized(policy):
+    history = BoundedChatMessageHistory()
+    add_turns(history, 0, 5)
+
+    # Keep the background summarizer out of this test
+    policy.schedule_refresh = lambda session_id, history: None
+    window = policy.window("s1", history)
+
+    assert [message.content for message in window] == [message.content for message in history.messages]
+
+
+def test_summary_replaces_older_turns_and_recent_turns_stay(policy):
+    history = BoundedChatMessageHistory()
+    add_turns(history, 0, 5)
+
+    policy._refresh("s1", history)
+    window = policy.wrap("s1", history).messages
+
+    assert isinstance(window[0], SystemMessage)
+    assert window[0].content == f"{SUMMARY_PREFIX}\nsummary after 1 refreshes"
+    assert [message.content for message in window[1:]] == ["question 3", "answer 3", "question 4", "answer 4"]
+    assert "question 0" in policy.prompts[0] and "question 3" not in policy.prompts[0]
+
+
+def test_refresh_sends_only_turns_not_yet_summarized(policy):
+    history = BoundedChatMessageHistory()
+    add_turns(history, 0, 5)
+    policy._refresh("s1", history)
+
+    add_turns(history, 5, 2)
+    policy._refresh("s1", history)
+
+    assert "summary after 1 refreshes" in policy.prompts[1]
+    assert "question 3" in policy.prompts[1] and "question 2" not in policy.prompts[1]
+    assert history.get_summary() == ("summary after 2 refreshes", 10)
+    assert len(policy.wrap("s1", history).messages) == 1 + 2 * policy.recent_turns
+
+
+def test_refresh_without_older_turns_does_not_call_the_llm(policy):
+    history = BoundedChatMessageHistory()
+    add_turns(history, 0, 2)
+
+    policy._refresh("s1", history)
+
+    assert policy.prompts == []
+    assert policy.get_stats()["refreshes"] == 0
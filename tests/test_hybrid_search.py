@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+
+from hybrid_search import BM25Index, HybridRetriever, reciprocal_rank_fusion, search_indexes, tokenize
+
+
+def chunk(chunk_id, text):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id})
+
+
+CORPUS = [
+    chunk("leave", "annual leave accrues monthly for permanent staff"),
+    chunk("error", "error ERR_QUOTA_7 means the upload quota is exhausted"),
+    chunk("quota", "each team has an upload quota reviewed every quarter"),
+    chunk("refund", "refund requests are accepted within thirty days"),
+]
+
+
+def test_tokenize_splits_identifiers_and_drops_stopwords():
+    assert tokenize("The ERR_QUOTA_7 in config.yaml") == [
+        "err_quota_7", "err", "quota", "7", "config.yaml", "config", "yaml"
+    ]
+
+
+def test_bm25_ranks_exact_identifier_match_first():
+    index = BM25Index.build(CORPUS)
+
+    results = index.search("ERR_QUOTA_7 quota")
+
+    assert [chunk_id for chunk_id, _ in results][:2] == ["error", "quota"]
+    assert index.search("nothing matches this") == []
+
+
+def test_bm25_add_replaces_existing_chunk_and_remove_drops_terms():
+    index = BM25Index.build(CORPUS)
+
+    index = index.add([chunk("refund", "refunds are handled by the finance desk")])
+    assert len(index) == len(CORPUS)
+    assert index.search("thirty") == []
+    assert index.search("finance")[0][0] == "refund"
+
+    index = index.remove(["refund"])
+    assert "finance" not in index.vocabulary
+    assert index.search("finance") == []
+
+
+def test_bm25_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(CORPUS)
+    index.save(str(tmp_path))
+
+    loaded = BM25Index.load(str(tmp_path))
+
+    assert loaded.search("upload quota") == pytest.approx(index.search("upload quota"))
+    assert BM25Index.load(str(tmp_path / "missing")) is None
+
+
+def test_search_indexes_scores_split_indexes_as_one_corpus():
+    whole = BM25Index.build(CORPUS)
+    parts = [BM25Index.build(CORPUS[:2]), BM25Index.build(CORPUS[2:])]
+
+    assert search_indexes(parts, "upload quota staff") == pytest.approx(whole.search("upload quota staff"))
+
+    excluded = [None, [True, False]]
+    assert "quota" not in dict(search_indexes(parts, "upload quota", excluded=excluded))
+
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["d", "b", "a"]])
+
+    # Items found by both rankings beat items ranked well by only one
+    assert [item for item, _ in fused][:2] == ["a", "b"]
+    assert dict(fused)["b"] > dict(fused)["d"]
+
+    weighted = reciprocal_rank_fusion([["a"], ["d"]], weights=[1.0, 2.0])
+    assert weighted[0][0] == "d"
+
+
+def test_hybrid_retriever_fetches_lexical_only_hits():
+    index = BM25Index.build(CORPUS)
+    documents = {doc.metadata["chunk_id"]: doc for doc in CORPUS}
+    fetched = []
+
+    def fetch_documents(ids):
+        fetched.extend(ids)
+        return [documents[chunk_id] for chunk_id in ids]
+
+    retriever = HybridRetriever(
+        vectorstore=SimpleNamespace(similarity_search=lambda query, k: [documents["leave"]]),
+        lexical_search=index.search,
+        fetch_documents=fetch_documents,
+        k=2,
+        lexical_weight=2.0
+    )
+
+    results = retriever.search("refund requests")
+
+    assert [doc.metadata["chunk_id"] for doc in results] == ["refund", "leave"]
+    assert fetched == ["refund"]
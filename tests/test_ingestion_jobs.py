@@ -0,0 +1,161 @@
+import sys
+import time
+import threading
+import subprocess
+
+import pytest
+
+from ingestion_jobs import IngestionJobManager, FileJobStore, JobQueueFull, STAGE_COMPLETED, STAGE_FAILED
+
+
+def wait_for(manager, job_id, stage, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get_job(job_id)
+        if job and job["stage"] == stage:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not reach {stage}")
+
+
+def test_job_status_is_visible_from_another_worker(tmp_path):
+    owner = IngestionJobManager(job_store=FileJobStore(str(tmp_path)))
+    other = IngestionJobManager(job_store=FileJobStore(str(tmp_path)))
+    try:
+        job_id = owner.create_job(["policy.pdf"])
+        assert other.get_job(job_id)["job_id"] == job_id
+
+        owner.submit(job_id, lambda: {"documents_processed": 1})
+        job = wait_for(other, job_id, STAGE_COMPLETED)
+        assert not any(key.startswith("_") for key in job)
+        assert [job["job_id"] for job in other.list_jobs()] == [job_id]
+    finally:
+        owner.shutdown()
+        other.shutdown()
+
+
+def test_job_store_prunes_oldest_finished_jobs(tmp_path):
+    manager = IngestionJobManager(max_jobs=2, job_store=FileJobStore(str(tmp_path)))
+    try:
+        first = manager.create_job(["a.pdf"])
+        manager.update(first, stage=STAGE_COMPLETED)
+        manager.create_job(["b.pdf"])
+        manager.create_job(["c.pdf"])
+
+        assert manager.job_store.read(first) is None
+        assert len(manager.job_store.list()) == 2
+    finally:
+        manager.shutdown()
+
+
+def test_create_job_refuses_more_than_max_pending_jobs():
+    manager = IngestionJobManager(max_pending=2)
+    release = threading.Event()
+    try:
+        first = manager.create_job(["a.pdf"])
+        manager.submit(first, release.wait)
+        manager.create_job(["b.pdf"])
+
+        with pytest.raises(JobQueueFull) as rejected:
+            manager.create_job(["c.pdf"])
+        assert rejected.value.retry_after >= 1
+
+        release.set()
+        wait_for(manager, first, STAGE_COMPLETED)
+        assert manager.create_job(["c.pdf"])
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_progress_reports_stage_throughput_and_eta():
+    manager = IngestionJobManager()
+    try:
+        job_id = manager.create_job(["policy.pdf"])
+        report = manager.progress_callback(job_id)
+
+        report(50, 0, 100)
+        assert manager.get_job(job_id)["stage"] == "embedding"
+
+        time.sleep(0.05)
+        report(60, 60, 100)
+        job = manager.get_job(job_id)
+        assert job["stage"] == "upserting"
+        assert (job["chunks_embedded"], job["chunks_upserted"], job["chunks_total"]) == (60, 60, 100)
+        assert job["throughput"] > 0
+        assert job["eta_seconds"] == pytest.approx(40 / job["throughput"], abs=0.01)
+        assert not any(key.startswith("_") for key in job)
+    finally:
+        manager.shutdown()
+
+
+def test_failed_job_records_the_error_and_finish_time():
+    manager = IngestionJobManager()
+
+    def ingest():
+        raise ValueError("no text found in scan.pdf")
+
+    try:
+        job_id = manager.create_job(["scan.pdf"])
+        manager.submit(job_id, ingest)
+
+        job = wait_for(manager, job_id, "failed")
+        assert job["error"] == "no text found in scan.pdf"
+        assert job["started_at"] and job["finished_at"]
+        assert job["result"] is None
+    finally:
+        manager.shutdown()
+
+
+def test_completed_job_keeps_the_result_in_order():
+    manager = IngestionJobManager()
+    try:
+        first = manager.create_job(["a.pdf"])
+        second = manager.create_job(["b.pdf"])
+        manager.submit(first, lambda: {"documents_processed": 3})
+        manager.submit(second, lambda: {"documents_processed": 5})
+
+        assert wait_for(manager, second, STAGE_COMPLETED)["result"] == {"documents_processed": 5}
+        assert [job["job_id"] for job in manager.list_jobs()] == [first, second]
+        assert manager.get_job(first)["stage"] == STAGE_COMPLETED
+    finally:
+        manager.shutdown()
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_jobs_of_an_exited_worker_are_failed_and_pruned(tmp_path):
+    store = FileJobStore(str(tmp_path))
+    store.write({"job_id": "orphan", "stage": "embedding", "created_at": "2024-01-01T00:00:00",
+                 "worker_pid": exited_pid()})
+    store.write({"job_id": "legacy", "stage": "parsing", "created_at": "2024-01-01T00:00:01"})
+    manager = IngestionJobManager(max_jobs=1, job_store=store)
+    try:
+        assert store.read("orphan")["stage"] == STAGE_FAILED
+        assert store.read("legacy")["stage"] == "parsing"
+
+        job_id = manager.create_job(["a.pdf"])
+
+        assert [job["job_id"] for job in store.list()] == ["legacy", job_id]
+        assert FileJobStore(str(tmp_path), stale_seconds=0.001).read("legacy")["stage"] == STAGE_FAILED
+    finally:
+        manager.shutdown()
+
+
+def test_listing_only_rereads_changed_job_files(tmp_path, monkeypatch):
+    store = FileJobStore(str(tmp_path))
+    for name in ("a", "b"):
+        store.write({"job_id": name, "stage": STAGE_COMPLETED, "created_at": name})
+    store.list()
+
+    reads = []
+    original_read = store.read
+    monkeypatch.setattr(store, "read", lambda job_id: reads.append(job_id) or original_read(job_id))
+    store.write({"job_id": "b", "stage": STAGE_FAILED, "created_at": "b"})
+
+    assert [job["stage"] for job in store.list()] == [STAGE_COMPLETED, STAGE_FAILED]
+    assert reads == ["b"]
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+from mmap_store import current_version, read_manifest
+
+
+def chunk(text, source="policy.pdf", page=0):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+CORPUS = [
+    chunk("refund requests are accepted within thirty days"),
+    chunk("annual leave accrues monthly for permanent staff", page=1),
+    chunk("expense claims need a receipt and manager approval", page=2),
+]
+
+
+@pytest.fixture
+def local_db(monkeypatch, tmp_path, embeddings):
+    """Factory for LocalVectorDB instances sharing one index directory"""
+    import local_vector_db
+
+    monkeypatch.setenv("RERANKER", "none")
+
+    def create(**kwargs):
+        return local_vector_db.LocalVectorDB(
+            index_name="test", embeddings=embeddings, persist_dir=str(tmp_path), **kwargs
+        )
+
+    create.index_path = str(tmp_path / "test")
+    return create
+
+
+def published_segments(index_path):
+    return [segment["name"] for segment in read_manifest(index_path, current_version(index_path))["segments"]]
+
+
+def segment_dirs(index_path):
+    return sorted(name for name in os.listdir(index_path) if name.startswith("s-"))
+
+
+def test_insert_writes_only_a_new_segment(local_db):
+    db = local_db()
+    db.create_vectorstore(list(CORPUS))
+    [base] = published_segments(local_db.index_path)
+    base_mtime = os.stat(os.path.join(local_db.index_path, base, "vectors.f32")).st_mtime_ns
+
+    db.add_documents([chunk("travel bookings go through the approved agency", source="travel.pdf")])
+
+    segments = published_segments(local_db.index_path)
+    assert segments[0] == base and len(segments) == 2
+    assert os.stat(os.path.join(local_db.index_path, base, "vectors.f32")).st_mtime_ns == base_mtime
+    assert read_manifest(local_db.index_path, current_version(local_db.index_path))["segments"][1]["deleted"] == []
+    assert db.search("travel agency", k=1)[0].metadata["source"] == "travel.pdf"
+    assert len(db.vectorstore) == 4
+
+
+def test_sync_masks_stale_chunks_for_every_worker(local_db, monkeypatch):
+    monkeypatch.setenv("LOCAL_COMPACT_DELETED_RATIO", "0.5")
+    db = local_db()
+    db.sync_documents(list(CORPUS))
+    db.sync_documents([chunk("refund requests are accepted within fourteen days"), *CORPUS[1:]])
+
+    other = local_db()
+    for instance in (db, other):
+        assert len(instance.vectorstore) == 3
+        texts = {doc.page_content for doc in instance.search("refund requests days", k=3)}
+        assert "refund requests are accepted within thirty days" not in texts
+        lexical_ids = {chunk_id for chunk_id, _ in instance.vectorstore.lexical_search("thirty")}
+        assert not lexical_ids
+
+    manifest = read_manifest(local_db.index_path, current_version(local_db.index_path))
+    deleted = [segment["deleted"] for segment in manifest["segments"]]
+    assert deleted[0] and not deleted[1]
+
+
+def test_segments_are_compacted_and_unreferenced_ones_removed(local_db, monkeypatch):
+    monkeypatch.setenv("LOCAL_MAX_SEGMENTS", "2")
+    db = local_db()
+    db.create_vectorstore(list(CORPUS))
+    for i in range(5):
+        db.add_documents([chunk(f"bulletin number {i} about office hours", source=f"bulletin-{i}.pdf")])
+
+    assert len(db.vectorstore.segments) <= 2
+    assert segment_dirs(local_db.index_path) == sorted(published_segments(local_db.index_path))
+    assert len(db.vectorstore) == 8
+    assert local_db().search("bulletin number 4", k=1)[0].metadata["source"] == "bulletin-4.pdf"
+
+
+def test_deleted_rows_trigger_a_full_compaction(local_db, monkeypatch):
+    monkeypatch.setenv("LOCAL_COMPACT_DELETED_RATIO", "0.4")
+    db = local_db()
+    db.create_vectorstore(list(CORPUS))
+    store = db.vectorstore
+
+    store.delete([store.ids[0]])
+    assert store.segments[0].deleted_count == 1
+
+    store.delete([store.ids[0]])
+    [segment] = store.segments
+    assert segment.deleted is None and len(segment) == 1
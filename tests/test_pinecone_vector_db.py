@@ -0,0 +1,107 @@
+import pytest
+from langchain_core.documents import Document
+
+from document_processor import assign_chunk_ids
+
+
+def chunk(text, source="policy.pdf", page=0):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+CORPUS = [
+    chunk("refund requests are accepted within thirty days"),
+    chunk("annual leave accrues monthly for permanent staff", page=1),
+    chunk("expense claims need a receipt and manager approval", page=2),
+]
+
+
+def test_validate_namespace_accepts_self_retrieval(pinecone_db):
+    db = pinecone_db(retrieval_mode="dense")
+    db._ensure_index_exists()
+    documents = assign_chunk_ids(list(CORPUS))
+    db._upsert_documents(documents, namespace="shadow")
+
+    db._validate_namespace("shadow", documents)
+
+
+def test_validate_namespace_rejects_mismatched_embeddings(pinecone_db):
+    db = pinecone_db(retrieval_mode="dense", validation_timeout=0)
+    db._ensure_index_exists()
+    documents = assign_chunk_ids(list(CORPUS))
+    db._upsert_documents(documents, namespace="shadow")
+
+    # Vectors no longer match their chunks, as with a different embedding model
+    store = pinecone_db.client.Index("test").namespaces["shadow"]
+    ids = list(store)
+    store[ids[0]], store[ids[1]] = (store[ids[1]][0], store[ids[0]][1]), (store[ids[0]][0], store[ids[1]][1])
+
+    with pytest.raises(RuntimeError, match="retrieved"):
+        db._validate_namespace("shadow", documents)
+
+
+@pytest.mark.parametrize("retrieval_mode", ["dense", "hybrid"])
+def test_add_documents_bumps_version(pinecone_db, retrieval_mode):
+    db = pinecone_db(retrieval_mode=retrieval_mode)
+    db.create_vectorstore(list(CORPUS[:2]))
+    version = db.version
+
+    db.add_documents([CORPUS[2]])
+
+    assert db.version > version
+    assert db.metrics["documents_indexed"] == 3
+
+
+def test_add_documents_reaches_other_workers_in_dense_mode(pinecone_db):
+    writer = pinecone_db(retrieval_mode="dense")
+    writer.create_vectorstore(list(CORPUS[:2]))
+    reader = pinecone_db(retrieval_mode="dense")
+    version = reader.version
+
+    writer.add_documents([CORPUS[2]])
+
+    assert reader.refresh()
+    assert reader.version > version
+
+
+def test_first_hybrid_sync_builds_lexical_index_from_uploaded_chunks(pinecone_db, monkeypatch):
+    db = pinecone_db(retrieval_mode="hybrid")
+    db._ensure_index_exists()
+    index = pinecone_db.client.Index("test")
+
+    # Listing lags behind writes and fetches would scale with the corpus
+    monkeypatch.setattr(index, "list", lambda namespace="": iter([]))
+    monkeypatch.setattr(index, "fetch", lambda **kwargs: pytest.fail("unexpected fetch"))
+
+    db.sync_documents(list(CORPUS))
+
+    assert sorted(db.lexical_index.chunk_ids) == sorted(doc.metadata["chunk_id"] for doc in CORPUS)
+    assert db.lexical_index.search("receipt")[0][0] == CORPUS[2].metadata["chunk_id"]
+
+
+def test_hybrid_sync_applies_delta_to_lexical_index(pinecone_db, monkeypatch):
+    db = pinecone_db(retrieval_mode="hybrid")
+    db.sync_documents(list(CORPUS))
+    index = pinecone_db.client.Index("test")
+    monkeypatch.setattr(index, "fetch", lambda **kwargs: pytest.fail("unexpected fetch"))
+
+    handbook = [chunk("remote work needs written approval", source="handbook.pdf")]
+    db.sync_documents(handbook)
+    # Re-uploading policy.pdf without its first chunk deletes that chunk
+    diff = db.sync_documents([chunk(doc.page_content, page=doc.metadata["page"]) for doc in CORPUS[1:]])
+
+    expected = {doc.metadata["chunk_id"] for doc in CORPUS[1:] + handbook}
+    assert diff["deleted"] == 1
+    assert set(db.lexical_index.chunk_ids) == expected
+    assert set(index.namespaces[""]) == expected
+
+
+def test_hybrid_sync_fetches_only_chunks_missing_from_lexical_index(pinecone_db):
+    hybrid = pinecone_db(retrieval_mode="hybrid")
+    # Written by a worker running in dense mode, so no keyword index was saved
+    dense = pinecone_db(retrieval_mode="dense")
+    dense.create_vectorstore(list(CORPUS[:2]))
+
+    hybrid.sync_documents([chunk("remote work needs written approval", source="handbook.pdf")])
+
+    assert len(hybrid.lexical_index) == 3
+    assert hybrid.lexical_index.search("refund")[0][0] == CORPUS[0].metadata["chunk_id"]
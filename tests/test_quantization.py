@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from local_vector_db import LocalVectorStore, _normalize
+from quantization import BinaryQuantizer, Int8Quantizer, create_quantizer, load_quantizer, quantizer_stats
+
+
+@pytest.fixture
+def vectors():
+    return _normalize(np.random.default_rng(0).normal(size=(1000, 64)))
+
+
+def test_int8_codes_reconstruct_vectors_within_half_a_step(vectors):
+    quantizer = Int8Quantizer.train(vectors)
+
+    reconstructed = quantizer.codes.astype(np.float32) * quantizer.scales
+
+    assert np.all(np.abs(reconstructed - vectors) <= quantizer.scales / 2 + 1e-6)
+    assert quantizer.nbytes * 4 == vectors.nbytes
+
+
+def test_int8_scores_track_exact_dot_products(vectors):
+    quantizer = Int8Quantizer.train(vectors)
+    query = vectors[3]
+
+    assert np.corrcoef(quantizer.score(query), vectors @ query)[0, 1] > 0.99
+    rows = np.array([5, 3, 9])
+    assert quantizer.score(query, rows) == pytest.approx(quantizer.score(query)[rows])
+
+
+def test_binary_codes_are_sign_bits(vectors):
+    quantizer = BinaryQuantizer.train(vectors)
+
+    assert np.array_equal(np.unpackbits(quantizer.codes, axis=1)[:, :64].astype(bool), vectors > 0)
+    assert quantizer.nbytes * 32 == vectors.nbytes
+    assert np.argmax(quantizer.score(vectors[42])) == 42
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_quantizer_save_and_load_round_trip(tmp_path, vectors, mode):
+    quantizer = create_quantizer(mode, vectors)
+    quantizer.save(str(tmp_path))
+
+    loaded = load_quantizer(mode, str(tmp_path), vectors.shape[1])
+
+    assert np.array_equal(loaded.score(vectors[0]), quantizer.score(vectors[0]))
+    assert load_quantizer(mode, str(tmp_path / "missing"), vectors.shape[1]) is None
+
+
+def test_unknown_quantization_is_rejected(vectors):
+    with pytest.raises(ValueError, match="Unknown quantization"):
+        create_quantizer("int4", vectors)
+
+
+@pytest.mark.parametrize("mode, min_recall", [("int8", 0.99), ("binary", 0.75)])
+def test_rescored_search_recall_against_exact(embeddings, vectors, mode, min_recall):
+    documents = [Document(page_content=str(i), metadata={"chunk_id": str(i)}) for i in range(len(vectors))]
+    store = LocalVectorStore(embeddings, dimension=64, quantization=mode, vectors=vectors, documents=documents)
+
+    # Shortlisted rows are rescored at full precision, so returned scores are exact
+    results = store.similarity_search_with_score_by_vector(vectors[17].tolist(), k=5)
+    assert results[0][0].metadata["chunk_id"] == "17"
+    rows = [int(doc.page_content) for doc, _ in results]
+    assert [score for _, score in results] == pytest.approx(vectors[rows] @ vectors[17])
+
+    assert store.evaluate_recall(k=5, sample_size=100)["recall"] >= min_recall
+    stats = quantizer_stats([segment.quantizer for segment in store.segments], len(store), 64)
+    assert stats["mode"] == mode and stats["compression"] == (4.0 if mode == "int8" else 32.0)
@@ -0,0 +1,130 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import session_store
+from session_store import MemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+def turn(i):
+    return [HumanMessage(content=f"question {i}"), AIMessage(content=f"answer {i}")]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def create(**limits):
+        if request.param == "sqlite":
+            return SQLiteSessionStore(path=str(tmp_path / "sessions.sqlite3"), **limits)
+        return MemorySessionStore(**limits)
+
+    return create
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the session store"""
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_session_is_evicted(make_store, clock):
+    store = make_store(max_sessions=2)
+    store.get("a").add_messages(turn(0))
+    clock[0] += 1
+    store.get("b")
+    clock[0] += 1
+    store.get("a")
+    clock[0] += 1
+
+    store.get("c")
+
+    assert store.session_ids() == ["a", "c"]
+    assert store.get_stats()["lru_evictions"] == 1
+    assert [message.content for message in store.get("a").messages] == ["question 0", "answer 0"]
+
+
+def test_idle_sessions_expire(make_store, clock):
+    store = make_store(ttl_seconds=60)
+    store.get("a").add_messages(turn(0))
+
+    clock[0] += 61
+
+    assert "a" not in store
+    assert store.get("a").messages == []
+    assert store.get_stats()["ttl_evictions"] == 1
+
+
+def test_history_keeps_whole_recent_exchanges(make_store):
+    store = make_store(max_messages=5)
+    history = store.get("a")
+    for i in range(4):
+        history.add_messages(turn(i))
+
+    messages = store.get("a").messages
+    assert [message.content for message in messages] == ["question 2", "answer 2", "question 3", "answer 3"]
+    assert store.get_stats()["messages"] == 4
+
+
+def test_delete_and_stats(make_store):
+    store = make_store()
+    store.get("a").add_messages(turn(0))
+
+    assert store.get_stats()["sessions"] == 1
+    assert store.get_stats()["history_tokens"] > 0
+    assert store.delete("a") is True
+    assert store.delete("a") is False
+    assert len(store) == 0
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown session backend"):
+        create_session_store("redis")
+
+
+def test_sqlite_sessions_persist_across_store_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    writer = SQLiteSessionStore(path=path)
+    writer.get("a").add_messages(turn(0))
+    writer.get("a").set_summary("asked about refunds", 2)
+
+    reader = SQLiteSessionStore(path=path)
+
+    history = reader.get("a")
+    assert [message.content for message in history.messages] == ["question 0", "answer 0"]
+    assert history.get_summary() == ("asked about refunds", 2)
+    assert [seq for seq, _ in history.message_records()] == [1, 2]
+    assert reader.session_ids() == ["a"]
+
+
+def test_sqlite_eviction_by_one_worker_is_seen_by_another(tmp_path, clock):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SQLiteSessionStore(path=path, ttl_seconds=60)
+    second = SQLiteSessionStore(path=path, ttl_seconds=60)
+    first.get("a").add_messages(turn(0))
+
+    clock[0] += 61
+    second.get("b")
+
+    assert first.session_ids() == ["b"]
+    assert first.get("a").messages == []
+
+
+def test_peek_does_not_refresh_the_session(make_store, clock):
+    store = make_store(max_sessions=2, ttl_seconds=60)
+    store.get("a").add_messages(turn(0))
+    clock[0] += 1
+    store.get("b")
+    clock[0] += 30
+
+    assert store.peek("a").token_counts()["messages"] == 2
+    assert store.peek("missing") is None
+    assert "missing" not in store
+
+    # "a" stays least recently used, so it is the one evicted
+    store.get("c")
+    assert store.session_ids() == ["b", "c"]
+
+    # Peeking at "b" did not extend its idle deadline
+    store.peek("b")
+    clock[0] += 40
+    assert store.peek("b") is None
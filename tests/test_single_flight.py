@@ -0,0 +1,110 @@
+import asyncio
+
+from single_flight import SingleFlight, normalize_query
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  What is the   Refund policy?") == normalize_query("what is the refund policy?")
+
+
+def test_concurrent_calls_with_the_same_key_run_once():
+    flights = SingleFlight("chat")
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "thirty days"
+
+    async def run():
+        return await asyncio.gather(*[flights.do("refund", answer) for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["thirty days"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flights.get_stats()["coalesced"] == 4
+    assert flights.get_stats()["in_flight"] == 0
+
+
+def test_calls_with_different_keys_run_separately():
+    flights = SingleFlight("chat")
+    calls = []
+
+    async def answer(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def run():
+        return await asyncio.gather(*[flights.do(key, lambda key=key: answer(key)) for key in ("a", "b")])
+
+    assert [result for result, _ in asyncio.run(run())] == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_failure_reaches_every_caller_and_is_not_cached():
+    flights = SingleFlight("chat")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("llm down")
+
+    async def run():
+        return await asyncio.gather(*[flights.do("q", fail) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+    async def succeed():
+        return "ok"
+
+    assert asyncio.run(flights.do("q", succeed)) == ("ok", False)
+
+
+def test_stream_is_replayed_to_late_subscribers():
+    flights = SingleFlight("chat_stream")
+    started = []
+
+    async def tokens():
+        started.append(1)
+        for token in ("a", "b", "c"):
+            await asyncio.sleep(0.005)
+            yield token
+
+    async def collect(items):
+        return [item async for item in items]
+
+    async def run():
+        first, shared_first = flights.stream("q", tokens)
+        await asyncio.sleep(0.008)
+        second, shared_second = flights.stream("q", tokens)
+        results = await asyncio.gather(collect(first), collect(second))
+        return results, shared_first, shared_second
+
+    (first, second), shared_first, shared_second = asyncio.run(run())
+
+    assert len(started) == 1
+    assert first == second == ["a", "b", "c"]
+    assert (shared_first, shared_second) == (False, True)
+
+
+def test_coalesced_retriever_runs_equivalent_searches_once():
+    from langchain_core.documents import Document
+    from langchain_core.runnables import RunnableLambda
+
+    searches = []
+
+    async def search(query):
+        searches.append(query)
+        await asyncio.sleep(0.01)
+        return [Document(page_content=query)]
+
+    retriever = SingleFlight("search").coalesce_retriever(RunnableLambda(lambda q: [], afunc=search), scope=1)
+
+    async def run():
+        return await asyncio.gather(retriever.ainvoke("Refund policy"), retriever.ainvoke("refund  policy"))
+
+    results = asyncio.run(run())
+    assert len(searches) == 1
+    assert results[0] == results[1]
@@ -0,0 +1,58 @@
+"""
+Token Counting
+tiktoken counts for prompt budgets, approximated when the encoding cannot be loaded
+"""
+
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+# Tokenizer imports
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Rough English average used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+_encodings: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_encoding(model_name: str = DEFAULT_MODEL) -> Optional[Any]:
+    """tiktoken encoding for a model, loaded once (it may need a download); None if unavailable"""
+    with _lock:
+        if model_name not in _encodings:
+            encoding = None
+            if TIKTOKEN_AVAILABLE:
+                try:
+                    encoding = tiktoken.encoding_for_model(model_name)
+                except Exception as e:
+                    logger.warning(f"⚠️ Tokenizer unavailable, approximating token counts: {str(e)}")
+            _encodings[model_name] = encoding
+        return _encodings[model_name]
+
+
+def count_tokens(text: str, model_name: str = DEFAULT_MODEL) -> int:
+    encoding = get_encoding(model_name)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def truncate_tokens(text: str, max_tokens: int, model_name: str = DEFAULT_MODEL) -> str:
+    encoding = get_encoding(model_name)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def tokenizer_name(model_name: str = DEFAULT_MODEL) -> str:
+    encoding = get_encoding(model_name)
+    return encoding.name if encoding is not None else "approximate"
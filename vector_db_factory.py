@@ -0,0 +1,32 @@
+"""
+Vector Database Factory
+Selects the vector database backend from the VECTOR_BACKEND environment variable
+"""
+
+import os
+import logging
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_BACKENDS = ("pinecone", "local")
+
+
+def create_vector_db(index_name: str, embeddings: Optional[Embeddings] = None, backend: Optional[str] = None):
+    """Create the configured vector database (PineconeVectorDB or LocalVectorDB)"""
+    backend = (backend or os.getenv("VECTOR_BACKEND", "pinecone")).lower()
+
+    # Backends are imported lazily so each only needs its own dependencies
+    if backend == "pinecone":
+        from pinecone_vector_db import PineconeVectorDB
+        vector_db = PineconeVectorDB(index_name=index_name, embeddings=embeddings)
+    elif backend == "local":
+        from local_vector_db import LocalVectorDB
+        vector_db = LocalVectorDB(index_name=index_name, embeddings=embeddings)
+    else:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{backend}'. Expected one of: {', '.join(SUPPORTED_BACKENDS)}")
+
+    logger.info(f"✅ Using '{backend}' vector database backend")
+    return vector_db